@@ -0,0 +1,117 @@
+""" Benchmarks the hot paths of medali at scales from 1 to 100k `MetaData` instances (s1dc_flood_mapper, V1M2). """
+
+import os
+
+from medali.core import MetaData
+from medali.config import LIB_DIRPATH
+from medali.config import read_config
+
+try:
+    from .set_metadata import FLOOD_METADATA
+except ImportError:  # executed as a script
+    from set_metadata import FLOOD_METADATA
+
+
+SCALES = [1, 10, 100, 1000, 10000, 100000]
+WORKER_NAME, VERSION_ID = "s1dc_flood_mapper", "V1M2"
+# attribute of the flood mapper schema and a decoded example value per data type
+DTYPE_ATTRIBUTES = {'string': 'tile_id',
+                    'integer': 'orbit_relative',
+                    'number': 'water_backscatter_std',
+                    'boolean': 'mask_applied',
+                    'datetime': 'date_sensing'}
+
+
+def list_cfg_files():
+    """ list : Paths of all shipped product config files relative to the "lib" folder. """
+    cfg_rel_filepaths = []
+    for dirpath, dirnames, filenames in os.walk(LIB_DIRPATH):
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith("_"))
+        for filename in sorted(filenames):
+            if filename.endswith('.ini'):
+                cfg_rel_filepaths.append(os.path.relpath(os.path.join(dirpath, filename), LIB_DIRPATH))
+    return cfg_rel_filepaths
+
+
+def _create_instances(n_instances):
+    """ list : Creates flood mapper `MetaData` instances sharing the same encoded values. """
+    tags = MetaData.from_product_version(FLOOD_METADATA, WORKER_NAME, VERSION_ID).to_tags()
+    return [MetaData.from_product_version(tags, WORKER_NAME, VERSION_ID) for _ in range(n_instances)]
+
+
+class ReadConfigSuite:
+    """ Parsing of each shipped config file (without the registry cache). """
+
+    params = list_cfg_files()
+    param_names = ['cfg_file']
+
+    def time_read_config(self, cfg_rel_filepath):
+        read_config(os.path.join(LIB_DIRPATH, cfg_rel_filepath))
+
+
+class ConstructionSuite:
+    """ Creation of many instances from encoded tags via `from_product_version`. """
+
+    params = SCALES
+    param_names = ['n_instances']
+
+    def setup(self, n_instances):
+        self.tags = MetaData.from_product_version(FLOOD_METADATA, WORKER_NAME, VERSION_ID).to_tags()
+
+    def time_from_product_version(self, n_instances):
+        tags = self.tags
+        for _ in range(n_instances):
+            MetaData.from_product_version(tags, WORKER_NAME, VERSION_ID)
+
+
+class AttributeSuite:
+    """ Setting and getting one attribute of each data type on many instances. """
+
+    params = (list(DTYPE_ATTRIBUTES.keys()), SCALES)
+    param_names = ['dtype', 'n_instances']
+
+    def setup(self, dtype, n_instances):
+        self.instances = _create_instances(n_instances)
+        self.attr = DTYPE_ATTRIBUTES[dtype]
+        self.dec_value = FLOOD_METADATA[self.attr]
+        self.enc_value = self.instances[0].to_tags()[self.attr]
+
+    def time_setitem_decoded(self, dtype, n_instances):
+        attr, value = self.attr, self.dec_value
+        for metadata in self.instances:
+            metadata[attr] = value
+
+    def time_setitem_encoded(self, dtype, n_instances):
+        attr, value = self.attr, self.enc_value
+        for metadata in self.instances:
+            metadata[attr] = value
+
+    def time_getitem(self, dtype, n_instances):
+        attr = self.attr
+        for metadata in self.instances:
+            metadata[attr]
+
+
+class InstanceSuite:
+    """ Operations on many instances: intersection, tag export and pretty formatting. """
+
+    params = SCALES
+    param_names = ['n_instances']
+
+    def setup(self, n_instances):
+        self.instances = _create_instances(n_instances)
+        self.other = MetaData({'tile_id': 'E048N012T3', 'orbit_direction': 'D'},
+                              {'Metadata': {'tile_id': 'string', 'orbit_direction': 'string'}})
+
+    def time_and(self, n_instances):
+        other = self.other
+        for metadata in self.instances:
+            metadata & other
+
+    def time_to_tags(self, n_instances):
+        for metadata in self.instances:
+            metadata.to_tags()
+
+    def time_to_pretty_frmt(self, n_instances):
+        for metadata in self.instances:
+            metadata.to_pretty_frmt()
@@ -0,0 +1,76 @@
+""" Benchmarks the start-up cost of importing medali, measured with `python -X importtime`. """
+
+import os
+import sys
+import subprocess
+
+SRC_DIRPATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# cumulative import time budget of the modules below in microseconds
+IMPORT_TIME_BUDGETS = {'medali': 5000,
+                       'medali.core': 30000}
+# modules which must not be imported as a side effect of importing medali
+DEFERRED_MODULES = ('pkg_resources', 'configparser', 'pprint', 're', 'json', 'asyncio')
+
+
+def measure_import_time(module_name):
+    """
+    Measures the cumulative import time of a module in a fresh interpreter.
+
+    Parameters
+    ----------
+    module_name : str
+        Name of the module to import.
+
+    Returns
+    -------
+    import_time : int
+        Cumulative import time in microseconds.
+    imported_modules : set
+        Deferred modules which have been imported nevertheless.
+
+    """
+    code = "import sys; import {}; print(','.join(m for m in {!r} if m in sys.modules))".format(
+        module_name, DEFERRED_MODULES)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIRPATH, env.get('PYTHONPATH')]))
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True, env=env)
+    import_time = None
+    for line in output.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module_name:
+            import_time = int(fields[1])
+    imported_modules = set(filter(None, output.stdout.strip().split(",")))
+
+    return import_time, imported_modules
+
+
+def track_import_medali():
+    return measure_import_time('medali')[0]
+
+
+def track_import_medali_core():
+    return measure_import_time('medali.core')[0]
+
+
+track_import_medali.unit = "us"
+track_import_medali_core.unit = "us"
+
+
+def main():
+    """ Checks the import time budgets and returns a non-zero exit code if one is exceeded. """
+    exceeded = False
+    for module_name, budget in IMPORT_TIME_BUDGETS.items():
+        import_time = min(measure_import_time(module_name)[0] for _ in range(5))
+        imported_modules = measure_import_time(module_name)[1]
+        status = "ok" if import_time <= budget and not imported_modules else "FAILED"
+        exceeded |= status != "ok"
+        print("{}: {} us (budget {} us), deferred modules imported: {} -> {}".format(
+            module_name, import_time, budget, sorted(imported_modules) or "none", status))
+
+    return int(exceeded)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+""" Benchmarks the memory footprint of many `MetaData` instances (s1dc_flood_mapper, V1M2). """
+
+import sys
+import gc
+import tracemalloc
+
+from medali.core import MetaData
+
+try:
+    from .set_metadata import FLOOD_METADATA
+except ImportError:  # executed as a script
+    from set_metadata import FLOOD_METADATA
+
+
+def measure_memory(n_instances=100000):
+    """
+    Measures the memory allocated by keeping many `MetaData` instances alive.
+
+    Parameters
+    ----------
+    n_instances : int, optional
+        Number of instances (defaults to 100000).
+
+    Returns
+    -------
+    int
+        Allocated bytes per instance.
+
+    """
+    MetaData.from_product_version({}, "s1dc_flood_mapper", "V1M2")  # load schema beforehand
+    tags = MetaData.from_product_version(FLOOD_METADATA, "s1dc_flood_mapper", "V1M2").to_tags()
+    gc.collect()
+    tracemalloc.start()
+    snapshot_start = tracemalloc.take_snapshot()
+    instances = [MetaData.from_product_version(tags, "s1dc_flood_mapper", "V1M2") for _ in range(n_instances)]
+    snapshot_end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    n_bytes = sum(stat.size_diff for stat in snapshot_end.compare_to(snapshot_start, 'filename'))
+    del instances
+
+    return n_bytes // n_instances
+
+
+def track_memory_per_instance():
+    return measure_memory(n_instances=10000)
+
+
+track_memory_per_instance.unit = "bytes"
+
+
+if __name__ == '__main__':
+    n_instances = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("{} bytes per instance ({} instances)".format(measure_memory(n_instances), n_instances))
@@ -0,0 +1,184 @@
+"""
+Minimal runner of the asv-style benchmark suites, which stores results as baselines and compares them, e.g.:
+
+    PYTHONPATH=src python benchmarks/run.py --save benchmarks/baselines/reference.json
+    PYTHONPATH=src python benchmarks/run.py --compare benchmarks/baselines/reference.json --threshold 1.3
+
+Within an asv environment (see "asv.conf.json"), the same suites are run with `asv run` and `asv compare`.
+
+"""
+
+import os
+import re
+import sys
+import json
+import timeit
+import argparse
+import platform
+import importlib
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+SUITE_MODULES = ['hot_paths', 'set_metadata']
+
+
+def _iter_param_sets(bench_class):
+    """ Iterates over all parameter combinations of an asv benchmark class. """
+    params = getattr(bench_class, 'params', None)
+    if params is None:
+        return iter([()])
+    if not isinstance(params, tuple):
+        params = (params,)
+
+    return itertools.product(*params)
+
+
+def iter_benchmarks(pattern=None, max_scale=None):
+    """
+    Discovers all timing benchmarks, i.e. `time_*` methods of classes in the suite modules.
+
+    Parameters
+    ----------
+    pattern : str, optional
+        Regular expression the benchmark names have to match.
+    max_scale : int, optional
+        Benchmarks with a parameter 'n_instances' larger than this value are skipped.
+
+    Yields
+    ------
+    name : str
+        Benchmark name including its parameters, e.g. "hot_paths.ConstructionSuite.time_from_product_version(10)".
+    bench_class : type
+        Benchmark class.
+    method_name : str
+        Name of the timing method.
+    param_set : tuple
+        Parameters passed to `setup` and the timing method.
+
+    """
+    for module_name in SUITE_MODULES:
+        module = importlib.import_module(module_name)
+        for class_name, bench_class in sorted(vars(module).items()):
+            if not isinstance(bench_class, type) or not class_name.endswith('Suite'):
+                continue
+            method_names = sorted(name for name in dir(bench_class) if name.startswith('time_'))
+            param_names = getattr(bench_class, 'param_names', [])
+            for param_set in _iter_param_sets(bench_class):
+                params = dict(zip(param_names, param_set))
+                if max_scale is not None and params.get('n_instances', 0) > max_scale:
+                    continue
+                for method_name in method_names:
+                    name = "{}.{}.{}({})".format(module_name, class_name, method_name,
+                                                 ", ".join(str(param) for param in param_set))
+                    if pattern is None or re.search(pattern, name):
+                        yield name, bench_class, method_name, param_set
+
+
+def time_benchmark(bench_class, method_name, param_set, n_repeats=3):
+    """
+    Times a benchmark, repeating the call until a repetition lasts at least 0.2 seconds.
+
+    Returns
+    -------
+    float
+        Best duration of one call in seconds.
+
+    """
+    suite = bench_class()
+    if hasattr(suite, 'setup'):
+        suite.setup(*param_set)
+    func = getattr(suite, method_name)
+    timer = timeit.Timer(lambda: func(*param_set))
+    number = timer.autorange()[0]
+    durations = timer.repeat(repeat=n_repeats, number=number)
+
+    return min(durations) / number
+
+
+def run(pattern=None, max_scale=None):
+    """
+    Runs all benchmarks and prints their durations.
+
+    Parameters
+    ----------
+    pattern : str, optional
+        Regular expression the benchmark names have to match.
+    max_scale : int, optional
+        Benchmarks with a parameter 'n_instances' larger than this value are skipped.
+
+    Returns
+    -------
+    dict
+        Machine information and the durations (in seconds) per benchmark name.
+
+    """
+    results = {}
+    for name, bench_class, method_name, param_set in iter_benchmarks(pattern, max_scale):
+        results[name] = time_benchmark(bench_class, method_name, param_set)
+        print("{:<90} {:>12.3f} us".format(name, results[name] * 1e6))
+
+    return {'machine': platform.node(), 'python': platform.python_version(), 'results': results}
+
+
+def compare(results, baseline, threshold=1.3):
+    """
+    Compares benchmark durations with baseline durations and prints the ratios.
+
+    Parameters
+    ----------
+    results : dict
+        Durations per benchmark name.
+    baseline : dict
+        Baseline durations per benchmark name.
+    threshold : float, optional
+        Ratio above which a benchmark counts as a regression (defaults to 1.3).
+
+    Returns
+    -------
+    list of str
+        Names of the regressed benchmarks.
+
+    """
+    regressions = []
+    for name in sorted(results.keys() & baseline.keys()):
+        ratio = results[name] / baseline[name]
+        status = ""
+        if ratio > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            status = "improved"
+        print("{:<90} {:>8.2f}x {}".format(name, ratio, status))
+
+    return regressions
+
+
+def main(args=None):
+    """ Runs the benchmarks, optionally saves the results and compares them with a baseline. """
+    parser = argparse.ArgumentParser(description="Runs the medali benchmark suites.")
+    parser.add_argument("--filter", dest="pattern", default=None, help="Regular expression of benchmark names.")
+    parser.add_argument("--max-scale", type=int, default=None, help="Maximum number of instances.")
+    parser.add_argument("--save", dest="save_filepath", default=None, help="Path of the results file to write.")
+    parser.add_argument("--compare", dest="baseline_filepath", default=None, help="Path of a baseline file.")
+    parser.add_argument("--threshold", type=float, default=1.3, help="Slow-down ratio counting as regression.")
+    args = parser.parse_args(args)
+
+    results = run(args.pattern, args.max_scale)
+    if args.save_filepath is not None:
+        with open(args.save_filepath, 'w') as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+    if args.baseline_filepath is not None:
+        with open(args.baseline_filepath) as baseline_file:
+            baseline = json.load(baseline_file)
+        print("\nComparison with '{}' ({}, Python {}):".format(args.baseline_filepath, baseline['machine'],
+                                                               baseline['python']))
+        regressions = compare(results['results'], baseline['results'], args.threshold)
+        return int(bool(regressions))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+""" Benchmarks setting metadata attributes of the flood mapper metadata (s1dc_flood_mapper, V1M2). """
+
+import datetime
+
+from medali.core import MetaData
+
+
+# one decoded example value per attribute of the flood mapper schema
+FLOOD_METADATA = {'date_creation': datetime.datetime(2021, 3, 1, 12, 0, 0),
+                  'date_modification': datetime.datetime(2021, 3, 1, 12, 0, 0),
+                  'date_sensing': datetime.datetime(2021, 2, 28, 5, 21, 33),
+                  'creator': 'TU Wien',
+                  'worker_name': 's1dc-flood-mapper',
+                  'worker_git_tag': 'v1.2.0',
+                  'worker_git_commit': 'a1b2c3d',
+                  'wrapper_name': 'floodwrapper',
+                  'wrapper_git_tag': 'v0.4.1',
+                  'wrapper_git_commit': 'e4f5a6b',
+                  'run_number': 1,
+                  'input_sar_file': 'SIG0_20210228T052133__VV_D022_E048N012T3_EU020M_V1M1R1_S1AIWGRDH_TUWIEN.tif',
+                  'input_plia_file': 'PLIA_20210228T052133_E048N012T3_EU020M_V1M1R1_S1AIWGRDH_TUWIEN.tif',
+                  'noflood_reference': 'harmonic',
+                  'noflood_reference_details': 'k=3',
+                  'noflood_reference_input': 'M0_E048N012T3.tif',
+                  'water_backscatter_slope': -0.2,
+                  'water_backscatter_intercept': -13.5,
+                  'water_backscatter_std': 1.1,
+                  'orbit_relative': 22,
+                  'orbit_direction': 'D',
+                  'tile_id': 'E048N012T3',
+                  'postprocessing_steps': 'rm_low_sensitivity,rm_shadow',
+                  'postprocessing_overrule': False,
+                  'lee_filter_size': 0,
+                  'distrib_factor': 2.5,
+                  'outlier_factor': 3.,
+                  'uncert_thresh': 0.5,
+                  'prior_probability': 'uninformed',
+                  'mask_applied': True,
+                  'encoding_info': 'uint8',
+                  'value_info': '0: no flood, 1: flood'}
+
+
+class SetMetadataSuite:
+    """ Per-attribute cost of setting decoded and encoded values. """
+
+    def setup(self):
+        self.metadata = MetaData.from_product_version({}, "s1dc_flood_mapper", "V1M2")
+        self.dec_metadata = FLOOD_METADATA
+        self.enc_metadata = MetaData.from_product_version(FLOOD_METADATA, "s1dc_flood_mapper", "V1M2").to_tags()
+
+    def time_set_decoded(self):
+        metadata = self.metadata
+        for key, value in self.dec_metadata.items():
+            metadata[key] = value
+
+    def time_set_encoded(self):
+        metadata = self.metadata
+        for key, value in self.enc_metadata.items():
+            metadata[key] = value
+
+
+def main(n_reps=2000):
+    """ Prints the per-attribute cost of setting metadata values when being run without a benchmark runner. """
+    import timeit
+
+    suite = SetMetadataSuite()
+    suite.setup()
+    n_attrs = len(FLOOD_METADATA)
+    for name in ["time_set_decoded", "time_set_encoded"]:
+        duration = min(timeit.repeat(getattr(suite, name), number=n_reps, repeat=5))
+        print("{}: {:.2f} us per attribute".format(name, duration / (n_reps * n_attrs) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,11 @@
     PyScaffold helps you to put up the scaffold of your new Python project.
     Learn more under: https://pyscaffold.org/
 """
+import os
 import sys
 from pkg_resources import VersionConflict, require
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
 try:
     require("setuptools>=38.3")
@@ -18,5 +20,16 @@ except VersionConflict:
     sys.exit(1)
 
 
+class BuildPyCommand(build_py):
+    """ Builds the package and compiles the shipped metadata config files into a single index file. """
+
+    def run(self):
+        build_py.run(self)
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+        from medali.catalog import INDEX_FILENAME, write_index
+
+        write_index(os.path.join(self.build_lib, "medali", INDEX_FILENAME))
+
+
 if __name__ == "__main__":
-    setup(use_pyscaffold=True)
+    setup(use_pyscaffold=True, cmdclass={"build_py": BuildPyCommand})
@@ -1,11 +1,55 @@
 # -*- coding: utf-8 -*-
-from pkg_resources import DistributionNotFound, get_distribution
+import sys
+import importlib
 
-try:
+# public classes are imported on first access to keep `import medali` cheap
+_LAZY_ATTRS = {'MetaData': 'core',
+               'MetaDataTable': 'table',
+               'Schema': 'schema'}
+
+__all__ = ['__version__'] + list(_LAZY_ATTRS.keys())
+
+
+def _get_version():
+    """ str : Version of the installed distribution, or "unknown" if it is not installed. """
     # Change here if project is renamed and does not equal the package name
     dist_name = __name__
-    __version__ = get_distribution(dist_name).version
-except DistributionNotFound:
-    __version__ = "unknown"
-finally:
-    del get_distribution, DistributionNotFound
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # Python < 3.8
+        from pkg_resources import DistributionNotFound as PackageNotFoundError
+        from pkg_resources import get_distribution
+
+        def version(dist_name):
+            return get_distribution(dist_name).version
+
+    try:
+        return version(dist_name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def __getattr__(name):
+    """ Resolves the package version and public classes lazily. """
+    if name == '__version__':
+        value = _get_version()
+    elif name in _LAZY_ATTRS:
+        module = importlib.import_module('.' + _LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+    else:
+        err_msg = "module '{}' has no attribute '{}'".format(__name__, name)
+        raise AttributeError(err_msg)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if sys.version_info < (3, 7):  # module level __getattr__ is not supported
+    __version__ = _get_version()
+    from .core import MetaData  # noqa: F401,E402
+    from .table import MetaDataTable  # noqa: F401,E402
+    from .schema import Schema  # noqa: F401,E402
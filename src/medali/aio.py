@@ -0,0 +1,228 @@
+"""
+Asyncio counterparts of loading schemas and reading/writing metadata tags. Blocking work (file system access,
+config parsing, tag I/O) is offloaded to an executor, so an event loop can keep many operations in flight.
+
+"""
+
+import asyncio
+import functools
+
+from . import fileio
+from .config import config_registry
+
+
+DEFAULT_MAX_CONCURRENCY = 64
+# `get_event_loop` is deprecated within coroutines, but `get_running_loop` is not available before Python 3.7
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+async def run_blocking(func, *args, executor=None, **kwargs):
+    """
+    Runs a blocking function in an executor.
+
+    Parameters
+    ----------
+    func : callable
+        Blocking function.
+    *args : tuple
+        Positional arguments of the function.
+    executor : concurrent.futures.Executor, optional
+        Executor running the function. Defaults to the default executor of the event loop.
+    **kwargs : dict
+        Keyword arguments of the function.
+
+    Returns
+    -------
+    any
+        Return value of the function.
+
+    """
+    loop = _get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def map_bounded(func, items, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Applies a coroutine function to many items with at most `max_concurrency` calls in flight. A fixed number
+    of workers pulls the items from the iterable, so only `max_concurrency` coroutines exist at a time.
+
+    Parameters
+    ----------
+    func : callable
+        Coroutine function taking one item.
+    items : iterable
+        Items to process.
+    max_concurrency : int, optional
+        Maximum number of concurrent calls (defaults to 64).
+
+    Returns
+    -------
+    list
+        Results in the order of the items.
+
+    """
+    items = iter(items)
+    results = []
+
+    async def work():
+        for item in items:
+            position = len(results)  # no other worker runs before the slot is reserved
+            results.append(None)
+            results[position] = await func(item)
+
+    await asyncio.gather(*[work() for _ in range(max_concurrency)])
+
+    return results
+
+
+async def get_schema(cfg_filepath, executor=None):
+    """
+    Loads the compiled reference metadata of a config file via the process-wide registry.
+
+    Parameters
+    ----------
+    cfg_filepath : str
+        Path to metadata config file.
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    Returns
+    -------
+    Schema
+
+    """
+    return await run_blocking(config_registry.get, cfg_filepath, executor=executor)
+
+
+async def get_product_schema(worker_name, version_id, var_name=None, executor=None):
+    """
+    Loads the compiled reference metadata of a product version via the process-wide registry.
+
+    Parameters
+    ----------
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    version_id : str
+        Metadata version.
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    Returns
+    -------
+    Schema
+
+    """
+    return await run_blocking(config_registry.get_product, worker_name, version_id, var_name=var_name,
+                              executor=executor)
+
+
+async def preload_schemas(cfg_filepaths=(), products=(), executor=None):
+    """
+    Loads many config files and product versions concurrently into the process-wide registry, so later
+    lookups are served from the cache.
+
+    Parameters
+    ----------
+    cfg_filepaths : iterable of str, optional
+        Paths to metadata config files.
+    products : iterable of tuple, optional
+        Product versions given as (worker_name, version_id) or (worker_name, version_id, var_name).
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    Returns
+    -------
+    list of Schema
+        Compiled reference metadata of the config files followed by the ones of the product versions.
+
+    """
+    coros = [get_schema(cfg_filepath, executor=executor) for cfg_filepath in cfg_filepaths]
+    coros += [get_product_schema(*product, executor=executor) for product in products]
+
+    return list(await asyncio.gather(*coros))
+
+
+async def read_tags(filepath, executor=None):
+    """
+    Reads dataset-level metadata tags from a GeoTIFF or NetCDF file (see `fileio.read_tags`).
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    Returns
+    -------
+    dict
+        Metadata attributes and encoded values.
+
+    """
+    return await run_blocking(fileio.read_tags, filepath, executor=executor)
+
+
+async def write_tags(filepath, tags, executor=None):
+    """
+    Writes dataset-level metadata tags to a GeoTIFF or NetCDF file (see `fileio.write_tags`).
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+    tags : dict
+        Metadata attributes and encoded values.
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    """
+    await run_blocking(fileio.write_tags, filepath, tags, executor=executor)
+
+
+async def read_many_tags(filepaths, max_concurrency=DEFAULT_MAX_CONCURRENCY, executor=None):
+    """
+    Reads the metadata tags of many files with bounded concurrency.
+
+    Parameters
+    ----------
+    filepaths : iterable of str
+        Paths to the raster files.
+    max_concurrency : int, optional
+        Maximum number of files being read at the same time (defaults to 64).
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    Returns
+    -------
+    list of dict
+        Metadata attributes and encoded values per file.
+
+    """
+    return await map_bounded(functools.partial(read_tags, executor=executor), filepaths, max_concurrency)
+
+
+async def write_many_tags(items, max_concurrency=DEFAULT_MAX_CONCURRENCY, executor=None):
+    """
+    Writes the metadata tags of many files with bounded concurrency. `MetaData` instances are written with
+    `MetaData.write_to_file`, so projections (created with `fields`) only update their tags.
+
+    Parameters
+    ----------
+    items : iterable of tuple
+        Paths to the raster files and the metadata tags (dict or `MetaData`) to write.
+    max_concurrency : int, optional
+        Maximum number of files being written at the same time (defaults to 64).
+    executor : concurrent.futures.Executor, optional
+        Executor running the blocking work.
+
+    """
+    async def write(item):
+        filepath, tags = item
+        if hasattr(tags, 'write_to_file'):
+            await run_blocking(tags.write_to_file, filepath, executor=executor)
+        else:
+            await write_tags(filepath, tags, executor=executor)
+
+    await map_bounded(write, items, max_concurrency)
@@ -0,0 +1,237 @@
+""" Index of the metadata config files shipped in the "lib" folder. """
+
+import os
+import _thread
+
+
+INDEX_FILENAME = "lib_index.json"
+INDEX_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), INDEX_FILENAME)
+INDEX_FORMAT = 1
+
+_index = None
+_packaged_index = None
+_fingerprints = None
+_lock = _thread.allocate_lock()  # makes sure the index is loaded only once if being accessed by many threads
+
+
+def product_key(worker_name, version_id, var_name=None):
+    """ str : Normalised key of a product version, i.e. "<worker>/<var>/<version>" or "<worker>/<version>". """
+    worker_dirname = worker_name.lower().replace("-", "_")
+    if var_name is None:
+        return "/".join([worker_dirname, version_id])
+    return "/".join([worker_dirname, var_name.lower(), version_id])
+
+
+def build_index(lib_dirpath=None):
+    """
+    Parses all metadata config files in the "lib" folder. Folders starting with an underscore (e.g. "_common")
+    only contain config files included by other config files and are skipped.
+
+    Parameters
+    ----------
+    lib_dirpath : str, optional
+        Path to the "lib" folder. Defaults to the one shipped with medali.
+
+    Returns
+    -------
+    dict
+        Maps product keys ("<worker>/<version>" or "<worker>/<var>/<version>") to parsed reference metadata.
+
+    """
+    from .config import LIB_DIRPATH, read_config
+
+    lib_dirpath = LIB_DIRPATH if lib_dirpath is None else lib_dirpath
+    products = {}
+    for dirpath, dirnames, filenames in os.walk(lib_dirpath):
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith("_"))  # shared includes
+        rel_dirpath = os.path.relpath(dirpath, lib_dirpath)
+        if rel_dirpath == os.curdir:
+            continue
+        for filename in sorted(filenames):
+            version_id, ext = os.path.splitext(filename)
+            if ext != '.ini':
+                continue
+            key = "/".join(rel_dirpath.split(os.sep) + [version_id])
+            products[key] = read_config(os.path.join(dirpath, filename))
+
+    return products
+
+
+def write_index(filepath=INDEX_FILEPATH, lib_dirpath=None):
+    """
+    Compiles all metadata config files in the "lib" folder into a single index file. This is done when building
+    the package, so resolving shipped product versions requires neither file system scans nor INI parsing.
+
+    Parameters
+    ----------
+    filepath : str, optional
+        Path to the index file. Defaults to the one loaded by medali.
+    lib_dirpath : str, optional
+        Path to the "lib" folder. Defaults to the one shipped with medali.
+
+    """
+    import json
+
+    index = {'format': INDEX_FORMAT, 'products': build_index(lib_dirpath)}
+    with open(filepath, 'w') as index_file:
+        json.dump(index, index_file, sort_keys=True)
+
+
+def load_index():
+    """
+    Loads the index of shipped metadata config files on first use. If the package was not built with an index
+    file (e.g. when running from a source checkout), the "lib" folder is parsed instead.
+
+    Returns
+    -------
+    dict
+        Maps product keys ("<worker>/<version>" or "<worker>/<var>/<version>") to parsed reference metadata.
+
+    """
+    global _index
+    if _index is None:
+        packaged_index = load_packaged_index()
+        with _lock:
+            if _index is None:
+                _index = packaged_index or build_index()
+
+    return _index
+
+
+def load_packaged_index():
+    """
+    Loads the pre-built index file on first use.
+
+    Returns
+    -------
+    dict
+        Maps product keys ("<worker>/<version>" or "<worker>/<var>/<version>") to parsed reference metadata.
+        It is empty if the package was not built with an index file.
+
+    """
+    global _packaged_index
+    if _packaged_index is None:
+        with _lock:
+            if _packaged_index is None:
+                _packaged_index = _read_index_file() or {}
+
+    return _packaged_index
+
+
+def _read_index_file():
+    """ dict : Reads the pre-built index file, or returns None if it is not available or outdated. """
+    import json
+
+    try:
+        with open(INDEX_FILEPATH) as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if index.get('format') != INDEX_FORMAT:
+        return None
+
+    return index['products']
+
+
+def get_product(worker_name, version_id, var_name=None):
+    """
+    Returns the parsed reference metadata of a shipped product version from the index.
+
+    Parameters
+    ----------
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    version_id : str
+        Metadata version.
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+
+    Returns
+    -------
+    dict or None
+        Parsed reference metadata, or None if the product version is not shipped with medali.
+
+    """
+    return load_index().get(product_key(worker_name, version_id, var_name=var_name))
+
+
+def find_product(fingerprint):
+    """
+    Identifies a shipped product version by the content fingerprint of its reference metadata
+    (see `Schema.fingerprint`). The fingerprints of all product versions are computed on first use.
+
+    Parameters
+    ----------
+    fingerprint : str
+        Content fingerprint.
+
+    Returns
+    -------
+    tuple or None
+        Worker name, metadata version and output variable name (or None) of a product version with this
+        reference metadata, or None if no shipped product version matches.
+
+    """
+    global _fingerprints
+    if _fingerprints is None:
+        from .schema import config_fingerprint
+
+        fingerprints = {}
+        for key, ref_metadata in sorted(load_index().items()):
+            fingerprints.setdefault(config_fingerprint(ref_metadata), key)
+        _fingerprints = fingerprints
+
+    key = _fingerprints.get(fingerprint)
+    if key is None:
+        return None
+    parts = key.split("/")
+    if len(parts) == 2:
+        return parts[0], parts[1], None
+    return parts[0], parts[2], parts[1]
+
+
+def list_products():
+    """ list : Names of all workers with shipped metadata config files. """
+    return sorted({key.split("/")[0] for key in load_index()})
+
+
+def list_variables(worker_name):
+    """
+    Lists all output variables of a worker with distinct metadata.
+
+    Parameters
+    ----------
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+
+    Returns
+    -------
+    list
+        Names of the output variables, or an empty list if the worker's outputs do not differ in metadata.
+
+    """
+    worker_dirname = worker_name.lower().replace("-", "_")
+    return sorted({key.split("/")[1] for key in load_index()
+                   if key.count("/") == 2 and key.split("/")[0] == worker_dirname})
+
+
+def list_versions(worker_name, var_name=None):
+    """
+    Lists all shipped metadata versions of a worker (and output variable).
+
+    Parameters
+    ----------
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+
+    Returns
+    -------
+    list
+        Metadata versions.
+
+    """
+    prefix = product_key(worker_name, "", var_name=var_name)
+    return sorted(key[len(prefix):] for key in load_index()
+                  if key.startswith(prefix) and "/" not in key[len(prefix):])
@@ -0,0 +1,106 @@
+"""
+Command line interface of medali, e.g. `medali scan <archive> --worker s1dc_flood_mapper --version V1M2` or
+`medali index <database> <archive> --worker s1dc_flood_mapper --version V1M2`.
+
+"""
+
+import sys
+import argparse
+
+
+def _build_parser():
+    """ argparse.ArgumentParser : Creates the parser of the `medali` command and its sub-commands. """
+    parser = argparse.ArgumentParser(prog="medali", description="Metadata library command line tools.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    scan_parser = subparsers.add_parser("scan", help="Validate the metadata of all files in an archive.")
+    scan_parser.add_argument("root_dirpath", help="Root directory of the archive.")
+    scan_parser.add_argument("--worker", required=True, dest="worker_name",
+                             help="Name of the worker package, e.g. 's1dc_flood_mapper'.")
+    scan_parser.add_argument("--version", required=True, dest="version_id", help="Metadata version, e.g. 'V1M2'.")
+    scan_parser.add_argument("--var", dest="var_name", default=None, help="Name of the output variable.")
+    scan_parser.add_argument("--workers", dest="n_workers", type=int, default=None,
+                             help="Number of worker processes (defaults to the number of CPUs).")
+    scan_parser.add_argument("--threads", dest="use_threads", action="store_true",
+                             help="Use threads instead of processes.")
+    scan_parser.add_argument("--output", dest="output_filepath", default=None,
+                             help="JSON Lines file the results are appended to (defaults to stdout).")
+    scan_parser.add_argument("--checkpoint", dest="checkpoint_filepath", default=None,
+                             help="Checkpoint file of scanned paths, which allows to resume a scan.")
+
+    index_parser = subparsers.add_parser("index", help="Create or refresh an SQLite index of the metadata of an "
+                                                       "archive.")
+    index_parser.add_argument("db_filepath", help="Path to the SQLite database.")
+    index_parser.add_argument("root_dirpath", help="Root directory of the archive.")
+    index_parser.add_argument("--worker", required=True, dest="worker_name",
+                              help="Name of the worker package, e.g. 's1dc_flood_mapper'.")
+    index_parser.add_argument("--version", required=True, dest="version_id", help="Metadata version, e.g. 'V1M2'.")
+    index_parser.add_argument("--var", dest="var_name", default=None, help="Name of the output variable.")
+    index_parser.add_argument("--workers", dest="n_workers", type=int, default=None,
+                              help="Number of threads reading changed files (defaults to the number of CPUs).")
+
+    return parser
+
+
+def _scan(args):
+    """ int : Runs the `scan` sub-command and returns the exit code (1 if any file is invalid). """
+    from .scan import scan, write_jsonl, dump_jsonl
+
+    results = scan(args.root_dirpath, args.worker_name, args.version_id, var_name=args.var_name,
+                   n_workers=args.n_workers, use_threads=args.use_threads,
+                   checkpoint_filepath=args.checkpoint_filepath)
+    if args.output_filepath is not None:
+        n_files, n_invalid = write_jsonl(results, args.output_filepath)
+    else:
+        n_files, n_invalid = dump_jsonl(results, sys.stdout)
+    sys.stderr.write("Scanned {} files, {} invalid.\n".format(n_files, n_invalid))
+
+    return 1 if n_invalid else 0
+
+
+def _index(args):
+    """ int : Runs the `index` sub-command and returns the exit code (1 if any file could not be indexed). """
+    from .index import MetaDataIndex
+
+    with MetaDataIndex.from_product_version(args.db_filepath, args.worker_name, args.version_id,
+                                            var_name=args.var_name) as index:
+        result = index.refresh(args.root_dirpath, n_workers=args.n_workers)
+        n_files = len(index)
+    for filepath, error in sorted(result.errors.items()):
+        sys.stderr.write("{}: {}\n".format(filepath, error))
+    sys.stderr.write("Updated {} files, removed {}, {} errors, {} files indexed.\n".format(
+        result.n_updated, result.n_removed, len(result.errors), n_files))
+
+    return 1 if result.errors else 0
+
+
+def main(args=None):
+    """
+    Entry point of the `medali` command.
+
+    Parameters
+    ----------
+    args : list of str, optional
+        Command line arguments (defaults to `sys.argv[1:]`).
+
+    Returns
+    -------
+    int
+        Exit code.
+
+    """
+    args = _build_parser().parse_args(args)
+    if args.command == "scan":
+        return _scan(args)
+    elif args.command == "index":
+        return _index(args)
+
+
+def run():
+    """ Calls `main` passing the CLI arguments extracted from `sys.argv` and exits with its exit code. """
+    sys.exit(main(sys.argv[1:]))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,454 @@
+""" Reading and caching of reference metadata config files. """
+
+import os
+import time
+import _thread
+from collections import OrderedDict
+
+from . import stats
+from . import catalog
+from .schema import intern_schema
+from .schema import interned_schemas
+
+
+LIB_DIRPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib")
+_MAX_INCLUDED_CONFIGS = 64
+_included_configs = {}  # path of an included config file -> (file signature, parsed config file)
+
+
+def read_config(filepath):
+    """
+    Parse a metadata config file.
+
+    A config file can derive from other config files with an "Include" section, e.g.:
+
+        [Include]
+        extends: ../_common/software.ini
+
+    Paths are relative to the including file, several files are separated by commas. The sections of the
+    included files are merged in the given order, followed by the sections of the including file, whose items
+    take precedence. Included attributes are placed in front of the own attributes, or after the attribute
+    given by an optional "insert_after" entry of the "Include" section:
+
+        [Include]
+        extends: ../_common/software.ini
+        insert_after: creator
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the metadata config file.
+
+    Returns
+    -------
+    ds : dict
+        Parsed metadata config file as a dictionary.
+
+    """
+    return resolve_config(filepath)[0]
+
+
+def resolve_config(filepath):
+    """
+    Parse a metadata config file and all config files it includes (see `read_config`).
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the metadata config file.
+
+    Returns
+    -------
+    ds : dict
+        Parsed and flattened metadata config file as a dictionary.
+    included_filepaths : list of str
+        Absolute paths of all (directly or indirectly) included config files.
+
+    """
+    start = time.perf_counter() if stats.is_enabled() else None
+    included_filepaths = []
+    ds = _resolve_config(os.path.abspath(filepath), included_filepaths, ())
+    if start is not None:
+        stats.record('read_config', os.path.abspath(filepath), None, time.perf_counter() - start)
+
+    return ds, included_filepaths
+
+
+def _resolve_config(filepath, included_filepaths, including_filepaths):
+    """ dict : Parses a config file and merges the config files it includes into it. """
+    ds = _parse_included_config(filepath) if including_filepaths else _parse_config(filepath)
+    include = ds.pop('Include', {})
+    extends = include.get('extends')
+    if not extends:
+        return ds
+    if isinstance(extends, str):
+        extends = extends.split(',')
+
+    including_filepaths += (filepath,)
+    included = {}
+    for rel_filepath in extends:
+        include_filepath = os.path.normpath(os.path.join(os.path.dirname(filepath), rel_filepath.strip()))
+        if include_filepath in including_filepaths:
+            err_msg = "Config file '{}' includes itself via '{}'.".format(include_filepath, filepath)
+            raise ValueError(err_msg)
+        if not os.path.exists(include_filepath):
+            err_msg = "'{}' included by '{}' does not exist.".format(include_filepath, filepath)
+            raise IOError(err_msg)
+        included_filepaths.append(include_filepath)
+        for section, items in _resolve_config(include_filepath, included_filepaths, including_filepaths).items():
+            included.setdefault(section, {}).update(items)
+    sections = list(included) + [section for section in ds if section not in included]
+
+    return {section: _merge_section(included.get(section, {}), ds.get(section, {}), include.get('insert_after'))
+            for section in sections}
+
+
+def _merge_section(included_items, items, insert_after=None):
+    """
+    Merges the items of a section of the included config files with the ones of the including file. Included items
+    come first, or after the item `insert_after` if the including file defines it. Own items take precedence.
+
+    """
+    if insert_after not in items:
+        merged = dict(included_items)
+        merged.update(items)
+        return merged
+
+    merged = {}
+    for item, value in items.items():
+        merged[item] = value
+        if item == insert_after:
+            for included_item, included_value in included_items.items():
+                merged.setdefault(included_item, items.get(included_item, included_value))
+
+    return merged
+
+
+def _parse_config(filepath):
+    """ dict : Parses a single config file. """
+    from configparser import ConfigParser
+
+    config = ConfigParser()
+    config.optionxform = str
+    config.read(filepath)
+
+    ds = {}
+    for section in config.sections():
+        ds[section] = {}
+        for item, value in config.items(section):
+            if value.startswith('list'):
+                value = value.replace(', ', ',')
+                value = value.split(',')
+                value.pop(0)
+            ds[section][item] = value
+
+    return ds
+
+
+def _parse_included_config(filepath):
+    """
+    Parses a single config file included by another one. Included files are typically shared by many config files,
+    so they are memoized as long as their modification time and size do not change.
+
+    Returns
+    -------
+    dict
+        Parsed config file, which can be modified by the caller.
+
+    """
+    file_sig = _file_signature(filepath)
+    entry = _included_configs.get(filepath)
+    if entry is None or entry[0] != file_sig:
+        if len(_included_configs) >= _MAX_INCLUDED_CONFIGS:
+            _included_configs.clear()
+        entry = (file_sig, _parse_config(filepath))
+        _included_configs[filepath] = entry
+
+    return {section: {item: list(value) if isinstance(value, list) else value for item, value in items.items()}
+            for section, items in entry[1].items()}
+
+
+def _file_signature(filepath):
+    """ tuple : Modification time and size of a file, or None if it does not exist. """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_product_cfg_filepath(worker_name, version_id, var_name=None):
+    """
+    Resolves the path to a shipped metadata config file.
+
+    Parameters
+    ----------
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    version_id : str
+        Metadata version.
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+
+    Returns
+    -------
+    str
+        Path to the metadata config file.
+
+    """
+    cfg_filename = version_id + '.ini'
+    worker_dirname = worker_name.lower().replace("-", "_")
+    if var_name is None:
+        cfg_filepath = os.path.join(LIB_DIRPATH, worker_dirname, cfg_filename)
+    else:
+        cfg_filepath = os.path.join(LIB_DIRPATH, worker_dirname, var_name.lower(), cfg_filename)
+
+    return cfg_filepath
+
+
+class ConfigRegistry:
+    """
+    Memoizes parsed and compiled reference metadata config files.
+
+    Entries are keyed by the absolute path of a config file and are re-parsed as soon as the
+    modification time or the size of the file changes. Files it includes are checked at most once
+    per `include_check_interval` seconds, so cached lookups only cost a single `os.stat`. The
+    number of entries is bounded and the least recently used entry is dropped first. All entries
+    are handed out as immutable `Schema` instances, so they can be shared among `MetaData` instances.
+
+    Shipped product versions are taken from the pre-built index (see `catalog.write_index`) if
+    the package was built with one, which neither requires file system access nor INI parsing.
+
+    The registry is thread-safe:
+
+        - concurrent lookups of the same config file or product version are single-flight, i.e. if the entry is
+          not cached yet, exactly one thread parses and compiles it while the others wait for its result
+        - loading different entries does not block each other, only the short bookkeeping of the cache
+          (lookup, insertion, eviction) is serialised by one lock
+        - handed out `Schema` instances are immutable and can be shared among threads without locking
+
+    """
+    def __init__(self, maxsize=64, include_check_interval=1.):
+        """
+        Constructor of `ConfigRegistry`.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of cached config files (defaults to 64). `None` disables the bound.
+        include_check_interval : float, optional
+            Minimum time in seconds between two checks of the files included by a cached config file (defaults
+            to 1 second). 0 checks them on every lookup.
+
+        """
+        self._maxsize = maxsize
+        self.include_check_interval = include_check_interval
+        self._entries = OrderedDict()
+        self._product_filepaths = {}
+        self._product_schemas = {}
+        self._lock = _thread.allocate_lock()  # guards the dictionaries above
+        self._loading = {}  # key -> [lock, number of threads waiting for or loading the entry]
+
+    @property
+    def maxsize(self):
+        """ int : Maximum number of cached config files. """
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, cfg_filepath):
+        """
+        Returns the compiled reference metadata of a config file.
+
+        Parameters
+        ----------
+        cfg_filepath : str
+            Path to metadata config file.
+
+        Returns
+        -------
+        Schema
+            Compiled reference metadata.
+
+        """
+        filepath = os.path.abspath(cfg_filepath)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            err_msg = "'{}' does not exist.".format(cfg_filepath)
+            raise IOError(err_msg)
+        file_sig = (stat.st_mtime_ns, stat.st_size)
+
+        def lookup():
+            with self._lock:
+                entry = self._entries.get(filepath)
+                if entry is None or entry[0] != file_sig:
+                    return None
+                self._entries.move_to_end(filepath)
+            if entry[1]:
+                now = time.monotonic()
+                if now - entry[3] >= self.include_check_interval:
+                    for include_filepath, include_sig in entry[1]:
+                        if _file_signature(include_filepath) != include_sig:
+                            return None
+                    entry[3] = now
+            return entry[2]
+
+        def load():
+            ref_metadata, included_filepaths = resolve_config(filepath)
+            include_sigs = tuple((include_filepath, _file_signature(include_filepath))
+                                 for include_filepath in included_filepaths)
+            schema = intern_schema(ref_metadata, name=filepath, source=('file', filepath))
+            with self._lock:
+                # signature, signatures of the included files, schema and time of the last check of the latter
+                self._entries[filepath] = [file_sig, include_sigs, schema, time.monotonic()]
+                self._entries.move_to_end(filepath)
+                self._evict()
+            return schema
+
+        schema = lookup()
+        if schema is None:
+            schema = self._load_once(filepath, lookup, load)
+
+        return schema
+
+    def get_product(self, worker_name, version_id, var_name=None):
+        """
+        Returns the compiled reference metadata of a shipped product config file.
+
+        Parameters
+        ----------
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        version_id : str
+            Metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+
+        Returns
+        -------
+        Schema
+            Compiled reference metadata.
+
+        """
+        key = (worker_name, var_name, version_id)
+        schema = self._product_schemas.get(key)
+        if schema is not None:
+            return schema
+        ref_metadata = catalog.load_packaged_index().get(catalog.product_key(worker_name, version_id, var_name))
+        if ref_metadata is not None:
+            def load():
+                schema = intern_schema(ref_metadata, name=catalog.product_key(worker_name, version_id, var_name),
+                                       source=('product', worker_name, version_id, var_name))
+                self._product_schemas[key] = schema
+                return schema
+
+            return self._load_once(key, lambda: self._product_schemas.get(key), load)
+
+        cfg_filepath = self._product_filepaths.get(key)
+        if cfg_filepath is None:
+            cfg_filepath = get_product_cfg_filepath(worker_name, version_id, var_name=var_name)
+            self._product_filepaths[key] = cfg_filepath
+
+        return self.get(cfg_filepath)
+
+    def get_by_fingerprint(self, fingerprint):
+        """
+        Looks up reference metadata by its content fingerprint (see `Schema.fingerprint`), e.g. as stored in the
+        tags of a file. Shipped product versions are searched first, followed by cached and interned schemas.
+
+        Parameters
+        ----------
+        fingerprint : str
+            Content fingerprint.
+
+        Returns
+        -------
+        Schema or None
+            Compiled reference metadata, or None if no known schema matches.
+
+        """
+        product = catalog.find_product(fingerprint)
+        if product is not None:
+            worker_name, version_id, var_name = product
+            return self.get_product(worker_name, version_id, var_name=var_name)
+        for schema in self.schemas() + interned_schemas():
+            if schema.fingerprint == fingerprint:
+                return schema
+
+        return None
+
+    def schemas(self):
+        """ list : All cached schemas. """
+        with self._lock:
+            return [entry[2] for entry in self._entries.values()] + list(self._product_schemas.values())
+
+    def clear(self):
+        """ Removes all cached config files. """
+        with self._lock:
+            self._entries.clear()
+            self._product_filepaths.clear()
+            self._product_schemas.clear()
+
+    def _load_once(self, key, lookup, load):
+        """
+        Loads an entry at most once at a time, i.e. concurrent callers of the same key wait for the first one.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the entry.
+        lookup : callable
+            Returns the cached entry, or None if it is not cached (yet).
+        load : callable
+            Loads and caches the entry.
+
+        Returns
+        -------
+        Schema
+            Compiled reference metadata.
+
+        """
+        with self._lock:
+            slot = self._loading.get(key)
+            if slot is None:
+                slot = self._loading[key] = [_thread.allocate_lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                # the entry might have been loaded while waiting
+                result = lookup()
+                return load() if result is None else result
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._loading[key]
+
+    def _evict(self):
+        """ Drops least recently used entries exceeding the maximum size of the registry (lock must be held). """
+        if self._maxsize is None:
+            return
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, cfg_filepath):
+        """ bool : True if the given config file is cached, else false. """
+        return os.path.abspath(cfg_filepath) in self._entries
+
+    def __len__(self):
+        """ int : Number of cached config files. """
+        return len(self._entries)
+
+
+config_registry = ConfigRegistry()
+
+
+def clear_config_cache():
+    """ Removes all config files cached in the process-wide registry and all memoized included config files. """
+    config_registry.clear()
+    _included_configs.clear()
@@ -1,16 +1,30 @@
 """ Parsing and modification of metadata. """
 
-import re
-import os
-import numbers
-import datetime
-from pprint import pformat
-from configparser import ConfigParser
+from .schema import Schema
+from .schema import FINGERPRINT_TAG
+from .schema import MetaDataValidationError
+from .schema import intern_schema
+from .config import read_config  # noqa: F401 (re-exported for backwards compatibility)
+from .config import config_registry
+
+
+_UNDECODED = object()  # placeholder for values which have not been decoded yet
 
 
 class MetaData:
-    """ Metadata base class to store metadata, set and get metadata. """
-    def __init__(self, metadata, ref_metadata=None):
+    """
+    Metadata base class to store metadata, set and get metadata.
+
+    Encoded values are stored in a list ordered by the attribute positions of the shared schema, next to a list
+    of lazily decoded values. Only attributes which are not defined in the reference metadata (allowed if no
+    data types are given) are kept in a dictionary. Attributes modified via item assignment after loading are
+    tracked, so only changed tags need to be written.
+
+    """
+
+    __slots__ = ('_schema', '_values', '_decoded', '_extra', '_dirty')
+
+    def __init__(self, metadata, ref_metadata=None, collect_errors=False, fields=None):
         """
         Creates a `MetaData` instance from a given metadata dictionary
         and a dictionary storing information about expected metadata
@@ -20,21 +34,38 @@ class MetaData:
         ----------
         metadata : dict
             Dictionary containing metadata attributes and decoded values.
-        ref_metadata : dict
+        ref_metadata : dict or Schema, optional
             Dictionary containing expected metadata attributes plus data types
             under the key "Metadata", and expected metadata values under the key
-            "Expected_value".
+            "Expected_value". A compiled `Schema` is shared as it is, dictionaries are compiled once per content
+            and process (see `schema.intern_schema`).
+        collect_errors : bool, optional
+            If true, all given metadata is validated before raising a `MetaDataValidationError` listing
+            all violations including missing attributes. Otherwise (default), the first violation raises a
+            `KeyError` or `ValueError` and missing attributes are set to 'null'.
+        fields : iterable of str, optional
+            If given, only these metadata attributes are validated and stored (see `Schema.project`), all other
+            given attributes are ignored. The full schema stays available via `schema.parent`.
 
         """
-        self._meta = {}
-        self._ref_meta = {'Metadata': dict(), 'Expected_value': dict()} if ref_metadata is None else ref_metadata
-        self._set_input_metadata(metadata)
+        if ref_metadata is None:
+            ref_metadata = {'Metadata': dict(), 'Expected_value': dict()}
+        schema = ref_metadata if isinstance(ref_metadata, Schema) else intern_schema(ref_metadata)
+        if fields is not None:
+            fields = tuple(fields)
+            schema = schema.project(fields)
+            metadata = {attr: metadata[attr] for attr in fields if attr in metadata}
+        self._init_storage(schema)
+        if collect_errors:
+            self._set_input_metadata_collecting(metadata)
+        else:
+            self._set_input_metadata(metadata)
 
     @classmethod
-    def from_cfg_file(cls, metadata, cfg_filepath):
+    def from_cfg_file(cls, metadata, cfg_filepath, collect_errors=False, fields=None):
         """
         Creates a `MetaData` instance from a given metadata dictionary and
-        a config file.
+        a config file. Parsed config files are cached in a process-wide registry.
 
         Parameters
         ----------
@@ -42,21 +73,23 @@ class MetaData:
             Dictionary containing metadata attributes and decoded values.
         cfg_filepath : str
             Path to metadata config file.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
 
         Returns
         -------
         MetaData
 
         """
-        if not os.path.exists(cfg_filepath):
-            err_msg = "'{}' does not exist.".format(cfg_filepath)
-            raise IOError(err_msg)
-        ref_metadata = read_config(cfg_filepath)
+        ref_metadata = config_registry.get(cfg_filepath)
 
-        return cls(metadata, ref_metadata)
+        return cls(metadata, ref_metadata, collect_errors=collect_errors, fields=fields)
 
     @classmethod
-    def from_product_version(cls, metadata, worker_name, version_id, var_name=None):
+    def from_product_version(cls, metadata, worker_name, version_id, var_name=None, collect_errors=False,
+                             fields=None):
         """
         Creates a `MetaData` instance from a given metadata dictionary,
         a product name and a version ID.
@@ -72,29 +105,376 @@ class MetaData:
         var_name : str, optional
             Name of the output variable produced by the worker. It defaults to None, i.e. a worker has only output
             not differing in metadata.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
 
         Returns
         -------
         MetaData
 
         """
-        root_dirpath = os.path.dirname(os.path.abspath(__file__))
-        cfg_filename = version_id + '.ini'
-        worker_dirname = worker_name.lower().replace("-", "_")
-        if var_name is None:
-            cfg_filepath = os.path.join(root_dirpath, "lib", worker_dirname, cfg_filename)
-        else:
-            cfg_filepath = os.path.join(root_dirpath, "lib", worker_dirname, var_name.lower(), cfg_filename)
+        ref_metadata = config_registry.get_product(worker_name, version_id, var_name=var_name)
+
+        return cls(metadata, ref_metadata, collect_errors=collect_errors, fields=fields)
+
+    @classmethod
+    def from_records(cls, records, worker_name, version_id, var_name=None):
+        """
+        Creates `MetaData` instances from many metadata dictionaries, a product name and a version ID.
+        The reference metadata is resolved once and each distinct value of an attribute is validated and
+        encoded only once across all records.
+
+        Parameters
+        ----------
+        records : iterable of dict
+            Dictionaries containing metadata attributes and decoded values.
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        version_id : str
+            Metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+
+        Returns
+        -------
+        list of MetaData
+
+        Raises
+        ------
+        MetaDataValidationError
+            If any record violates the reference metadata. The error lists every offending
+            record index, attribute and value.
+
+        """
+        schema = config_registry.get_product(worker_name, version_id, var_name=var_name)
+        converted_records, violations = _convert_records(records, schema)
+        if violations:
+            raise MetaDataValidationError(violations)
+
+        return [cls._from_converted(schema, meta, decoded) for meta, decoded in converted_records]
+
+    @classmethod
+    def _from_converted(cls, schema, meta, decoded):
+        """
+        Creates a `MetaData` instance from already validated encoded and decoded values.
+
+        Parameters
+        ----------
+        schema : Schema
+            Compiled reference metadata.
+        meta : dict
+            Dictionary containing metadata attributes and encoded values.
+        decoded : dict
+            Dictionary containing metadata attributes and decoded values.
+
+        Returns
+        -------
+        MetaData
+
+        """
+        metadata = cls.__new__(cls)
+        metadata._init_storage(schema)
+        for attr, enc_value in meta.items():
+            metadata._store(attr, enc_value, decoded[attr])
 
-        return cls.from_cfg_file(metadata, cfg_filepath)
+        return metadata
+
+    @property
+    def _meta(self):
+        """ dict : Metadata attributes and encoded values. """
+        meta = dict(zip(self._schema.names, self._values))
+        if self._extra:
+            meta.update(self._extra)
+
+        return meta
+
+    @property
+    def schema(self):
+        """ Schema : Compiled reference metadata (a projection if created with `fields`). """
+        return self._schema
+
+    @property
+    def _ref_meta(self):
+        """ FrozenMapping : Read-only reference metadata. """
+        return self._schema.ref_meta
+
+    @classmethod
+    def from_file(cls, filepath, ref_metadata=None, collect_errors=False, fields=None):
+        """
+        Creates a `MetaData` instance from the metadata tags of a GeoTIFF or NetCDF file.
+        Only the file header is read, raster data is never accessed.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the raster file.
+        ref_metadata : dict or Schema, optional
+            Reference metadata, e.g. `config_registry.get_product(worker_name, version_id)`. If not given and the
+            file was written with a schema fingerprint (see `to_tags`), the matching reference metadata is used.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
+
+        Returns
+        -------
+        MetaData
+
+        """
+        from .fileio import read_tags
+
+        tags, ref_metadata = _resolve_fingerprint(read_tags(filepath), ref_metadata)
+        return cls(tags, ref_metadata, collect_errors=collect_errors, fields=fields)
+
+    @classmethod
+    async def afrom_cfg_file(cls, metadata, cfg_filepath, collect_errors=False, fields=None, executor=None):
+        """
+        Asynchronous counterpart of `from_cfg_file`, loading the config file in an executor.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded values.
+        cfg_filepath : str
+            Path to metadata config file.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
+        executor : concurrent.futures.Executor, optional
+            Executor running the blocking work. Defaults to the default executor of the event loop.
+
+        Returns
+        -------
+        MetaData
+
+        """
+        from .aio import get_schema
+
+        schema = await get_schema(cfg_filepath, executor=executor)
+        return cls(metadata, schema, collect_errors=collect_errors, fields=fields)
+
+    @classmethod
+    async def afrom_product_version(cls, metadata, worker_name, version_id, var_name=None, collect_errors=False,
+                                    fields=None, executor=None):
+        """
+        Asynchronous counterpart of `from_product_version`, loading the config file in an executor.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded values.
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        version_id : str
+            Metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
+        executor : concurrent.futures.Executor, optional
+            Executor running the blocking work. Defaults to the default executor of the event loop.
+
+        Returns
+        -------
+        MetaData
+
+        """
+        from .aio import get_product_schema
+
+        schema = await get_product_schema(worker_name, version_id, var_name=var_name, executor=executor)
+        return cls(metadata, schema, collect_errors=collect_errors, fields=fields)
+
+    @classmethod
+    async def afrom_file(cls, filepath, ref_metadata=None, collect_errors=False, fields=None, executor=None):
+        """
+        Asynchronous counterpart of `from_file`, reading the metadata tags in an executor.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the raster file.
+        ref_metadata : dict or Schema, optional
+            Reference metadata, e.g. `config_registry.get_product(worker_name, version_id)`. If not given and the
+            file was written with a schema fingerprint (see `to_tags`), the matching reference metadata is used.
+        collect_errors : bool, optional
+            If true, all violations are collected before raising a `MetaDataValidationError` (defaults to false).
+        fields : iterable of str, optional
+            Metadata attributes to validate and store, all others are ignored (see `MetaData`).
+        executor : concurrent.futures.Executor, optional
+            Executor running the blocking work. Defaults to the default executor of the event loop.
+
+        Returns
+        -------
+        MetaData
+
+        """
+        from .aio import read_tags
+
+        tags, ref_metadata = _resolve_fingerprint(await read_tags(filepath, executor=executor), ref_metadata)
+        return cls(tags, ref_metadata, collect_errors=collect_errors, fields=fields)
+
+    async def awrite_to_file(self, filepath, executor=None):
+        """
+        Asynchronous counterpart of `write_to_file`, writing the metadata tags in an executor.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the raster file.
+        executor : concurrent.futures.Executor, optional
+            Executor running the blocking work. Defaults to the default executor of the event loop.
+
+        """
+        from .aio import run_blocking
+
+        await run_blocking(self.write_to_file, filepath, executor=executor)
 
     def to_pretty_frmt(self):
         """ str : Returns metadata dictionary in a formatted string. """
+        from pprint import pformat
+
         return pformat(self._meta, indent=4)
 
-    def to_tags(self):
-        """ dict : Returns metadata as a dictionary containing encoded values. """
-        return self._meta
+    def to_tags(self, fingerprint=False):
+        """
+        Returns metadata as a dictionary containing encoded values.
+
+        Parameters
+        ----------
+        fingerprint : bool, optional
+            If true, the content fingerprint of the reference metadata (of the full schema for projections) is
+            added as tag "medali_fingerprint", so the reference metadata of a file can be identified when reading
+            it (defaults to false).
+
+        Returns
+        -------
+        dict
+
+        """
+        meta = self._meta
+        if fingerprint:
+            schema = self._schema if self._schema.parent is None else self._schema.parent
+            meta[FINGERPRINT_TAG] = schema.fingerprint
+        return meta
+
+    def to_decoded_dict(self):
+        """ dict : Returns metadata as a dictionary containing decoded values, each being decoded at most once. """
+        return {attr: self._get_metadata(attr) for attr in self._meta}
+
+    @property
+    def is_dirty(self):
+        """ bool : True if any metadata attribute was modified since loading or the last flush. """
+        return bool(self._dirty)
+
+    def dirty_tags(self):
+        """ dict : Returns the metadata attributes modified since loading or the last flush with encoded values. """
+        if not self._dirty:
+            return {}
+        meta = self._meta
+        return {attr: meta[attr] for attr in self._dirty}
+
+    def mark_clean(self):
+        """ Resets the tracking of modified metadata attributes, e.g. after writing them to a file. """
+        self._dirty = None
+
+    def diff(self, other):
+        """
+        Compares the encoded values of two metadata instances attribute by attribute.
+
+        Parameters
+        ----------
+        other : MetaData or dict
+            Metadata instance or dictionary containing metadata attributes and encoded values.
+
+        Returns
+        -------
+        dict
+            Maps each metadata attribute whose encoded values differ to a tuple with the own and the other value.
+            If an attribute is missing on one side, None is given instead.
+
+        """
+        meta = self._meta
+        other_meta = other._meta if isinstance(other, MetaData) else other
+        differences = {}
+        for attr in meta.keys() | other_meta.keys():
+            value, other_value = meta.get(attr), other_meta.get(attr)
+            if value != other_value:
+                differences[attr] = (value, other_value)
+
+        return differences
+
+    def same_content(self, other):
+        """
+        Checks if two metadata instances have the same content. In contrast to `==`, which compares identities,
+        the reference metadata and the encoded values are compared.
+
+        Parameters
+        ----------
+        other : MetaData
+            Metadata instance to compare with.
+
+        Returns
+        -------
+        bool
+            True if both instances have equal reference metadata and encoded values.
+
+        """
+        if self._schema is not other._schema and self._schema != other._schema:
+            return False
+        return self._values == other._values and (self._extra or None) == (other._extra or None)
+
+    def write_to_file(self, filepath, fingerprint=False):
+        """
+        Writes all metadata tags to a GeoTIFF or NetCDF file. For GeoTIFF files, the dataset-level metadata
+        is replaced in place without reading or rewriting raster data. Metadata created with `fields` only
+        updates the projected tags and keeps all other tags of the file.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the raster file.
+        fingerprint : bool, optional
+            If true, the content fingerprint of the reference metadata is written as well (defaults to false).
+
+        """
+        from .fileio import write_tags, update_tags
+
+        tags = self.to_tags(fingerprint=fingerprint)
+        if self._schema.parent is None:
+            write_tags(filepath, tags)
+        else:
+            update_tags(filepath, tags)
+        self.mark_clean()
+
+    def flush(self, filepath):
+        """
+        Writes only the metadata tags modified since loading or the last flush to a GeoTIFF or NetCDF file.
+        The file is not touched if nothing was modified or the file already contains the modified values.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the raster file.
+
+        Returns
+        -------
+        bool
+            True if the file was written.
+
+        """
+        if not self._dirty:
+            return False
+        from .fileio import update_tags
+
+        written = update_tags(filepath, self.dirty_tags())
+        self.mark_clean()
+
+        return written
 
     def _set_input_metadata(self, metadata):
         """
@@ -110,9 +490,65 @@ class MetaData:
         for key, value in metadata.items():
             self._set_metadata(key, value)
 
-        for key, value in self._ref_meta['Metadata'].items():
-            if key not in self._meta:
-                self._meta[key] = 'null'
+    def _set_input_metadata_collecting(self, metadata):
+        """
+        Sets metadata attributes and values according to the given metadata dictionary after validating
+        all of them. Required attributes which are not given count as violations.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded values.
+
+        Raises
+        ------
+        MetaDataValidationError
+            If any value violates the reference metadata or any required attribute is missing.
+
+        """
+        meta, decoded, violations = self._schema.convert(metadata)
+        violations.extend(self._schema.missing(metadata))
+        if violations:
+            raise MetaDataValidationError(violations)
+        for attr, enc_value in meta.items():
+            self._store(attr, enc_value, decoded[attr])
+
+    def _init_storage(self, schema):
+        """
+        Initialises the storage of metadata values, setting all required attributes to 'null'.
+
+        Parameters
+        ----------
+        schema : Schema
+            Compiled reference metadata.
+
+        """
+        self._schema = schema
+        self._values = ['null'] * len(schema)
+        self._decoded = [_UNDECODED] * len(schema)
+        self._extra = None if schema.strict else {}
+        self._dirty = None
+
+    def _store(self, attr, enc_value, dec_value):
+        """
+        Stores an already validated metadata value.
+
+        Parameters
+        ----------
+        attr : str
+            Metadata attribute.
+        enc_value : str
+            Encoded metadata value.
+        dec_value : any
+            Decoded metadata value, or `_UNDECODED` if it should be decoded lazily.
+
+        """
+        position = self._schema.positions.get(attr)
+        if position is None:
+            self._extra[attr] = enc_value
+        else:
+            self._values[position] = enc_value
+            self._decoded[position] = dec_value
 
     def _set_metadata(self, attr, value):
         """
@@ -127,19 +563,23 @@ class MetaData:
             Metadata value.
 
         """
-        # convert back and forth to execute expected value test with decoded values
-        enc_value = self._encode(attr, value)
-        dec_value = self._decode(attr, enc_value)
-        if not self._is_expected(attr, dec_value):
-            expected_values = self._ref_meta['Expected_value'].get(attr)
-            err_msg = "Metadata value '{}' is not in compliance with '{}'".format(value, expected_values)
-            raise ValueError(err_msg)
+        # validate and encode in one pass to execute expected value test with decoded values
+        enc_value, dec_value, issue = self._schema[attr].validate(value)
+        if issue is not None:
+            raise ValueError(issue[1])
 
-        self._meta[attr] = self._encode(attr, value)
+        position = self._schema.positions.get(attr)
+        if position is None:
+            self._extra[attr] = enc_value
+        else:
+            self._values[position] = enc_value
+            # values given as strings are decoded lazily to keep instances small
+            self._decoded[position] = _UNDECODED if enc_value is value else dec_value
 
     def _get_metadata(self, attr):
         """
         Decodes and returns metadata value according to the given attribute.
+        Decoded values are memoized until the attribute is set again.
 
         Parameters
         ----------
@@ -152,11 +592,19 @@ class MetaData:
             Decoded metadata value.
 
         """
-        if attr not in self._meta.keys():
-            err_msg = "Metadata attribute '{}' can not be found.".format(attr)
-            raise KeyError(err_msg)
+        position = self._schema.positions.get(attr)
+        if position is None:
+            if self._extra is None or attr not in self._extra:
+                err_msg = "Metadata attribute '{}' can not be found.".format(attr)
+                raise KeyError(err_msg)
+            return self._schema[attr].decode(self._extra[attr])
+
+        dec_value = self._decoded[position]
+        if dec_value is _UNDECODED:
+            dec_value = self._schema.ordered_attributes[position].decode(self._values[position])
+            self._decoded[position] = dec_value
 
-        return self._decode(attr, self._meta[attr])
+        return dec_value
 
     def _is_expected(self, attr, value):
         """
@@ -176,19 +624,7 @@ class MetaData:
             True if the given metadata value is expected, else false.
 
         """
-        exp_values = self._ref_meta['Expected_value'].get(attr)
-        is_expected = True
-        if exp_values and (value not in [None, 'null']):
-            if isinstance(exp_values, list):
-                if value not in exp_values:
-                    is_expected = False
-            elif exp_values.startswith('pattern'):
-                exp_value = exp_values.replace(', ', ',')
-                pattern = exp_value.split(',')[1]
-                if not re.search(pattern, value):
-                    is_expected = False
-
-        return is_expected
+        return self._schema[attr].is_expected(value)
 
     def _decode(self, attr, value):
         """
@@ -207,29 +643,7 @@ class MetaData:
             Decoded metadata value.
 
         """
-        if self._ref_meta['Metadata']:
-            if attr in self._ref_meta['Metadata'].keys():
-                if value == 'none':
-                    dec_value = None
-                elif value == 'null':
-                    dec_value = 'null'
-                elif self._ref_meta['Metadata'][attr] == 'boolean':
-                    dec_value = value == 'True'
-                elif self._ref_meta['Metadata'][attr] == 'integer':
-                    dec_value = int(value)
-                elif self._ref_meta['Metadata'][attr] == 'number':
-                    dec_value = float(value)
-                elif self._ref_meta['Metadata'][attr] == 'datetime':
-                    dec_value = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                else:
-                    dec_value = value
-            else:
-                err_msg = "Attribute '{}' is not given in the reference metadata."
-                raise KeyError(err_msg)
-        else:
-            dec_value = value
-
-        return dec_value
+        return self._schema[attr].decode(value)
 
     def _encode(self, attr, value):
         """
@@ -248,65 +662,151 @@ class MetaData:
             Encoded metadata value.
 
         """
-        err_msg_frmt = "Metadata value for attribute '{}' has to be '{}'."
-        if self._ref_meta['Metadata']:
-            if attr in self._ref_meta['Metadata'].keys():
-                dtype = self._ref_meta['Metadata'][attr]
-                if value is None:
-                    enc_value = 'none'
-                elif isinstance(value, str):  # nothing to encode, but check if the value is convertable
-                    try:
-                        self._decode(attr, value)
-                    except Exception:
-                        raise ValueError(err_msg_frmt.format(attr, dtype))
-                    enc_value = value
-                elif dtype == 'boolean':
-                    if isinstance(value, bool):
-                        enc_value = str(value)
-                    else:
-                        raise ValueError(err_msg_frmt.format(attr, dtype))
-                elif dtype == 'integer':
-                    if isinstance(value, int):
-                        enc_value = str(value)
-                    else:
-                        raise ValueError(err_msg_frmt.format(attr, dtype))
-                elif dtype == 'number':
-                    if isinstance(value, numbers.Number):
-                        enc_value = str(value)
-                    else:
-                        raise ValueError(err_msg_frmt.format(attr, dtype))
-                elif dtype == 'datetime':
-                    if isinstance(value, datetime.datetime):
-                        enc_value = value.strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        raise ValueError(err_msg_frmt.format(attr, dtype))
+        return self._schema[attr].encode(value)
+
+    def _iter_tags(self):
+        """ Iterates over all metadata attributes and encoded values without building a dictionary. """
+        yield from zip(self._schema.names, self._values)
+        if self._extra:
+            yield from self._extra.items()
+
+    @classmethod
+    def intersect(cls, metadata, by_value=False):
+        """
+        Finds the metadata attributes common to many `MetaData` instances in a single pass.
+
+        Parameters
+        ----------
+        metadata : iterable of MetaData
+            Metadata instances.
+        by_value : bool, optional
+            If true, only attributes whose encoded values agree among all instances are kept. Otherwise (default),
+            attributes given by all instances are kept with the values of the first instance.
+
+        Returns
+        -------
+        MetaData
+            Common metadata. The reference metadata of the first instance is reused if all of its attributes are
+            kept, otherwise it is restricted to the common attributes.
+
+        """
+        metadata = iter(metadata)
+        first = next(metadata, None)
+        if first is None:
+            err_msg = "At least one metadata instance is required."
+            raise ValueError(err_msg)
+        schema = first._schema
+        positions = schema.positions
+        common = dict(first._iter_tags())
+        for other in metadata:
+            if other._schema == schema and not other._extra:  # compare positionally without building a dictionary
+                values = other._values
+                if by_value:
+                    common = {attr: value for attr, value in common.items()
+                              if attr in positions and values[positions[attr]] == value}
                 else:
-                    enc_value = str(value)
+                    common = {attr: value for attr, value in common.items() if attr in positions}
             else:
-                err_msg = "Attribute '{}' is not given in the reference metadata.".format(attr)
-                raise KeyError(err_msg)
-        else:
-            enc_value = value
+                other_meta = other._meta
+                if by_value:
+                    common = {attr: value for attr, value in common.items()
+                              if other_meta.get(attr, _UNDECODED) == value}
+                else:
+                    common = {attr: value for attr, value in common.items() if attr in other_meta}
+            if not common:
+                break
 
-        return enc_value
+        if schema.strict and len(common) == len(schema) and not first._extra:
+            return cls(common, schema)
+
+        return cls(common, _restrict_ref_metadata(schema, common.keys()))
+
+    @classmethod
+    def merge(cls, metadata, policy='first', policies=None):
+        """
+        Merges many `MetaData` instances into one in a single pass. 'null' values are ignored, all other values of
+        an attribute are combined according to a conflict policy:
+
+            - 'first': the first value is kept
+            - 'last': the last value is kept
+            - 'min', 'max': the smallest/largest decoded value is kept, e.g. the earliest/latest datetime
+            - 'equal': the value is kept if all values agree, otherwise the attribute is set to 'null'
+            - 'raise': a `ValueError` is raised if the values do not agree
+            - callable: called with the list of all decoded values, returning the merged value
+
+        Parameters
+        ----------
+        metadata : iterable of MetaData
+            Metadata instances.
+        policy : str or callable, optional
+            Conflict policy for all attributes (defaults to 'first').
+        policies : dict, optional
+            Conflict policies per metadata attribute, overruling `policy`.
+
+        Returns
+        -------
+        MetaData
+            Merged metadata. If all instances share the same reference metadata, it is reused, otherwise the
+            union of all reference metadata is used.
+
+        """
+        policies = policies or {}
+        for attr_policy in [policy] + list(policies.values()):
+            if not callable(attr_policy) and attr_policy not in _MERGE_POLICIES:
+                err_msg = "Merge policy '{}' is not supported. Use one of {} or a callable.".format(
+                    attr_policy, sorted(_MERGE_POLICIES))
+                raise ValueError(err_msg)
+
+        schema, attributes, merged, conflicts = None, {}, {}, set()
+        n_instances = 0
+        for other in metadata:
+            n_instances += 1
+            if schema is None:
+                schema = other._schema
+            elif schema is not False and other._schema != schema:
+                schema = False  # reference metadata differs, the union is created from `attributes`
+            for attr, enc_value in other._iter_tags():
+                if attributes.get(attr) is None:  # the first definition of an attribute is used
+                    attributes[attr] = other._schema.attributes.get(attr)
+                if enc_value == 'null':
+                    continue
+                attr_policy = policies.get(attr, policy)
+                if callable(attr_policy):
+                    merged.setdefault(attr, []).append(other._get_metadata(attr))
+                elif attr not in merged:
+                    merged[attr] = other._get_metadata(attr) if attr_policy in ('min', 'max') else enc_value
+                else:
+                    merged[attr] = _merge_value(attr, merged[attr], other, enc_value, attr_policy, conflicts)
+        if n_instances == 0:
+            err_msg = "At least one metadata instance is required."
+            raise ValueError(err_msg)
+
+        for attr, value in merged.items():
+            attr_policy = policies.get(attr, policy)
+            if callable(attr_policy):
+                merged[attr] = attr_policy(value)
+            elif attr in conflicts:
+                merged[attr] = 'null'
+
+        if schema is False:
+            schema = _union_ref_metadata(attributes)
+        for attr in attributes:  # attributes without any value are kept
+            merged.setdefault(attr, 'null')
+
+        return cls(merged, schema)
+
+    def __reduce__(self):
+        """
+        Pickles the schema (which is memoized by pickle and only refers to its origin if known) and the encoded
+        values ordered by the schema, so neither attribute names nor reference metadata are repeated.
+
+        """
+        dirty = tuple(self._dirty) if self._dirty else None
+        return _restore_metadata, (type(self), self._schema, tuple(self._values), self._extra or None, dirty)
 
     def __and__(self, other):
         """ Finds common metadata attributes among the two metadata classes. """
-        common_keys = self._meta.keys() & other._meta.keys()
-        common_metadata = dict()
-        common_ref_metadata = dict()
-        common_ref_metadata['Metadata'] = dict()
-        common_ref_metadata['Expected_value'] = dict()
-        for common_key in common_keys:
-            common_metadata[common_key] = self._meta[common_key]
-            ref_meta = self._ref_meta['Metadata'].get(common_key)
-            if ref_meta is not None:
-                common_ref_metadata['Metadata'][common_key] = ref_meta
-            ref_exp_value = self._ref_meta['Expected_value'].get(common_key)
-            if ref_exp_value is not None:
-                common_ref_metadata['Expected_value'][common_key] = ref_exp_value
-
-        return MetaData(common_metadata, common_ref_metadata)
+        return MetaData.intersect([self, other])
 
     def __str__(self):
         """ str : String representation of metadata object. """
@@ -324,7 +824,23 @@ class MetaData:
             Metadata value.
 
         """
-        self._set_metadata(key, value)
+        # same as `_set_metadata`, but modified attributes are tracked
+        enc_value, dec_value, issue = self._schema[key].validate(value)
+        if issue is not None:
+            raise ValueError(issue[1])
+
+        position = self._schema.positions.get(key)
+        if position is None:
+            prev_value = self._extra.get(key)
+            self._extra[key] = enc_value
+        else:
+            prev_value = self._values[position]
+            self._values[position] = enc_value
+            self._decoded[position] = _UNDECODED if enc_value is value else dec_value
+        if enc_value != prev_value:
+            if self._dirty is None:
+                self._dirty = set()
+            self._dirty.add(key)
 
     def __getitem__(self, item):
         """
@@ -344,33 +860,219 @@ class MetaData:
         return self._get_metadata(item)
 
 
-def read_config(filepath):
+def _restore_metadata(cls, schema, values, extra=None, dirty=None):
+    """
+    Creates a `MetaData` instance from already validated encoded values.
+
+    Parameters
+    ----------
+    cls : type
+        `MetaData` or a subclass of it.
+    schema : Schema
+        Compiled reference metadata.
+    values : sequence of str
+        Encoded values ordered by the attribute positions of the schema.
+    extra : dict, optional
+        Attributes which are not defined in the reference metadata and their values.
+    dirty : iterable of str, optional
+        Attributes modified since loading.
+
+    Returns
+    -------
+    MetaData
+
+    """
+    if len(values) != len(schema):
+        err_msg = "Number of values ({}) does not match the number of attributes ({}).".format(
+            len(values), len(schema))
+        raise ValueError(err_msg)
+    metadata = cls.__new__(cls)
+    metadata._init_storage(schema)
+    metadata._values[:] = values
+    if extra:
+        metadata._extra.update(extra)
+    if dirty:
+        metadata._dirty = set(dirty)
+
+    return metadata
+
+
+def _resolve_fingerprint(tags, ref_metadata):
+    """
+    Removes the schema fingerprint from the tags of a file and looks up the matching reference metadata if none
+    is given.
+
+    Parameters
+    ----------
+    tags : dict
+        Metadata attributes and encoded values read from a file.
+    ref_metadata : dict or Schema
+        Given reference metadata, or None.
+
+    Returns
+    -------
+    tags : dict
+        Metadata attributes and encoded values without the fingerprint.
+    ref_metadata : dict or Schema
+        Given reference metadata or the one identified by the fingerprint (None if it is unknown).
+
     """
-    Parse a metadata config file.
+    fingerprint = tags.pop(FINGERPRINT_TAG, None)
+    if ref_metadata is None and fingerprint is not None:
+        ref_metadata = config_registry.get_by_fingerprint(fingerprint)
+
+    return tags, ref_metadata
+
+
+_MERGE_POLICIES = ('first', 'last', 'min', 'max', 'equal', 'raise')
+
+
+def _merge_value(attr, merged_value, other, enc_value, policy, conflicts):
+    """
+    Combines an already merged value with the value of another `MetaData` instance according to a conflict policy.
 
     Parameters
     ----------
-    filepath : str
-        Path to the metadata config file.
+    attr : str
+        Metadata attribute.
+    merged_value : any
+        Merged value so far, being decoded for the policies 'min' and 'max', otherwise encoded.
+    other : MetaData
+        Metadata instance providing the new value.
+    enc_value : str
+        Encoded value of `other`.
+    policy : str
+        Conflict policy.
+    conflicts : set
+        Attributes whose values do not agree, which is extended for the policy 'equal'.
 
     Returns
     -------
-    ds : dict
-        Parsed metadata config file as a dictionary.
+    any
+        New merged value.
+
+    """
+    if policy == 'first':
+        return merged_value
+    elif policy == 'last':
+        return enc_value
+    elif policy in ('min', 'max'):
+        dec_value = other._get_metadata(attr)
+        if merged_value is None:
+            return dec_value
+        elif dec_value is None:
+            return merged_value
+        return min(merged_value, dec_value) if policy == 'min' else max(merged_value, dec_value)
+    elif merged_value != enc_value:
+        if policy == 'raise':
+            err_msg = "Values '{}' and '{}' of metadata attribute '{}' do not agree.".format(
+                merged_value, enc_value, attr)
+            raise ValueError(err_msg)
+        conflicts.add(attr)
 
+    return merged_value
+
+
+def _restrict_ref_metadata(schema, names):
     """
-    config = ConfigParser()
-    config.optionxform = str
-    config.read(filepath)
-
-    ds = {}
-    for section in config.sections():
-        ds[section] = {}
-        for item, value in config.items(section):
-            if value.startswith('list'):
-                value = value.replace(', ', ',')
-                value = value.split(',')
-                value.pop(0)
-            ds[section][item] = value
-
-    return ds
+    Creates reference metadata containing only the given metadata attributes.
+
+    Parameters
+    ----------
+    schema : Schema
+        Compiled reference metadata.
+    names : iterable of str
+        Metadata attributes to keep.
+
+    Returns
+    -------
+    dict
+        Reference metadata.
+
+    """
+    return _union_ref_metadata({name: schema.attributes.get(name) for name in names})
+
+
+def _union_ref_metadata(attributes):
+    """
+    Creates reference metadata from compiled metadata attributes. If any attribute has a data type, attributes
+    without one (e.g. of metadata without reference data types) are added as strings.
+
+    Parameters
+    ----------
+    attributes : dict
+        Maps metadata attributes to their compiled definition, or to None if they are not defined.
+
+    Returns
+    -------
+    dict
+        Reference metadata.
+
+    """
+    ref_metadata = {'Metadata': dict(), 'Expected_value': dict()}
+    typed = any(attribute is not None and attribute.dtype is not None for attribute in attributes.values())
+    for name, attribute in attributes.items():
+        dtype = None if attribute is None else attribute.dtype
+        if dtype is None and typed:
+            dtype = 'string'
+        if dtype is not None:
+            ref_metadata['Metadata'][name] = dtype
+        if attribute is not None and attribute.expected is not None:
+            ref_metadata['Expected_value'][name] = attribute.expected
+
+    return ref_metadata
+
+
+def _convert_records(records, schema):
+    """
+    Validates and encodes many metadata dictionaries. Conversion results are memoized per attribute and
+    value, so each distinct value is only validated once.
+
+    Parameters
+    ----------
+    records : iterable of dict
+        Dictionaries containing metadata attributes and decoded values.
+    schema : Schema
+        Compiled reference metadata.
+
+    Returns
+    -------
+    converted_records : list of tuple
+        Dictionaries containing encoded and decoded values per record.
+    violations : list of Violation
+        All values violating the reference metadata.
+
+    """
+    converted_records = []
+    violations = []
+    memos = {}
+    for index, record in enumerate(records):
+        meta, decoded, record_violations = schema.convert(record, index=index, memos=memos)
+        converted_records.append((meta, decoded))
+        violations.extend(record_violations)
+
+    return converted_records, violations
+
+
+def validate(metadata, ref_metadata):
+    """
+    Collects all violations of a metadata dictionary with respect to reference metadata in one pass, i.e.
+    unknown attributes, data type mismatches, values not being in compliance with the expected values, and
+    missing attributes, which would be set to 'null' when creating a `MetaData` instance.
+
+    Parameters
+    ----------
+    metadata : dict
+        Dictionary containing metadata attributes and decoded or encoded values.
+    ref_metadata : dict or Schema
+        Reference metadata.
+
+    Returns
+    -------
+    list of Violation
+        All violations of the reference metadata.
+
+    """
+    schema = ref_metadata if isinstance(ref_metadata, Schema) else intern_schema(ref_metadata)
+
+    return schema.validate(metadata)
@@ -0,0 +1,107 @@
+""" Reading and writing of metadata tags from/to raster files without accessing raster data. """
+
+import os
+
+from . import tiff
+
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+NETCDF_EXTENSIONS = ('.nc',)
+
+
+def _get_file_format(filepath):
+    """ str : File format ('tiff' or 'netcdf') derived from the file extension. """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in TIFF_EXTENSIONS:
+        return 'tiff'
+    elif ext in NETCDF_EXTENSIONS:
+        return 'netcdf'
+    else:
+        err_msg = "File format of '{}' is not supported.".format(filepath)
+        raise ValueError(err_msg)
+
+
+def read_tags(filepath):
+    """
+    Reads dataset-level metadata tags from a GeoTIFF file (pure Python, no GDAL needed) or the global
+    attributes of a NetCDF file (requires the `netCDF4` package).
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+
+    Returns
+    -------
+    dict
+        Metadata attributes and encoded values.
+
+    """
+    if _get_file_format(filepath) == 'tiff':
+        return tiff.read_gdal_metadata(filepath)
+
+    from netCDF4 import Dataset
+
+    with Dataset(filepath, 'r') as dataset:
+        return {name: str(dataset.getncattr(name)) for name in dataset.ncattrs()}
+
+
+def write_tags(filepath, tags):
+    """
+    Writes dataset-level metadata tags to a GeoTIFF file in place (pure Python, no GDAL needed) or sets them
+    as global attributes of a NetCDF file (requires the `netCDF4` package).
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+    tags : dict
+        Metadata attributes and encoded values.
+
+    """
+    if _get_file_format(filepath) == 'tiff':
+        tiff.write_gdal_metadata(filepath, tags)
+        return
+
+    from netCDF4 import Dataset
+
+    with Dataset(filepath, 'a') as dataset:
+        dataset.setncatts({name: str(value) for name, value in tags.items()})
+
+
+def update_tags(filepath, tags):
+    """
+    Updates dataset-level metadata tags of a GeoTIFF or NetCDF file, keeping all other tags. Nothing is written
+    if the file already contains the given values.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+    tags : dict
+        Metadata attributes and encoded values to update.
+
+    Returns
+    -------
+    bool
+        True if the file was written.
+
+    """
+    tags = {name: str(value) for name, value in tags.items()}
+    if _get_file_format(filepath) == 'tiff':
+        file_tags = tiff.read_gdal_metadata(filepath)
+        if all(file_tags.get(name) == value for name, value in tags.items()):
+            return False
+        file_tags.update(tags)
+        tiff.write_gdal_metadata(filepath, file_tags)
+        return True
+
+    from netCDF4 import Dataset
+
+    with Dataset(filepath, 'a') as dataset:
+        file_tags = {name: str(dataset.getncattr(name)) for name in dataset.ncattrs()}
+        changed_tags = {name: value for name, value in tags.items() if file_tags.get(name) != value}
+        if changed_tags:
+            dataset.setncatts(changed_tags)
+
+    return bool(changed_tags)
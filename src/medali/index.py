@@ -0,0 +1,446 @@
+"""
+Persistent SQLite index of the metadata of many files, e.g. for finding all files of an archive matching a tile,
+an orbit and a date range without opening them:
+
+    index = MetaDataIndex.from_product_version("archive.sqlite", "s1dc_flood_mapper", "V1M2")
+    index.refresh("/data/archive")
+    for filepath, metadata in index.query({'tile_id': 'E048N012T3', 'orbit_relative': 117,
+                                           'date_sensing': (datetime(2021, 1, 1), datetime(2021, 2, 1))}):
+        ...
+
+Each attribute of the reference metadata is stored in its own column. Integers, numbers and booleans are stored
+as SQLite integers and reals, datetimes as canonical strings, so comparisons and range queries respect the data
+type. 'null' (and for typed attributes also 'none') is stored as NULL. The encoded values are additionally stored
+as they are, so the metadata returned by queries has exactly the tags of the files.
+
+"""
+
+import os
+import json
+import sqlite3
+from collections import namedtuple
+
+from .core import MetaData
+from .core import _restore_metadata
+from .scan import iter_files
+from .scan import _map_bounded
+from .schema import Schema
+from .schema import FINGERPRINT_TAG
+from .schema import intern_schema
+from .schema import format_datetime
+from .config import config_registry
+from .config import _file_signature
+from .fileio import read_tags
+
+
+INDEX_FORMAT = 2
+# attributes being indexed by default if they are defined in the reference metadata
+DEFAULT_INDEXED = ('tile_id', 'orbit_relative', 'rel_orbit_number', 'orbit_direction', 'band', 'polarisation',
+                   'date_sensing', 'sensing_date', 'start_date', 'end_date')
+_SQL_TYPES = {'integer': 'INTEGER', 'boolean': 'INTEGER', 'number': 'REAL', 'datetime': 'TEXT'}
+_TO_SQL = {'integer': int, 'boolean': int, 'number': float, 'datetime': format_datetime}
+
+RefreshResult = namedtuple('RefreshResult', ['n_updated', 'n_removed', 'errors'])
+RefreshResult.__doc__ = """
+Outcome of refreshing an index, i.e. the number of added or updated files, the number of removed files and the
+error messages of files which could not be read or violate the reference metadata (by file path).
+
+"""
+
+
+def _quote(name):
+    """ str : Quotes an SQL identifier. """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _compile_to_sql(attribute):
+    """ Creates a function converting an encoded value to the value stored in the column of the attribute. """
+    to_sql = _TO_SQL.get(attribute.dtype)
+    if to_sql is None:
+        def convert(enc_value):
+            return None if enc_value == 'null' else enc_value
+    else:
+        decode = attribute.decode
+
+        def convert(enc_value):
+            if enc_value == 'null' or enc_value == 'none':
+                return None
+            return to_sql(decode(enc_value))
+
+    return convert
+
+
+class MetaDataIndex:
+    """
+    SQLite database storing the metadata of many files of one product version, keyed by absolute file path.
+    Files are refreshed incrementally based on their modification time and size. The database remembers the
+    fingerprint of its reference metadata, so it can not be opened with other reference metadata.
+
+    """
+    def __init__(self, db_filepath, ref_metadata, indexed=None):
+        """
+        Constructor of `MetaDataIndex`.
+
+        Parameters
+        ----------
+        db_filepath : str
+            Path to the SQLite database, which is created if it does not exist.
+        ref_metadata : dict or Schema
+            Reference metadata with data types.
+        indexed : iterable of str, optional
+            Attributes to create an SQL index for. Defaults to the ones of `DEFAULT_INDEXED` defined in the
+            reference metadata.
+
+        """
+        schema = ref_metadata if isinstance(ref_metadata, Schema) else intern_schema(ref_metadata)
+        if not schema.strict:
+            err_msg = "An index requires reference metadata with data types."
+            raise ValueError(err_msg)
+        self._schema = schema
+        self._to_sql = [_compile_to_sql(attribute) for attribute in schema.ordered_attributes]
+        indexed = [name for name in DEFAULT_INDEXED if name in schema] if indexed is None else list(indexed)
+        for name in indexed:
+            schema[name]  # raises a KeyError for unknown attributes
+
+        self.db_filepath = db_filepath
+        self._connection = sqlite3.connect(db_filepath)
+        try:
+            self._create_tables(indexed)
+        except Exception:
+            self._connection.close()
+            raise
+
+    @classmethod
+    def from_product_version(cls, db_filepath, worker_name, version_id, var_name=None, indexed=None):
+        """
+        Creates a `MetaDataIndex` instance for a product version.
+
+        Parameters
+        ----------
+        db_filepath : str
+            Path to the SQLite database, which is created if it does not exist.
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        version_id : str
+            Metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+        indexed : iterable of str, optional
+            Attributes to create an SQL index for.
+
+        Returns
+        -------
+        MetaDataIndex
+
+        """
+        schema = config_registry.get_product(worker_name, version_id, var_name=var_name)
+        return cls(db_filepath, schema, indexed=indexed)
+
+    @property
+    def schema(self):
+        """ Schema : Compiled reference metadata of the indexed files. """
+        return self._schema
+
+    def _create_tables(self, indexed):
+        """ Creates the tables and SQL indexes if they do not exist and checks the reference metadata. """
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS medali_index (key TEXT PRIMARY KEY, value TEXT)")
+            info = dict(self._connection.execute("SELECT key, value FROM medali_index"))
+            if not info:
+                self._connection.executemany("INSERT INTO medali_index VALUES (?, ?)",
+                                             [('format', str(INDEX_FORMAT)), ('fingerprint', self._schema.fingerprint)])
+            elif info.get('format') != str(INDEX_FORMAT):
+                err_msg = "Index '{}' has the unsupported format {}.".format(self.db_filepath, info.get('format'))
+                raise ValueError(err_msg)
+            elif info.get('fingerprint') != self._schema.fingerprint:
+                err_msg = "Index '{}' was created for other reference metadata (fingerprint {} instead of {}).".format(
+                    self.db_filepath, info.get('fingerprint'), self._schema.fingerprint)
+                raise ValueError(err_msg)
+
+            columns = ["_filepath TEXT PRIMARY KEY", "_mtime_ns INTEGER", "_size INTEGER", "_tags TEXT"]
+            columns += ["{} {}".format(_quote(attribute.name), _SQL_TYPES.get(attribute.dtype, 'TEXT'))
+                        for attribute in self._schema.ordered_attributes]
+            self._connection.execute("CREATE TABLE IF NOT EXISTS files ({})".format(", ".join(columns)))
+            for name in indexed:
+                self._connection.execute("CREATE INDEX IF NOT EXISTS {} ON files ({})".format(
+                    _quote("index_" + name), _quote(name)))
+
+    def _to_row(self, filepath, metadata, file_sig):
+        """ tuple : Converts metadata (`MetaData` or a dictionary) of a file to the values of a table row. """
+        if not isinstance(metadata, MetaData) or metadata._schema != self._schema:
+            tags = metadata.to_tags() if isinstance(metadata, MetaData) else metadata
+            metadata = MetaData({name: tags[name] for name in self._schema.names if name in tags}, self._schema)
+        mtime_ns, size = file_sig if file_sig is not None else (None, None)
+
+        enc_values = metadata._values
+        row = [filepath, mtime_ns, size, json.dumps(enc_values, separators=(',', ':'))]
+        row.extend(to_sql(enc_value) for to_sql, enc_value in zip(self._to_sql, enc_values))
+
+        return row
+
+    def _upsert(self, rows):
+        """ int : Inserts or replaces table rows in one transaction. """
+        placeholders = ", ".join("?" * (len(self._schema) + 4))
+        with self._connection:
+            cursor = self._connection.executemany("INSERT OR REPLACE INTO files VALUES ({})".format(placeholders),
+                                                  rows)
+
+        return cursor.rowcount
+
+    def upsert(self, entries):
+        """
+        Adds or updates the metadata of many files in one transaction. Attributes not defined in the reference
+        metadata are ignored.
+
+        Parameters
+        ----------
+        entries : iterable of tuple
+            File paths and their metadata, given as `MetaData` or dictionaries containing metadata attributes and
+            decoded or encoded values. The modification time and size of existing files is stored as well.
+
+        Returns
+        -------
+        int
+            Number of added or updated files.
+
+        """
+        def iter_rows():
+            for filepath, metadata in entries:
+                filepath = os.path.abspath(filepath)
+                yield self._to_row(filepath, metadata, _file_signature(filepath))
+
+        return self._upsert(iter_rows())
+
+    def remove(self, filepaths):
+        """
+        Removes files from the index.
+
+        Parameters
+        ----------
+        filepaths : iterable of str
+            Paths of the files.
+
+        Returns
+        -------
+        int
+            Number of removed files.
+
+        """
+        with self._connection:
+            cursor = self._connection.executemany("DELETE FROM files WHERE _filepath = ?",
+                                                  ((os.path.abspath(filepath),) for filepath in filepaths))
+
+        return cursor.rowcount
+
+    def refresh(self, root_dirpath, n_workers=None):
+        """
+        Brings the index up to date with the files of a directory tree. Only files which are new or whose
+        modification time or size changed are read, and files below the directory which do not exist anymore are
+        removed. Files which can not be read or violate the reference metadata are removed as well.
+
+        Parameters
+        ----------
+        root_dirpath : str
+            Root directory of the archive.
+        n_workers : int, optional
+            Number of threads reading the tags of changed files. If it is 0, files are read in the calling thread.
+            Defaults to the number of CPUs.
+
+        Returns
+        -------
+        RefreshResult
+
+        """
+        root_dirpath = os.path.abspath(root_dirpath)
+        prefix = root_dirpath.rstrip(os.sep) + os.sep
+        known = {filepath: (mtime_ns, size) for filepath, mtime_ns, size in self._connection.execute(
+            "SELECT _filepath, _mtime_ns, _size FROM files WHERE substr(_filepath, 1, ?) = ?", (len(prefix), prefix))}
+        changed = []
+        for filepath in iter_files(root_dirpath):
+            file_sig = _file_signature(filepath)
+            if known.pop(filepath, None) != file_sig:
+                changed.append((filepath, file_sig))
+
+        n_workers = (os.cpu_count() or 1) if n_workers is None else n_workers
+        if n_workers == 0:
+            results = map(_read_file, changed)
+        else:
+            results = _map_bounded(_read_file, changed, n_workers, True, 4 * n_workers)
+        errors = {}
+
+        def iter_rows():
+            for filepath, file_sig, tags, error in results:
+                if error is None:
+                    try:
+                        yield self._to_row(filepath, tags, file_sig)
+                        continue
+                    except (KeyError, ValueError) as err:
+                        error = "{}: {}".format(type(err).__name__, err)
+                errors[filepath] = error
+
+        n_updated = self._upsert(iter_rows())
+        n_removed = self.remove(list(known) + list(errors))
+
+        return RefreshResult(n_updated, n_removed, errors)
+
+    def _build_query(self, columns, where=None, order_by=None, limit=None):
+        """ tuple : Creates an SQL query and its parameters selecting the given columns of matching files. """
+        clauses, params = [], []
+        for name, condition in (where or {}).items():
+            attribute = self._schema[name]
+            column, to_sql = _quote(name), self._to_sql[self._schema.positions[name]]
+
+            def convert(value):
+                return to_sql(attribute.convert(value)[0])
+
+            if isinstance(condition, tuple):
+                low, high = condition
+                if low is not None:
+                    clauses.append("{} >= ?".format(column))
+                    params.append(convert(low))
+                if high is not None:
+                    clauses.append("{} <= ?".format(column))
+                    params.append(convert(high))
+            elif isinstance(condition, (list, set, frozenset)):
+                clauses.append("{} IN ({})".format(column, ", ".join("?" * len(condition))))
+                params.extend(convert(value) for value in condition)
+            elif condition is None or condition == 'null':
+                clauses.append("{} IS NULL".format(column))
+            else:
+                clauses.append("{} = ?".format(column))
+                params.append(convert(condition))
+
+        sql = "SELECT {} FROM files".format(", ".join(columns))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by is not None:
+            order_by = [order_by] if isinstance(order_by, str) else order_by
+            terms = []
+            for name in order_by:
+                descending = name.startswith('-')
+                name = name.lstrip('-')
+                self._schema[name]  # raises a KeyError for unknown attributes
+                terms.append(_quote(name) + (" DESC" if descending else ""))
+            sql += " ORDER BY " + ", ".join(terms)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        return sql, params
+
+    def query(self, where=None, order_by=None, limit=None, fields=None):
+        """
+        Finds files by their metadata. `MetaData` instances are created lazily while iterating over the results.
+
+        Parameters
+        ----------
+        where : dict, optional
+            Conditions per metadata attribute, which all have to be met. A condition is a value (decoded or encoded,
+            None or 'null' for missing values), a list or set of allowed values, or a tuple with a lower and an
+            upper bound (both inclusive, None for an open end).
+        order_by : str or list of str, optional
+            Metadata attributes to sort by, prefixed with "-" for descending order.
+        limit : int, optional
+            Maximum number of files.
+        fields : iterable of str, optional
+            Only these metadata attributes are loaded (see `Schema.project`).
+
+        Returns
+        -------
+        iterator of tuple
+            File paths and their `MetaData`.
+
+        """
+        schema = self._schema if fields is None else self._schema.project(fields)
+        sql, params = self._build_query(["_filepath", "_tags"], where, order_by, limit)
+        cursor = self._connection.execute(sql, params)
+        if schema is self._schema:
+            return ((filepath, _restore_metadata(MetaData, schema, json.loads(tags))) for filepath, tags in cursor)
+
+        positions = [self._schema.positions[name] for name in schema.names]
+
+        def restore(tags):
+            enc_values = json.loads(tags)
+            return _restore_metadata(MetaData, schema, [enc_values[position] for position in positions])
+
+        return ((filepath, restore(tags)) for filepath, tags in cursor)
+
+    def filepaths(self, where=None, order_by=None, limit=None):
+        """
+        Finds the paths of files by their metadata (see `query`).
+
+        Returns
+        -------
+        list of str
+            File paths.
+
+        """
+        sql, params = self._build_query(["_filepath"], where, order_by, limit)
+        return [row[0] for row in self._connection.execute(sql, params)]
+
+    def count(self, where=None):
+        """
+        Counts files by their metadata (see `query`).
+
+        Returns
+        -------
+        int
+            Number of matching files.
+
+        """
+        sql, params = self._build_query(["COUNT(*)"], where)
+        return self._connection.execute(sql, params).fetchone()[0]
+
+    def get(self, filepath):
+        """
+        Returns the indexed metadata of a file.
+
+        Parameters
+        ----------
+        filepath : str
+            Path of the file.
+
+        Returns
+        -------
+        MetaData or None
+            Metadata, or None if the file is not indexed.
+
+        """
+        row = self._connection.execute("SELECT _tags FROM files WHERE _filepath = ?",
+                                       (os.path.abspath(filepath),)).fetchone()
+        if row is None:
+            return None
+
+        return _restore_metadata(MetaData, self._schema, json.loads(row[0]))
+
+    def close(self):
+        """ Closes the database connection. """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, filepath):
+        row = self._connection.execute("SELECT 1 FROM files WHERE _filepath = ?", (os.path.abspath(filepath),))
+        return row.fetchone() is not None
+
+    def __len__(self):
+        return self.count()
+
+    def __repr__(self):
+        return "MetaDataIndex('{}', {} files)".format(self.db_filepath, len(self))
+
+
+def _read_file(item):
+    """ tuple : Reads the tags of a file, returning its path, signature, tags (without fingerprint) and an error. """
+    filepath, file_sig = item
+    try:
+        tags = read_tags(filepath)
+    except (IOError, ValueError, ImportError) as err:  # e.g. corrupt files or NetCDF files without netCDF4
+        return filepath, file_sig, None, "{}: {}".format(type(err).__name__, err)
+    tags.pop(FINGERPRINT_TAG, None)
+
+    return filepath, file_sig, tags, None
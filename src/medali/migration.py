@@ -0,0 +1,301 @@
+""" Migration of metadata between versions of reference metadata, e.g. from "V1M1" to "V1M2". """
+
+from array import array
+
+from .schema import Schema
+from .schema import intern_schema
+from .config import config_registry
+
+
+def _to_schema(ref_metadata):
+    """ Schema : Compiles reference metadata if it is not a `Schema` already and checks that data types are given. """
+    schema = ref_metadata if isinstance(ref_metadata, Schema) else intern_schema(ref_metadata)
+    if not schema.strict:
+        err_msg = "A migration requires reference metadata with data types."
+        raise ValueError(err_msg)
+
+    return schema
+
+
+class SchemaDiff:
+    """
+    Differences between two versions of reference metadata, i.e. added and removed attributes, and attributes
+    whose data type or expected values changed.
+
+    """
+    def __init__(self, source, target, renames=None):
+        """
+        Constructor of `SchemaDiff`.
+
+        Parameters
+        ----------
+        source : dict or Schema
+            Reference metadata of the old version.
+        target : dict or Schema
+            Reference metadata of the new version.
+        renames : dict, optional
+            Maps attributes of the old version to their new name. Renamed attributes are neither reported as added
+            nor as removed.
+
+        """
+        self.source = _to_schema(source)
+        self.target = _to_schema(target)
+        self.renames = dict(renames or {})
+        for old_name, new_name in self.renames.items():
+            if old_name not in self.source:
+                err_msg = "Renamed attribute '{}' is not given in the source reference metadata.".format(old_name)
+                raise KeyError(err_msg)
+            if new_name not in self.target:
+                err_msg = "Renamed attribute '{}' is not given in the target reference metadata.".format(new_name)
+                raise KeyError(err_msg)
+
+        sources = self.sources
+        self.added = tuple(name for name in self.target.names if sources[name] is None)
+        kept_names = set(sources.values())
+        self.removed = tuple(name for name in self.source.names if name not in kept_names)
+        self.dtype_changes = {}
+        self.expected_changes = {}
+        for name in self.target.names:
+            if sources[name] is None:
+                continue
+            old_attribute, new_attribute = self.source[sources[name]], self.target[name]
+            if old_attribute.dtype != new_attribute.dtype:
+                self.dtype_changes[name] = (old_attribute.dtype, new_attribute.dtype)
+            if old_attribute.expected != new_attribute.expected:
+                self.expected_changes[name] = (old_attribute.expected, new_attribute.expected)
+
+    @classmethod
+    def from_product_versions(cls, worker_name, source_version_id, target_version_id, var_name=None, renames=None):
+        """
+        Creates a `SchemaDiff` instance from two metadata versions of a product.
+
+        Parameters
+        ----------
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        source_version_id : str
+            Old metadata version.
+        target_version_id : str
+            New metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+        renames : dict, optional
+            Maps attributes of the old version to their new name.
+
+        Returns
+        -------
+        SchemaDiff
+
+        """
+        source = config_registry.get_product(worker_name, source_version_id, var_name=var_name)
+        target = config_registry.get_product(worker_name, target_version_id, var_name=var_name)
+        return cls(source, target, renames=renames)
+
+    @property
+    def sources(self):
+        """ dict : Maps each attribute of the new version to the one of the old version (or None if it is new). """
+        renamed_from = {new_name: old_name for old_name, new_name in self.renames.items()}
+        sources = {}
+        for name in self.target.names:
+            if name in renamed_from:
+                sources[name] = renamed_from[name]
+            elif name in self.source and name not in self.renames:
+                sources[name] = name
+            else:
+                sources[name] = None
+
+        return sources
+
+    def __bool__(self):
+        """ bool : True if the two versions differ. """
+        return bool(self.added or self.removed or self.renames or self.dtype_changes or self.expected_changes)
+
+    def __repr__(self):
+        return "SchemaDiff(added={}, removed={}, renamed={}, dtype_changes={}, expected_changes={})".format(
+            list(self.added), list(self.removed), self.renames, self.dtype_changes, self.expected_changes)
+
+
+def _compile_recoder(source_attribute, target_attribute):
+    """ Creates a function re-encoding a value of the old data type to the new one. """
+    decode, convert = source_attribute.decode, target_attribute.convert
+
+    def recode(enc_value):
+        try:
+            dec_value = decode(enc_value)
+            if dec_value is None or dec_value == 'null':
+                return enc_value
+            return convert(dec_value)[0]
+        except ValueError:  # values which can not be converted are kept and reported by the target validation
+            return enc_value
+
+    return recode
+
+
+class Migration:
+    """
+    Converts metadata from one version of reference metadata to another. The migration plan, i.e. which
+    attribute is copied, renamed, re-encoded, set to a default value or dropped, is compiled once and then
+    applied to single records or whole `MetaDataTable` instances.
+
+    """
+    def __init__(self, source, target, renames=None, defaults=None):
+        """
+        Constructor of `Migration`.
+
+        Parameters
+        ----------
+        source : dict or Schema
+            Reference metadata of the old version.
+        target : dict or Schema
+            Reference metadata of the new version.
+        renames : dict, optional
+            Maps attributes of the old version to their new name.
+        defaults : dict, optional
+            Decoded or encoded values of new attributes, which are also used if an attribute is missing or 'null'
+            in a record. Attributes without default value are set to 'null'.
+
+        """
+        self.diff = SchemaDiff(source, target, renames=renames)
+        defaults = defaults or {}
+        for name in defaults:
+            if name not in self.target:
+                err_msg = "Attribute '{}' is not given in the target reference metadata.".format(name)
+                raise KeyError(err_msg)
+
+        self._steps = []
+        for name, source_name in self.diff.sources.items():
+            target_attribute = self.target[name]
+            default = target_attribute.encode(defaults[name]) if name in defaults else 'null'
+            if source_name is None:
+                self._steps.append((name, None, None, None, default))
+                continue
+            source_attribute = self.source[source_name]
+            recode = None if source_attribute.dtype == target_attribute.dtype else \
+                _compile_recoder(source_attribute, target_attribute)
+            self._steps.append((name, source_name, source_attribute.encode, recode, default))
+
+    @classmethod
+    def from_product_versions(cls, worker_name, source_version_id, target_version_id, var_name=None, renames=None,
+                              defaults=None):
+        """
+        Creates a `Migration` instance between two metadata versions of a product.
+
+        Parameters
+        ----------
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        source_version_id : str
+            Old metadata version.
+        target_version_id : str
+            New metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+        renames : dict, optional
+            Maps attributes of the old version to their new name.
+        defaults : dict, optional
+            Decoded or encoded values of new attributes.
+
+        Returns
+        -------
+        Migration
+
+        """
+        source = config_registry.get_product(worker_name, source_version_id, var_name=var_name)
+        target = config_registry.get_product(worker_name, target_version_id, var_name=var_name)
+        return cls(source, target, renames=renames, defaults=defaults)
+
+    @property
+    def source(self):
+        """ Schema : Reference metadata of the old version. """
+        return self.diff.source
+
+    @property
+    def target(self):
+        """ Schema : Reference metadata of the new version. """
+        return self.diff.target
+
+    def apply(self, metadata):
+        """
+        Migrates the metadata of one file. Values which can not be converted to a changed data type are kept as
+        they are and are reported when validating against the new version.
+
+        Parameters
+        ----------
+        metadata : dict or MetaData
+            Dictionary containing metadata attributes and decoded or encoded values of the old version.
+
+        Returns
+        -------
+        dict
+            Dictionary containing metadata attributes and encoded values of the new version.
+
+        """
+        tags = metadata.to_tags() if hasattr(metadata, 'to_tags') else metadata
+        migrated = {}
+        for name, source_name, encode, recode, default in self._steps:
+            value = tags.get(source_name, 'null') if source_name is not None else 'null'
+            if value == 'null':
+                migrated[name] = default
+                continue
+            if not isinstance(value, str):
+                value = encode(value)
+            migrated[name] = value if recode is None else recode(value)
+
+        return migrated
+
+    def apply_many(self, records):
+        """
+        Migrates the metadata of many files.
+
+        Parameters
+        ----------
+        records : iterable of dict or MetaData
+            Dictionaries containing metadata attributes and decoded or encoded values of the old version.
+
+        Yields
+        ------
+        dict
+            Dictionary containing metadata attributes and encoded values of the new version.
+
+        """
+        for record in records:
+            yield self.apply(record)
+
+    def apply_table(self, table):
+        """
+        Migrates all rows of a table at once. Since columns are dictionary-encoded, each distinct value is
+        re-encoded only once and row codes are copied as they are.
+
+        Parameters
+        ----------
+        table : MetaDataTable
+            Table of the old version.
+
+        Returns
+        -------
+        MetaDataTable
+            Table of the new version.
+
+        """
+        from .table import Column, MetaDataTable
+
+        n_rows = len(table)
+        migrated = MetaDataTable(self.target)
+        for name, source_name, _, recode, default in self._steps:
+            attribute = self.target[name]
+            column = table._columns.get(source_name) if source_name is not None else None
+            if column is None:
+                migrated._columns[name] = Column(attribute, [default], array('I', [0]) * n_rows)
+                continue
+            categories = column.categories
+            if recode is not None:
+                categories = [recode(category) for category in categories]
+            if default != 'null':
+                categories = [default if category == 'null' else category for category in categories]
+            migrated._columns[name] = Column(attribute, list(categories), array('I', column.codes))
+        migrated._n_rows = n_rows
+
+        return migrated
+
+    def __repr__(self):
+        return "Migration({!r})".format(self.diff)
@@ -0,0 +1,231 @@
+""" Parallel validation of the metadata of all raster files in a directory tree. """
+
+import os
+from collections import deque
+from collections import namedtuple
+from functools import partial
+
+from .fileio import TIFF_EXTENSIONS
+from .fileio import NETCDF_EXTENSIONS
+from .fileio import read_tags
+from .config import config_registry
+from .schema import FINGERPRINT_TAG
+
+
+ScanResult = namedtuple('ScanResult', ['filepath', 'violations', 'error'])
+ScanResult.__doc__ = """
+Outcome of scanning one file, i.e. the violations of the reference metadata (index being None) or an error
+message if the file could not be read.
+
+"""
+
+
+def iter_files(root_dirpath, extensions=TIFF_EXTENSIONS + NETCDF_EXTENSIONS):
+    """
+    Walks a directory tree in a deterministic order and yields all files with a supported extension.
+
+    Parameters
+    ----------
+    root_dirpath : str
+        Root directory of the archive.
+    extensions : tuple of str, optional
+        File extensions to consider (defaults to GeoTIFF and NetCDF files).
+
+    """
+    for dirpath, dirnames, filenames in os.walk(root_dirpath):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in extensions:
+                yield os.path.join(dirpath, filename)
+
+
+def scan_file(filepath, worker_name, version_id, var_name=None):
+    """
+    Reads the metadata tags of a file and validates them against the reference metadata of a product version.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the raster file.
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    version_id : str
+        Metadata version.
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+
+    Returns
+    -------
+    ScanResult
+
+    """
+    # the schema is resolved by name and cached per worker process, so tasks only carry the product key
+    schema = config_registry.get_product(worker_name, version_id, var_name=var_name)
+    try:
+        tags = read_tags(filepath)
+    except (IOError, ValueError, ImportError) as err:  # e.g. corrupt files or NetCDF files without netCDF4
+        return ScanResult(filepath, [], "{}: {}".format(type(err).__name__, err))
+    tags.pop(FINGERPRINT_TAG, None)
+
+    return ScanResult(filepath, schema.validate(tags), None)
+
+
+def read_checkpoint(checkpoint_filepath):
+    """
+    Reads the paths of all files which have already been scanned.
+
+    Parameters
+    ----------
+    checkpoint_filepath : str
+        Path to the checkpoint file containing one file path per line.
+
+    Returns
+    -------
+    set
+        Paths of scanned files, or an empty set if the checkpoint file does not exist.
+
+    """
+    if not os.path.exists(checkpoint_filepath):
+        return set()
+    with open(checkpoint_filepath) as checkpoint_file:
+        return {line.rstrip('\n') for line in checkpoint_file if line.strip()}
+
+
+def scan(root_dirpath, worker_name, version_id, var_name=None, n_workers=None, use_threads=False,
+         checkpoint_filepath=None, max_pending=None):
+    """
+    Validates the metadata of all files of an archive against a product version. Files are distributed over a
+    pool of processes (or threads) and results are streamed in the order of the directory walk, so memory
+    consumption does not depend on the size of the archive.
+
+    Parameters
+    ----------
+    root_dirpath : str
+        Root directory of the archive.
+    worker_name : str
+        Name of the worker package, e.g. "tempinator", "s1-sigma".
+    version_id : str
+        Metadata version.
+    var_name : str, optional
+        Name of the output variable produced by the worker.
+    n_workers : int, optional
+        Number of worker processes or threads. If it is 0, files are scanned in the calling thread. Defaults to
+        the number of CPUs.
+    use_threads : bool, optional
+        If true, a thread pool is used instead of a process pool (defaults to false).
+    checkpoint_filepath : str, optional
+        Path to a checkpoint file. Files listed there are skipped, so an interrupted scan can be resumed. A file
+        is appended to it once the next result is requested, i.e. each result is processed at least once.
+    max_pending : int, optional
+        Maximum number of files being scanned or waiting to be yielded. Defaults to four times `n_workers`.
+
+    Yields
+    ------
+    ScanResult
+
+    """
+    # fail early if the product version does not exist
+    config_registry.get_product(worker_name, version_id, var_name=var_name)
+    scanned = read_checkpoint(checkpoint_filepath) if checkpoint_filepath is not None else set()
+    filepaths = (filepath for filepath in iter_files(root_dirpath) if filepath not in scanned)
+    scan_func = partial(scan_file, worker_name=worker_name, version_id=version_id, var_name=var_name)
+    n_workers = (os.cpu_count() or 1) if n_workers is None else n_workers
+
+    checkpoint_file = open(checkpoint_filepath, 'a') if checkpoint_filepath is not None else None
+    try:
+        if n_workers == 0:
+            results = map(scan_func, filepaths)
+        else:
+            results = _map_bounded(scan_func, filepaths, n_workers, use_threads, max_pending or 4 * n_workers)
+        for result in results:
+            yield result
+            if checkpoint_file is not None:
+                checkpoint_file.write(result.filepath + '\n')
+                checkpoint_file.flush()
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+
+def _map_bounded(func, items, n_workers, use_threads, max_pending):
+    """ Applies a function in parallel, keeping at most `max_pending` items in flight and preserving order. """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with executor_class(max_workers=n_workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def result_to_dict(result):
+    """ dict : Converts a scan result to a JSON serialisable dictionary. """
+    return {'filepath': result.filepath,
+            'valid': not result.violations and result.error is None,
+            'error': result.error,
+            'violations': [{'attribute': violation.attribute, 'value': violation.value, 'kind': violation.kind,
+                            'message': violation.message} for violation in result.violations]}
+
+
+def write_jsonl(results, filepath):
+    """
+    Writes scan results incrementally to a JSON Lines file, i.e. one JSON object per file.
+    If the file already exists, results are appended.
+
+    Parameters
+    ----------
+    results : iterable of ScanResult
+        Scan results, e.g. returned by `scan`.
+    filepath : str
+        Path to the JSON Lines file.
+
+    Returns
+    -------
+    n_files : int
+        Number of scanned files.
+    n_invalid : int
+        Number of files violating the reference metadata or not being readable.
+
+    """
+    with open(filepath, 'a') as jsonl_file:
+        return dump_jsonl(results, jsonl_file)
+
+
+def dump_jsonl(results, jsonl_file):
+    """
+    Writes scan results incrementally to an open text file, i.e. one JSON object per line.
+
+    Parameters
+    ----------
+    results : iterable of ScanResult
+        Scan results, e.g. returned by `scan`.
+    jsonl_file : file object
+        Open text file, e.g. `sys.stdout`.
+
+    Returns
+    -------
+    n_files : int
+        Number of scanned files.
+    n_invalid : int
+        Number of files violating the reference metadata or not being readable.
+
+    """
+    import json
+
+    n_files, n_invalid = 0, 0
+    for result in results:
+        entry = result_to_dict(result)
+        jsonl_file.write(json.dumps(entry, default=str) + '\n')
+        jsonl_file.flush()
+        n_files += 1
+        n_invalid += not entry['valid']
+
+    return n_files, n_invalid
@@ -0,0 +1,896 @@
+""" Compiled reference metadata schemas. """
+
+import sys
+import numbers
+import datetime
+import _thread
+import functools
+from types import MappingProxyType
+from collections import namedtuple
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from . import stats
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FINGERPRINT_TAG = "medali_fingerprint"  # tag storing the content fingerprint of the reference metadata
+INTERN_MAXSIZE = 1024  # maximum number of schemas kept in the process-wide intern table
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)  # Python >= 3.7
+
+Violation = namedtuple('Violation', ['index', 'attribute', 'value', 'kind', 'message'])
+Violation.__doc__ = """
+Metadata value violating the reference metadata. `index` refers to the position of a record in a batch (or is None),
+`kind` is one of 'unknown' (attribute), 'dtype' (mismatch), 'expected' (value) or 'missing' (attribute).
+
+"""
+
+
+class MetaDataValidationError(ValueError):
+    """ Error holding all violations found when validating metadata against reference metadata. """
+
+    def __init__(self, violations):
+        """
+        Constructor of `MetaDataValidationError`.
+
+        Parameters
+        ----------
+        violations : list of Violation
+            All values violating the reference metadata.
+
+        """
+        self.violations = list(violations)
+        err_msgs = ["[{}] {}".format(violation.index, violation.message) if violation.index is not None
+                    else violation.message for violation in self.violations[:10]]
+        if len(self.violations) > 10:
+            err_msgs.append("... ({} violations in total)".format(len(self.violations)))
+        super().__init__("\n".join(err_msgs))
+
+
+class FrozenMapping(Mapping):
+    """
+    Read-only mapping. In contrast to `types.MappingProxyType`, it can be pickled, so `MetaData` instances
+    sharing cached reference metadata can be pickled too.
+
+    """
+    __slots__ = ('_items',)
+
+    def __init__(self, items):
+        """
+        Constructor of `FrozenMapping`.
+
+        Parameters
+        ----------
+        items : dict
+            Dictionary to wrap. It must not be modified afterwards.
+
+        """
+        self._items = items
+
+    def __getitem__(self, key):
+        return self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return "FrozenMapping({!r})".format(self._items)
+
+    def __reduce__(self):
+        return FrozenMapping, (self._items,)
+
+
+def freeze_config(ref_metadata):
+    """
+    Creates a read-only view of parsed reference metadata, i.e. sections are wrapped in
+    `FrozenMapping` instances and lists of expected values are converted to tuples.
+
+    Parameters
+    ----------
+    ref_metadata : dict
+        Parsed metadata config as returned by `read_config`.
+
+    Returns
+    -------
+    FrozenMapping
+        Read-only reference metadata.
+
+    """
+    frozen = {}
+    for section, items in ref_metadata.items():
+        frozen[section] = FrozenMapping({item: tuple(value) if isinstance(value, (list, tuple)) else value
+                                         for item, value in items.items()})
+
+    return FrozenMapping(frozen)
+
+
+def thaw_config(ref_metadata):
+    """
+    Converts frozen reference metadata back to plain dictionaries and lists, e.g. for serialisation.
+
+    Parameters
+    ----------
+    ref_metadata : FrozenMapping
+        Read-only reference metadata.
+
+    Returns
+    -------
+    dict
+        Reference metadata as nested dictionaries.
+
+    """
+    return {section: {item: list(value) if isinstance(value, tuple) else value for item, value in items.items()}
+            for section, items in ref_metadata.items()}
+
+
+def _canonical_key(ref_metadata):
+    """
+    Creates a hashable representation of the content of reference metadata. Empty sections are skipped and all
+    sections except "Metadata" (whose order defines the attribute positions) are sorted.
+
+    Parameters
+    ----------
+    ref_metadata : dict or MappingProxyType
+        Parsed or frozen reference metadata.
+
+    Returns
+    -------
+    tuple
+        Nested tuples of sections, attributes and values.
+
+    """
+    key = []
+    for section in sorted(ref_metadata):
+        items = ref_metadata[section]
+        if not items:
+            continue
+        items = items.items() if section == 'Metadata' else sorted(items.items())
+        key.append((section, tuple((item, tuple(value) if isinstance(value, (list, tuple)) else value)
+                                   for item, value in items)))
+
+    return tuple(key)
+
+
+def _fingerprint_key(key):
+    """ str : Hexadecimal digest of a canonical key, which is stable across processes and Python versions. """
+    from hashlib import blake2b
+
+    return blake2b(repr(key).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def config_fingerprint(ref_metadata):
+    """
+    Computes the content fingerprint of reference metadata without compiling it. It equals the `fingerprint` of
+    a `Schema` created from the same reference metadata.
+
+    Parameters
+    ----------
+    ref_metadata : dict
+        Parsed metadata config as returned by `read_config`.
+
+    Returns
+    -------
+    str
+        16 hexadecimal digits.
+
+    """
+    return _fingerprint_key(_canonical_key(ref_metadata))
+
+
+_interned = OrderedDict()  # canonical key -> Schema
+_intern_lock = _thread.allocate_lock()
+
+
+def intern_schema(ref_metadata, name=None, source=None):
+    """
+    Returns the schema of the process-wide intern table having the same content as the given reference metadata,
+    so identical reference metadata shares one compiled schema. The least recently used schema is dropped from
+    the table once it holds `INTERN_MAXSIZE` schemas.
+
+    Parameters
+    ----------
+    ref_metadata : dict or Schema
+        Reference metadata. A `Schema` is added to the table if no schema with the same content is known.
+    name : str, optional
+        Name of the schema if it has to be compiled (see `Schema`). A known schema keeps its name.
+    source : tuple, optional
+        Origin of the reference metadata (see `Schema`). A known schema takes it over unless it refers to a
+        shipped product, so pickles refer to an origin which existed most recently.
+
+    Returns
+    -------
+    Schema
+
+    """
+    is_schema = isinstance(ref_metadata, Schema)
+    key = ref_metadata._key if is_schema else _canonical_key(ref_metadata)
+    with _intern_lock:
+        schema = _interned.get(key)
+        if schema is not None:
+            _interned.move_to_end(key)
+            _adopt_source(schema, source)
+            return schema
+
+    schema = ref_metadata if is_schema else Schema(ref_metadata, name=name, source=source)
+    with _intern_lock:
+        schema = _interned.setdefault(key, schema)
+        _adopt_source(schema, source)
+        if len(_interned) > INTERN_MAXSIZE:
+            _interned.popitem(last=False)
+
+    return schema
+
+
+def _adopt_source(schema, source):
+    """ Sets the origin of an interned schema, preferring shipped products over config files. """
+    if source is not None and (schema.source is None or schema.source[0] != 'product'):
+        schema.source = source
+
+
+def interned_schemas():
+    """ list : All schemas of the process-wide intern table. """
+    with _intern_lock:
+        return list(_interned.values())
+
+
+def clear_interned_schemas():
+    """ Removes all schemas from the process-wide intern table. """
+    with _intern_lock:
+        _interned.clear()
+
+
+def _identity(value):
+    return value
+
+
+def _decode_boolean(value):
+    return value == 'True'
+
+
+def parse_datetime(value):
+    """
+    Decodes a datetime string with the fixed layout "%Y-%m-%d %H:%M:%S". Strings matching the separators of this
+    layout are converted with `datetime.datetime.fromisoformat`, all other strings (and the ones rejected by it)
+    are handed over to `datetime.datetime.strptime` to get identical results and errors.
+
+    Parameters
+    ----------
+    value : str
+        Encoded datetime.
+
+    Returns
+    -------
+    datetime.datetime
+        Decoded datetime.
+
+    """
+    if _fromisoformat is not None and len(value) == 19 and value[10] == ' ' and value[4] == '-' \
+            and value[7] == '-' and value[13] == ':' and value[16] == ':' and value.isascii():
+        try:
+            return _fromisoformat(value)
+        except ValueError:
+            pass
+
+    return datetime.datetime.strptime(value, DATETIME_FORMAT)
+
+
+def format_datetime(value):
+    """
+    Encodes a datetime to a string with the fixed layout "%Y-%m-%d %H:%M:%S".
+
+    Parameters
+    ----------
+    value : datetime.datetime
+        Decoded datetime.
+
+    Returns
+    -------
+    str
+        Encoded datetime.
+
+    """
+    if value.year < 1000:  # the padding of small years depends on the platform's strftime
+        return value.strftime(DATETIME_FORMAT)
+    return "%04d-%02d-%02d %02d:%02d:%02d" % (value.year, value.month, value.day,
+                                              value.hour, value.minute, value.second)
+
+
+_datetime_decoder = parse_datetime
+
+
+def set_datetime_cache_size(maxsize):
+    """
+    Enables or disables memoization of decoded datetime strings, which pays off if many metadata instances share
+    the same timestamps. The cache is disabled by default.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        Maximum number of memoized datetime strings. 0 or None disables the cache.
+
+    """
+    global _datetime_decoder
+    _datetime_decoder = functools.lru_cache(maxsize=maxsize)(parse_datetime) if maxsize else parse_datetime
+
+
+def _decode_datetime(value):
+    return _datetime_decoder(value)
+
+
+def _is_boolean(value):
+    return isinstance(value, bool)
+
+
+def _is_integer(value):
+    return isinstance(value, int)
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Number)
+
+
+def _is_datetime(value):
+    return isinstance(value, datetime.datetime)
+
+
+def _is_canonical_boolean(value):
+    return type(value) is bool
+
+
+def _is_canonical_integer(value):
+    return type(value) is int
+
+
+def _is_canonical_number(value):
+    return type(value) is float
+
+
+def _is_canonical_datetime(value):  # years below 1000 are not zero-padded and can not be decoded again
+    return type(value) is datetime.datetime and value.microsecond == 0 and value.tzinfo is None and value.year >= 1000
+
+
+def _is_never_canonical(value):
+    return False
+
+
+# data type -> (decoder of non-special strings, type check of non-string values, encoder of non-string values,
+#               check if a non-string value equals its decoded encoding, i.e. if decoding can be skipped)
+_CODECS = {'boolean': (_decode_boolean, _is_boolean, str, _is_canonical_boolean),
+           'integer': (int, _is_integer, str, _is_canonical_integer),
+           'number': (float, _is_number, str, _is_canonical_number),
+           'datetime': (_decode_datetime, _is_datetime, format_datetime, _is_canonical_datetime)}
+_STRING_CODEC = (_identity, None, str, _is_never_canonical)
+
+
+# All compiled codecs report their calls to `stats` while instrumentation is enabled, which they check via the
+# closure cell `switch` (faster than a module attribute). They are called again with `instrumented=False` to do
+# the actual work, so schemas shared among threads are never modified and codecs calling each other (e.g. the
+# decoder called by the converter) are recorded as well.
+
+def _compile_identity(event, label):
+    """ Creates a codec returning the given value, e.g. to decode values of attributes without data type. """
+    switch = stats._switch
+
+    def identity(value, instrumented=True):
+        if switch[0] and instrumented:
+            return stats.call(identity, value, event, *label)
+        return value
+
+    return identity
+
+
+def _compile_convert_identity(label):
+    """ Creates a converter returning the given value as encoded and decoded value. """
+    switch = stats._switch
+
+    def convert(value, instrumented=True):
+        if switch[0] and instrumented:
+            return stats.call(convert, value, 'convert', *label)
+        return value, value
+
+    return convert
+
+
+def _compile_decoder(decode_value, label):
+    """ Creates a decoder handling the special values 'none' and 'null'. """
+    switch = stats._switch
+
+    def decode(value, instrumented=True):
+        if switch[0] and instrumented:
+            return stats.call(decode, value, 'decode', *label)
+        if value == 'none':
+            return None
+        elif value == 'null':
+            return 'null'
+        return decode_value(value)
+
+    return decode
+
+
+def _compile_encoder(name, dtype, decode, check_type, encode_value, label):
+    """ Creates an encoder converting a value to a string after checking its data type. """
+    switch = stats._switch
+    err_msg = "Metadata value for attribute '{}' has to be '{}'.".format(name, dtype)
+
+    def encode(value, instrumented=True):
+        if switch[0] and instrumented:
+            return stats.call(encode, value, 'encode', *label)
+        if value is None:
+            return 'none'
+        elif isinstance(value, str):  # nothing to encode, but check if the value is convertable
+            try:
+                decode(value)
+            except Exception:
+                raise ValueError(err_msg)
+            return value
+        elif check_type is not None and not check_type(value):
+            raise ValueError(err_msg)
+        return encode_value(value)
+
+    return encode
+
+
+def _compile_converter(name, dtype, decode, check_type, encode_value, is_canonical, label):
+    """ Creates a function validating a value and returning its encoded and decoded representation in one pass. """
+    switch = stats._switch
+    err_msg = "Metadata value for attribute '{}' has to be '{}'.".format(name, dtype)
+
+    def convert(value, instrumented=True):
+        if switch[0] and instrumented:
+            return stats.call(convert, value, 'convert', *label)
+        if value is None:
+            return 'none', None
+        elif isinstance(value, str):
+            try:
+                return value, decode(value)
+            except Exception:
+                raise ValueError(err_msg)
+        elif check_type is not None and not check_type(value):
+            raise ValueError(err_msg)
+        enc_value = encode_value(value)
+        if is_canonical(value):
+            return enc_value, value
+        return enc_value, decode(enc_value)  # errors of non-decodable encodings are passed on as they are
+
+    return convert
+
+
+def _compile_validator(exp_values, label):
+    """ Creates a function checking a decoded value against the expected values. """
+    switch = stats._switch
+    if not exp_values:
+        def is_expected(value, instrumented=True):
+            if switch[0] and instrumented:
+                return stats.call(is_expected, value, 'is_expected', *label)
+            return True
+    elif isinstance(exp_values, (list, tuple)):
+        exp_value_set = frozenset(exp_values)
+
+        def is_expected(value, instrumented=True):
+            if switch[0] and instrumented:
+                return stats.call(is_expected, value, 'is_expected', *label)
+            if value in (None, 'null'):
+                return True
+            try:
+                return value in exp_value_set
+            except TypeError:  # unhashable values can only be given without reference data types
+                return value in exp_values
+    elif exp_values.startswith('pattern'):
+        import re
+
+        pattern = re.compile(exp_values.replace(', ', ',').split(',')[1])
+
+        def is_expected(value, instrumented=True):
+            if switch[0] and instrumented:
+                return stats.call(is_expected, value, 'is_expected', *label)
+            return value in (None, 'null') or pattern.search(str(value)) is not None
+    else:
+        return _compile_validator(None, label)
+
+    return is_expected
+
+
+class Attribute:
+    """
+    Compiled definition of a single metadata attribute. Besides `encode` and `decode`, `convert` validates a
+    value and returns its encoded and decoded representation at once.
+
+    """
+
+    __slots__ = ('name', 'dtype', 'expected', 'encode', 'decode', 'convert', 'is_expected')
+
+    def __init__(self, name, dtype=None, expected=None, schema_name=None):
+        """
+        Constructor of `Attribute`.
+
+        Parameters
+        ----------
+        name : str
+            Metadata attribute.
+        dtype : str, optional
+            Data type of the metadata attribute. If it is None (default), values are neither encoded nor decoded.
+        expected : str or tuple, optional
+            Expected values, i.e. either a "pattern, <regex>" string or a tuple of allowed values.
+        schema_name : str, optional
+            Name of the schema the attribute belongs to, under which codec calls are recorded by `stats`.
+
+        """
+        self.name = name
+        self.dtype = dtype
+        self.expected = expected
+        label = (schema_name, name)
+        if dtype is None:
+            self.encode = _compile_identity('encode', label)
+            self.decode = _compile_identity('decode', label)
+            self.convert = _compile_convert_identity(label)
+        else:
+            decode_value, check_type, encode_value, is_canonical = _CODECS.get(dtype, _STRING_CODEC) \
+                if isinstance(dtype, str) else _STRING_CODEC
+            self.decode = _compile_decoder(decode_value, label)
+            self.encode = _compile_encoder(name, dtype, self.decode, check_type, encode_value, label)
+            self.convert = _compile_converter(name, dtype, self.decode, check_type, encode_value, is_canonical,
+                                              label)
+        self.is_expected = _compile_validator(expected, label)
+
+    def validate(self, value):
+        """
+        Validates and encodes a value without raising an error.
+
+        Parameters
+        ----------
+        value : any
+            Decoded or encoded metadata value.
+
+        Returns
+        -------
+        tuple
+            Encoded value, decoded value and None if the value is valid, otherwise None, None and a tuple
+            containing the kind of violation ('dtype' or 'expected') and an error message.
+
+        """
+        try:
+            enc_value, dec_value = self.convert(value)
+        except ValueError as err:
+            return None, None, ('dtype', str(err))
+        if not self.is_expected(dec_value):
+            expected = list(self.expected) if isinstance(self.expected, tuple) else self.expected
+            err_msg = "Metadata value '{}' is not in compliance with '{}'".format(value, expected)
+            return None, None, ('expected', err_msg)
+
+        return enc_value, dec_value, None
+
+    def check(self, value):
+        """
+        Checks if a value can be encoded and is in compliance with the expected values.
+
+        Parameters
+        ----------
+        value : any
+            Decoded or encoded metadata value.
+
+        Returns
+        -------
+        tuple or None
+            Kind of violation ('dtype' or 'expected') and error message, or None if the value is valid.
+
+        """
+        return self.validate(value)[2]
+
+    def __repr__(self):
+        return "Attribute({!r}, dtype={!r}, expected={!r})".format(self.name, self.dtype, self.expected)
+
+
+class Schema:
+    """
+    Immutable, compiled representation of reference metadata. It holds one `Attribute` per metadata attribute
+    with precompiled codecs and expected value checks and is meant to be shared among `MetaData` instances.
+    Schemas compare equal if their reference metadata has the same content, which is identified by a stable
+    `fingerprint`.
+
+    """
+    def __init__(self, ref_metadata=None, name=None, source=None):
+        """
+        Constructor of `Schema`.
+
+        Parameters
+        ----------
+        ref_metadata : dict, optional
+            Dictionary containing expected metadata attributes plus data types
+            under the key "Metadata", and expected metadata values under the key
+            "Expected_value".
+        name : str, optional
+            Name of the schema, e.g. a product key or the path of the config file, used in statistics.
+        source : tuple, optional
+            Origin of the reference metadata, i.e. ('file', <config file path>) or ('product', <worker name>,
+            <version ID>, <variable name>). If given, pickled schemas only contain the origin and are loaded
+            from the config registry of the unpickling process.
+
+        """
+        ref_metadata = {} if ref_metadata is None else ref_metadata
+        self.name = name
+        self.source = source
+        self.parent = None  # full schema if this schema is a projection (see `project`)
+        self._fields = None
+        self._projections = {}
+        self._ref_meta = freeze_config(ref_metadata)
+        self._key = _canonical_key(self._ref_meta)
+        self._hash = hash(self._key)
+        self._fingerprint = None
+        dtypes = self._ref_meta.get('Metadata', {})
+        exp_values = self._ref_meta.get('Expected_value', {})
+        self._strict = bool(dtypes)
+        if self._strict:
+            attributes = {attr: Attribute(attr, dtype, exp_values.get(attr), schema_name=name)
+                          for attr, dtype in dtypes.items()}
+        else:
+            attributes = {attr: Attribute(attr, expected=exp_value, schema_name=name)
+                          for attr, exp_value in exp_values.items()}
+        self._attributes = MappingProxyType(attributes)
+        self._names = tuple(sys.intern(name) for name in dtypes.keys())
+        self._positions = MappingProxyType({name: position for position, name in enumerate(self._names)})
+        self._ordered_attributes = tuple(attributes[name] for name in self._names)
+        self._default_attribute = None if self._strict else Attribute(None, schema_name=name)
+
+    @property
+    def ref_meta(self):
+        """ FrozenMapping : Read-only reference metadata. """
+        return self._ref_meta
+
+    @property
+    def fingerprint(self):
+        """ str : Content fingerprint (16 hexadecimal digits), which is independent of the name and origin. """
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint_key(self._key)
+        return self._fingerprint
+
+    @property
+    def attributes(self):
+        """ MappingProxyType : Maps metadata attributes to their compiled definition. """
+        return self._attributes
+
+    @property
+    def names(self):
+        """ tuple : Metadata attributes defined in the reference metadata. """
+        return self._names
+
+    @property
+    def positions(self):
+        """ MappingProxyType : Maps metadata attributes to their position in the reference metadata. """
+        return self._positions
+
+    @property
+    def ordered_attributes(self):
+        """ tuple : Compiled metadata attributes in the order of the reference metadata. """
+        return self._ordered_attributes
+
+    @property
+    def strict(self):
+        """ bool : True if data types are defined, i.e. only attributes in the reference metadata are allowed. """
+        return self._strict
+
+    def convert(self, metadata, index=None, memos=None):
+        """
+        Validates and encodes all values of a metadata dictionary without stopping at the first violation.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded or encoded values.
+        index : int, optional
+            Position of the metadata dictionary in a batch, which is attached to the violations.
+        memos : dict, optional
+            Conversion results per attribute and value, which are reused and extended. Sharing it among many
+            calls validates each distinct value only once.
+
+        Returns
+        -------
+        meta : dict
+            Dictionary containing metadata attributes and encoded values of all valid values.
+        decoded : dict
+            Dictionary containing metadata attributes and decoded values of all valid values.
+        violations : list of Violation
+            All values violating the reference metadata.
+
+        """
+        memos = {} if memos is None else memos
+        meta, decoded, violations = {}, {}, []
+        for attr, value in metadata.items():
+            try:
+                attribute = self[attr]
+            except KeyError as err:
+                violations.append(Violation(index, attr, value, 'unknown', err.args[0]))
+                continue
+            memo = memos.setdefault(attr, {})
+            try:
+                key = (type(value), value)
+                result = memo.get(key)
+            except TypeError:  # unhashable values are not memoized
+                key, result = None, None
+            if result is None:
+                result = attribute.validate(value)
+                if key is not None:
+                    memo[key] = result
+            enc_value, dec_value, issue = result
+            if issue is None:
+                meta[attr] = enc_value
+                decoded[attr] = dec_value
+            else:
+                violations.append(Violation(index, attr, value, *issue))
+
+        return meta, decoded, violations
+
+    def validate(self, metadata, index=None):
+        """
+        Collects all violations of a metadata dictionary in one pass, i.e. unknown attributes, data type mismatches,
+        values not being in compliance with the expected values, and missing attributes.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded or encoded values.
+        index : int, optional
+            Position of the metadata dictionary in a batch, which is attached to the violations.
+
+        Returns
+        -------
+        list of Violation
+            All violations of the reference metadata.
+
+        """
+        violations = self.convert(metadata, index=index)[2]
+        violations.extend(self.missing(metadata, index=index))
+
+        return violations
+
+    def missing(self, metadata, index=None):
+        """
+        Collects the metadata attributes of the reference metadata which are not given.
+
+        Parameters
+        ----------
+        metadata : dict
+            Dictionary containing metadata attributes and decoded or encoded values.
+        index : int, optional
+            Position of the metadata dictionary in a batch, which is attached to the violations.
+
+        Returns
+        -------
+        list of Violation
+            One 'missing' violation per metadata attribute not given.
+
+        """
+        return [Violation(index, name, None, 'missing', "Metadata attribute '{}' is missing.".format(name))
+                for name in self._names if name not in metadata]
+
+    def project(self, fields):
+        """
+        Creates a schema containing only a subset of the metadata attributes, e.g. for reading a few attributes of
+        many files. Projections are cached per schema and keep a reference to the full schema (`parent`).
+
+        Parameters
+        ----------
+        fields : iterable of str
+            Metadata attributes to keep.
+
+        Returns
+        -------
+        Schema
+            Compiled reference metadata of the given attributes, in the order of this schema.
+
+        """
+        fields = tuple(fields)
+        projection = self._projections.get(fields)
+        if projection is not None:
+            return projection
+        if not fields:
+            err_msg = "At least one metadata attribute is required for a projection."
+            raise ValueError(err_msg)
+        if self._strict:
+            for name in fields:
+                if name not in self._attributes:
+                    err_msg = "Attribute '{}' is not given in the reference metadata.".format(name)
+                    raise KeyError(err_msg)
+
+        field_set = set(fields)
+        ref_metadata = {section: {item: value for item, value in items.items() if item in field_set}
+                        for section, items in self._ref_meta.items()}
+        projection = Schema(ref_metadata, name=self.name)
+        projection.parent = self if self.parent is None else self.parent
+        projection._fields = fields
+
+        return self._projections.setdefault(fields, projection)
+
+    def __getitem__(self, name):
+        """
+        Returns the compiled definition of a metadata attribute.
+
+        Parameters
+        ----------
+        name : str
+            Metadata attribute.
+
+        Returns
+        -------
+        Attribute
+            Compiled metadata attribute.
+
+        """
+        attribute = self._attributes.get(name)
+        if attribute is None:
+            if self._strict:
+                err_msg = "Attribute '{}' is not given in the reference metadata.".format(name)
+                raise KeyError(err_msg)
+            attribute = self._default_attribute
+
+        return attribute
+
+    def __contains__(self, name):
+        """ bool : True if the metadata attribute is defined in the reference metadata. """
+        return name in self._attributes
+
+    def __iter__(self):
+        """ Iterates over the metadata attributes defined in the reference metadata. """
+        return iter(self._names)
+
+    def __len__(self):
+        """ int : Number of metadata attributes defined in the reference metadata. """
+        return len(self._names)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Schema):
+            return NotImplemented
+        return self._hash == other._hash and self._key == other._key
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        """
+        Pickles the origin and the fingerprint of the schema if the origin is known, otherwise its reference
+        metadata. Projections are pickled as their full schema and the projected attributes.
+
+        """
+        if self.parent is not None:
+            return _project_schema, (self.parent, self._fields)
+        if self.source is not None:
+            return _load_schema, (self.fingerprint,) + tuple(self.source)
+        return Schema, (thaw_config(self._ref_meta), self.name)
+
+    def __repr__(self):
+        return "Schema({})".format(", ".join(self._names))
+
+
+def _project_schema(schema, fields):
+    """ Schema : Projects a schema to the given metadata attributes (see `Schema.project`). """
+    return schema.project(fields)
+
+
+def _load_schema(fingerprint, kind, *args):
+    """
+    Loads a schema from the process-wide config registry given its origin (see `Schema.source`) and checks that
+    its content did not change since pickling. If the origin does not exist anymore, e.g. a removed copy of a
+    config file sharing the interned schema, a known schema with the same fingerprint is used instead.
+
+    """
+    from .config import config_registry
+
+    try:
+        if kind == 'file':
+            schema = config_registry.get(*args)
+        else:
+            worker_name, version_id, var_name = args
+            schema = config_registry.get_product(worker_name, version_id, var_name=var_name)
+    except (IOError, KeyError):
+        schema = config_registry.get_by_fingerprint(fingerprint)
+        if schema is None:
+            raise
+    if schema.fingerprint != fingerprint:
+        err_msg = "Reference metadata of {} '{}' changed since pickling (fingerprint {} instead of {}).".format(
+            kind, schema.name, schema.fingerprint, fingerprint)
+        raise ValueError(err_msg)
+
+    return schema
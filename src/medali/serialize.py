@@ -0,0 +1,97 @@
+"""
+Compact serialisation of many `MetaData` instances, e.g. for passing them between processes or caching them.
+Single instances can be pickled directly (see `MetaData.__reduce__`).
+
+"""
+
+import pickle
+from array import array
+
+from .core import _restore_metadata
+
+
+FORMAT_VERSION = 1
+
+
+def _smallest_typecode(n_values):
+    """ str : Smallest unsigned integer array type code being able to index the given number of values. """
+    for typecode in ('B', 'H', 'I', 'L'):
+        if n_values <= 2 ** (8 * array(typecode).itemsize):
+            return typecode
+
+    return 'Q'
+
+
+def dumps_batch(metadata, protocol=pickle.HIGHEST_PROTOCOL):
+    """
+    Serialises many `MetaData` instances. Each schema is stored once, and the values of each attribute are
+    dictionary-encoded, i.e. every distinct encoded value is stored once along with small integer codes per
+    instance.
+
+    Parameters
+    ----------
+    metadata : iterable of MetaData
+        Metadata instances.
+    protocol : int, optional
+        Pickle protocol (defaults to the highest one).
+
+    Returns
+    -------
+    bytes
+        Serialised metadata instances.
+
+    """
+    groups = {}  # schema id -> [schema, class, row indices, value rows, extras, dirty attributes]
+    n_instances = 0
+    for index, entry in enumerate(metadata):
+        n_instances += 1
+        group = groups.get(id(entry._schema))
+        if group is None:
+            group = groups[id(entry._schema)] = [entry._schema, type(entry), [], [], {}, {}]
+        group[2].append(index)
+        group[3].append(entry._values)
+        if entry._extra:
+            group[4][len(group[2]) - 1] = entry._extra
+        if entry._dirty:
+            group[5][len(group[2]) - 1] = tuple(entry._dirty)
+
+    packed_groups = []
+    for schema, cls, indices, rows, extras, dirty in groups.values():
+        columns = []
+        for column in zip(*rows):
+            lookup = {}
+            codes = [lookup.setdefault(value, len(lookup)) for value in column]
+            columns.append((list(lookup), array(_smallest_typecode(len(lookup)), codes)))
+        packed_groups.append((schema, cls, array(_smallest_typecode(n_instances), indices), columns, extras, dirty))
+
+    return pickle.dumps((FORMAT_VERSION, n_instances, packed_groups), protocol=protocol)
+
+
+def loads_batch(data):
+    """
+    Deserialises many `MetaData` instances serialised with `dumps_batch`.
+
+    Parameters
+    ----------
+    data : bytes
+        Serialised metadata instances.
+
+    Returns
+    -------
+    list of MetaData
+        Metadata instances in their original order.
+
+    """
+    format_version, n_instances, packed_groups = pickle.loads(data)
+    if format_version != FORMAT_VERSION:
+        err_msg = "Serialisation format version {} is not supported.".format(format_version)
+        raise ValueError(err_msg)
+
+    instances = [None] * n_instances
+    for schema, cls, indices, columns, extras, dirty in packed_groups:
+        decoded_columns = [list(map(categories.__getitem__, codes)) for categories, codes in columns]
+        rows = zip(*decoded_columns) if decoded_columns else [()] * len(indices)
+        for row_index, (index, values) in enumerate(zip(indices, rows)):
+            instances[index] = _restore_metadata(cls, schema, values, extras.get(row_index), dirty.get(row_index))
+
+    return instances
@@ -0,0 +1,181 @@
+"""
+Opt-in instrumentation counting and timing config parsing and the codecs of metadata attributes, e.g.:
+
+    from medali import stats
+
+    stats.enable()
+    ...  # tag files
+    for record in stats.snapshot():
+        print(record.event, record.schema, record.attribute, record.count, record.total_time)
+
+Instrumentation is disabled by default. The compiled codecs of all schemas check a flag and report their calls
+here while it is enabled, so it applies to all schemas at once (including the ones created before) and costs a
+single flag check per call otherwise. Schemas are never modified, so enabling and disabling is safe while schemas
+are in use in other threads.
+
+"""
+
+import time
+import _thread
+from collections import namedtuple
+
+
+EVENTS = ('read_config', 'encode', 'decode', 'convert', 'is_expected')
+
+StatsRecord = namedtuple('StatsRecord', ['event', 'schema', 'attribute', 'count', 'total_time'])
+StatsRecord.__doc__ = """
+Number of calls and accumulated duration (in seconds) of an event per schema (name or config file path) and
+metadata attribute ('read_config' records have no attribute).
+
+"""
+
+_switch = [False]  # enabled flag, held in a list so compiled codecs can check it via a closure cell
+_lock = _thread.allocate_lock()  # avoids importing `threading` at start-up
+_counters = {}  # (event, schema name, attribute) -> [count, total time]
+_callbacks = []
+
+
+def is_enabled():
+    """ bool : True if instrumentation is enabled. """
+    return _switch[0]
+
+
+def enable():
+    """ Enables instrumentation for all schemas. """
+    _switch[0] = True
+
+
+def disable():
+    """ Disables instrumentation. Collected statistics are kept. """
+    _switch[0] = False
+
+
+def reset():
+    """ Removes all collected statistics. """
+    with _lock:
+        _counters.clear()
+
+
+def snapshot():
+    """
+    Returns the collected statistics.
+
+    Returns
+    -------
+    list of StatsRecord
+        Number of calls and accumulated duration per event, schema and metadata attribute.
+
+    """
+    with _lock:
+        items = [(key, tuple(counter)) for key, counter in _counters.items()]
+
+    return [StatsRecord(event, schema_name, attr, count, total_time)
+            for (event, schema_name, attr), (count, total_time) in sorted(items, key=lambda item: str(item[0]))]
+
+
+def add_callback(callback):
+    """
+    Registers a function receiving the statistics when calling `export`, e.g. to feed a metrics pipeline.
+
+    Parameters
+    ----------
+    callback : callable
+        Function taking a list of `StatsRecord` instances.
+
+    """
+    _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    """
+    Unregisters a function registered with `add_callback`.
+
+    Parameters
+    ----------
+    callback : callable
+        Registered function.
+
+    """
+    _callbacks.remove(callback)
+
+
+def export(reset_stats=True):
+    """
+    Passes a snapshot of the collected statistics to all registered callbacks.
+
+    Parameters
+    ----------
+    reset_stats : bool, optional
+        If true (default), the statistics are reset afterwards, so each export contains the increments since
+        the previous one.
+
+    Returns
+    -------
+    list of StatsRecord
+        Exported statistics.
+
+    """
+    records = snapshot()
+    if reset_stats:
+        reset()
+    for callback in list(_callbacks):
+        callback(records)
+
+    return records
+
+
+def record(event, schema_name, attr, duration):
+    """
+    Adds one call of an event to the statistics.
+
+    Parameters
+    ----------
+    event : str
+        Name of the event, e.g. 'read_config'.
+    schema_name : str
+        Name or config file path of the schema.
+    attr : str
+        Metadata attribute, or None.
+    duration : float
+        Duration of the call in seconds.
+
+    """
+    key = (event, schema_name, attr)
+    with _lock:
+        counter = _counters.get(key)
+        if counter is None:
+            _counters[key] = [1, duration]
+        else:
+            counter[0] += 1
+            counter[1] += duration
+
+
+def call(codec, value, event, schema_name, attr):
+    """
+    Calls a compiled codec without instrumentation and records the call. This is the hook used by the codecs of
+    `schema.Attribute` while instrumentation is enabled.
+
+    Parameters
+    ----------
+    codec : callable
+        Compiled codec taking a value and the keyword `instrumented`.
+    value : any
+        Value passed to the codec.
+    event : str
+        Name of the event, e.g. 'decode'.
+    schema_name : str
+        Name or config file path of the schema.
+    attr : str
+        Metadata attribute.
+
+    Returns
+    -------
+    any
+        Return value of the codec.
+
+    """
+    start = time.perf_counter()
+    try:
+        return codec(value, instrumented=False)
+    finally:
+        record(event, schema_name, attr, time.perf_counter() - start)
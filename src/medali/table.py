@@ -0,0 +1,462 @@
+""" Columnar storage, validation and querying of the metadata of many files. """
+
+import operator
+from array import array
+from itertools import compress
+
+from .core import MetaData
+from .schema import Schema
+from .schema import intern_schema
+from .schema import Violation
+from .config import config_registry
+
+
+class Mask:
+    """ Boolean row selection of a `MetaDataTable`, which can be combined with `&`, `|` and `~`. """
+
+    __slots__ = ('_flags',)
+
+    def __init__(self, flags):
+        """
+        Constructor of `Mask`.
+
+        Parameters
+        ----------
+        flags : bytes
+            One byte per row, being 1 if the row is selected and 0 if not.
+
+        """
+        self._flags = bytes(flags)
+
+    def _combine(self, other, operation):
+        if len(self._flags) != len(other._flags):
+            err_msg = "Masks of different lengths ({} and {}) can not be combined.".format(len(self), len(other))
+            raise ValueError(err_msg)
+        n_rows = len(self._flags)
+        value = operation(int.from_bytes(self._flags, 'little'), int.from_bytes(other._flags, 'little'))
+        return Mask(value.to_bytes(n_rows, 'little'))
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __invert__(self):
+        return self._combine(Mask(b'\x01' * len(self._flags)), operator.xor)
+
+    def indices(self):
+        """ list : Indices of the selected rows. """
+        return list(compress(range(len(self._flags)), self._flags))
+
+    def count(self):
+        """ int : Number of selected rows. """
+        return self._flags.count(1)
+
+    def __iter__(self):
+        return (flag == 1 for flag in self._flags)
+
+    def __len__(self):
+        return len(self._flags)
+
+    def __repr__(self):
+        return "Mask({}/{} rows)".format(self.count(), len(self))
+
+
+class Column:
+    """
+    Dictionary-encoded column of one metadata attribute. Each distinct encoded value (category) is stored once
+    and rows refer to it via an integer code, so decoding, validation and comparisons are done per category.
+
+    """
+    def __init__(self, attribute, categories=None, codes=None):
+        """
+        Constructor of `Column`.
+
+        Parameters
+        ----------
+        attribute : Attribute
+            Compiled metadata attribute.
+        categories : list of str, optional
+            Distinct encoded values.
+        codes : array.array, optional
+            Category code of each row.
+
+        """
+        self.attribute = attribute
+        self.categories = [] if categories is None else categories
+        self.codes = array('I') if codes is None else codes
+        self._lookup = {category: code for code, category in enumerate(self.categories)}
+        self._decoded = []
+
+    @property
+    def name(self):
+        """ str : Metadata attribute. """
+        return self.attribute.name
+
+    def append(self, enc_value):
+        """
+        Appends an encoded value to the column.
+
+        Parameters
+        ----------
+        enc_value : str
+            Encoded metadata value.
+
+        """
+        code = self._lookup.get(enc_value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(enc_value)
+            self._lookup[enc_value] = code
+        self.codes.append(code)
+
+    def decoded_categories(self):
+        """ list : Decoded values of all categories, each being decoded once. """
+        decode = self.attribute.decode
+        for category in self.categories[len(self._decoded):]:
+            self._decoded.append(decode(category))
+        return self._decoded
+
+    def take(self, mask):
+        """
+        Selects rows of the column.
+
+        Parameters
+        ----------
+        mask : Mask
+            Row selection.
+
+        Returns
+        -------
+        Column
+            New column containing the selected rows and a copy of the categories.
+
+        """
+        column = Column(self.attribute, list(self.categories), array('I', compress(self.codes, mask._flags)))
+        column._decoded = list(self._decoded)
+        return column
+
+    def to_list(self):
+        """ list : Decoded values of all rows. """
+        return list(map(self.decoded_categories().__getitem__, self.codes))
+
+    def to_tags(self):
+        """ list : Encoded values of all rows. """
+        return list(map(self.categories.__getitem__, self.codes))
+
+    def isin(self, values):
+        """
+        Selects rows whose decoded value is one of the given values.
+
+        Parameters
+        ----------
+        values : iterable
+            Decoded or encoded metadata values.
+
+        Returns
+        -------
+        Mask
+
+        """
+        dec_values = [self.attribute.convert(value)[1] for value in values]
+        return self._select(lambda dec_category: dec_category in dec_values)
+
+    def _select(self, predicate):
+        """ Creates a mask by evaluating the given predicate once per category. """
+        lut = bytes(1 if predicate(dec_category) else 0 for dec_category in self.decoded_categories())
+        return Mask(bytes(map(lut.__getitem__, self.codes)))
+
+    def _compare(self, value, operation):
+        """ Compares the decoded values with a given value, whereas 'none' and 'null' values never match. """
+        dec_value = self.attribute.convert(value)[1]
+
+        def predicate(dec_category):
+            if dec_category is None or dec_category == 'null':
+                return False
+            try:
+                return operation(dec_category, dec_value)
+            except TypeError:
+                return False
+
+        return self._select(predicate)
+
+    def __eq__(self, value):
+        dec_value = self.attribute.convert(value)[1]
+        return self._select(lambda dec_category: dec_category == dec_value)
+
+    def __ne__(self, value):
+        return ~(self == value)
+
+    def __lt__(self, value):
+        return self._compare(value, operator.lt)
+
+    def __le__(self, value):
+        return self._compare(value, operator.le)
+
+    def __gt__(self, value):
+        return self._compare(value, operator.gt)
+
+    def __ge__(self, value):
+        return self._compare(value, operator.ge)
+
+    __hash__ = None
+
+    def __getitem__(self, index):
+        return self.decoded_categories()[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return "Column({!r}, {} rows, {} categories)".format(self.name, len(self), len(self.categories))
+
+
+class MetaDataTable:
+    """
+    Columnar container for the metadata of many files sharing one schema. Every attribute is stored as a
+    dictionary-encoded `Column`, so memory consumption and the costs of validation and filtering scale with
+    the number of distinct values per attribute instead of the number of `MetaData` objects.
+
+    """
+    def __init__(self, ref_metadata, records=None):
+        """
+        Constructor of `MetaDataTable`.
+
+        Parameters
+        ----------
+        ref_metadata : dict or Schema
+            Reference metadata defining the data types of all metadata attributes.
+        records : iterable of dict, optional
+            Dictionaries containing metadata attributes and decoded or encoded values.
+
+        """
+        schema = ref_metadata if isinstance(ref_metadata, Schema) else intern_schema(ref_metadata)
+        if not schema.strict:
+            err_msg = "A metadata table requires reference metadata with data types."
+            raise ValueError(err_msg)
+        self._schema = schema
+        self._columns = {name: Column(schema[name]) for name in schema.names}
+        self._n_rows = 0
+        if records is not None:
+            self.extend(records)
+
+    @classmethod
+    def from_cfg_file(cls, records, cfg_filepath):
+        """
+        Creates a `MetaDataTable` instance from metadata dictionaries and a config file.
+
+        Parameters
+        ----------
+        records : iterable of dict
+            Dictionaries containing metadata attributes and decoded or encoded values.
+        cfg_filepath : str
+            Path to metadata config file.
+
+        Returns
+        -------
+        MetaDataTable
+
+        """
+        return cls(config_registry.get(cfg_filepath), records)
+
+    @classmethod
+    def from_product_version(cls, records, worker_name, version_id, var_name=None):
+        """
+        Creates a `MetaDataTable` instance from metadata dictionaries, a product name and a version ID.
+
+        Parameters
+        ----------
+        records : iterable of dict
+            Dictionaries containing metadata attributes and decoded or encoded values.
+        worker_name : str
+            Name of the worker package, e.g. "tempinator", "s1-sigma".
+        version_id : str
+            Metadata version.
+        var_name : str, optional
+            Name of the output variable produced by the worker.
+
+        Returns
+        -------
+        MetaDataTable
+
+        """
+        return cls(config_registry.get_product(worker_name, version_id, var_name=var_name), records)
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """
+        Creates a `MetaDataTable` instance from `MetaData` instances sharing the same schema.
+
+        Parameters
+        ----------
+        metadata : list of MetaData
+            Metadata instances.
+
+        Returns
+        -------
+        MetaDataTable
+
+        Raises
+        ------
+        ValueError
+            If no metadata instance is given or the instances have different reference metadata (or projections).
+
+        """
+        if not metadata:
+            err_msg = "At least one metadata instance is required to create a table."
+            raise ValueError(err_msg)
+        schema = metadata[0]._schema
+        for i, entry in enumerate(metadata):
+            if entry._schema is not schema and entry._schema != schema:
+                err_msg = "Metadata instance {} has other reference metadata than the first instance.".format(i)
+                raise ValueError(err_msg)
+
+        return cls(schema, (entry.to_tags() for entry in metadata))
+
+    @property
+    def schema(self):
+        """ Schema : Compiled reference metadata shared by all rows. """
+        return self._schema
+
+    @property
+    def columns(self):
+        """ tuple : Metadata attributes of the table. """
+        return tuple(self._columns.keys())
+
+    def append(self, record):
+        """
+        Appends the metadata of one file. Encoded (string) values are stored as they are and are checked by
+        `validate`, other values are encoded right away. Missing attributes are set to 'null'.
+
+        Parameters
+        ----------
+        record : dict
+            Dictionary containing metadata attributes and decoded or encoded values.
+
+        """
+        unknown_attrs = record.keys() - self._columns.keys()
+        if unknown_attrs:
+            err_msg = "Attributes {} are not given in the reference metadata.".format(sorted(unknown_attrs))
+            raise KeyError(err_msg)
+        enc_values = []  # encode all values first, so a failing value does not leave the columns misaligned
+        for name, column in self._columns.items():
+            value = record.get(name, 'null')
+            enc_values.append(value if isinstance(value, str) else column.attribute.encode(value))
+        for column, enc_value in zip(self._columns.values(), enc_values):
+            column.append(enc_value)
+        self._n_rows += 1
+
+    def extend(self, records):
+        """
+        Appends the metadata of many files.
+
+        Parameters
+        ----------
+        records : iterable of dict
+            Dictionaries containing metadata attributes and decoded or encoded values.
+
+        """
+        for record in records:
+            self.append(record)
+
+    def validate(self):
+        """
+        Validates all rows of the table. Each distinct value of a column is checked only once.
+
+        Returns
+        -------
+        list of Violation
+            All values violating the reference metadata, sorted by row index.
+
+        """
+        violations = []
+        for name, column in self._columns.items():
+            issues = {}
+            for code, category in enumerate(column.categories):
+                issue = column.attribute.check(category)
+                if issue is not None:
+                    issues[code] = issue
+            if not issues:
+                continue
+            for index, code in enumerate(column.codes):
+                issue = issues.get(code)
+                if issue is not None:
+                    violations.append(Violation(index, name, column.categories[code], *issue))
+        violations.sort(key=operator.itemgetter(0))
+
+        return violations
+
+    def where(self, **conditions):
+        """
+        Selects all rows whose decoded values equal the given ones, e.g. `table.where(orbit_direction='A')`.
+
+        Parameters
+        ----------
+        **conditions : dict
+            Metadata attributes and decoded or encoded values.
+
+        Returns
+        -------
+        MetaDataTable
+            Table containing the selected rows.
+
+        """
+        mask = Mask(b'\x01' * self._n_rows)
+        for name, value in conditions.items():
+            mask &= self[name] == value
+
+        return self[mask]
+
+    def row(self, index):
+        """
+        Returns the metadata of one file.
+
+        Parameters
+        ----------
+        index : int
+            Row index.
+
+        Returns
+        -------
+        MetaData
+
+        """
+        return MetaData({name: column.categories[column.codes[index]] for name, column in self._columns.items()},
+                        self._schema)
+
+    def iter_tags(self):
+        """ Iterates over all rows returning dictionaries containing encoded values. """
+        names = list(self._columns.keys())
+        for row in zip(*(column.to_tags() for column in self._columns.values())):
+            yield dict(zip(names, row))
+
+    def to_tags(self):
+        """ list : Returns all rows as dictionaries containing encoded values. """
+        return list(self.iter_tags())
+
+    def __getitem__(self, key):
+        """
+        Returns a column if a metadata attribute is given, or a table containing the selected rows if a `Mask`
+        is given.
+
+        """
+        if isinstance(key, Mask):
+            if len(key) != self._n_rows:
+                err_msg = "Mask length ({}) does not match the number of rows ({}).".format(len(key), self._n_rows)
+                raise ValueError(err_msg)
+            table = MetaDataTable(self._schema)
+            table._columns = {name: column.take(key) for name, column in self._columns.items()}
+            table._n_rows = key.count()
+            return table
+        if key not in self._columns:
+            err_msg = "Metadata attribute '{}' can not be found.".format(key)
+            raise KeyError(err_msg)
+
+        return self._columns[key]
+
+    def __len__(self):
+        return self._n_rows
+
+    def __repr__(self):
+        return "MetaDataTable({} rows, {} columns)".format(self._n_rows, len(self._columns))
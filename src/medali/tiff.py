@@ -0,0 +1,273 @@
+"""
+Reading and writing of GDAL metadata stored in (Geo)TIFF files. Only the TIFF header, the first image file
+directory (IFD) and the GDAL_METADATA tag are accessed, raster data is never read or rewritten.
+
+"""
+
+import struct
+from collections import namedtuple
+
+
+GDAL_METADATA_TAG = 42112
+ASCII_TYPE = 2
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4,
+              16: 8, 17: 8, 18: 8}
+
+_CLASSIC_LAYOUT = ('H', 'HHI', 'I')
+_BIGTIFF_LAYOUT = ('Q', 'HHQ', 'Q')
+
+
+class _Layout(namedtuple('_Layout', ['byte_order', 'count_fmt', 'entry_fmt', 'offset_fmt'])):
+    """ Byte order and field sizes of a classic TIFF or a BigTIFF file. """
+
+    @property
+    def format_name(self):
+        return "BigTIFF" if self.offset_fmt == 'Q' else "classic TIFF"
+
+    @property
+    def count_size(self):
+        return struct.calcsize(self.byte_order + self.count_fmt)
+
+    @property
+    def offset_size(self):
+        return struct.calcsize(self.byte_order + self.offset_fmt)
+
+    @property
+    def entry_size(self):
+        return struct.calcsize(self.byte_order + self.entry_fmt) + self.offset_size
+
+    def pack(self, fmt, *values):
+        return struct.pack(self.byte_order + fmt, *values)
+
+    def unpack(self, fmt, buffer):
+        return struct.unpack(self.byte_order + fmt, buffer)
+
+
+def _read_header(tiff_file):
+    """
+    Reads the TIFF header.
+
+    Returns
+    -------
+    layout : _Layout
+        Byte order and field sizes of the file.
+    ifd_pointer_pos : int
+        File position of the offset pointing to the first IFD.
+    ifd_offset : int
+        File position of the first IFD.
+
+    """
+    header = tiff_file.read(16)
+    if header[:2] == b'II':
+        byte_order = '<'
+    elif header[:2] == b'MM':
+        byte_order = '>'
+    else:
+        raise ValueError("File is not a TIFF file.")
+    magic = struct.unpack(byte_order + 'H', header[2:4])[0]
+    if magic == 42:
+        layout = _Layout(byte_order, *_CLASSIC_LAYOUT)
+        ifd_pointer_pos = 4
+    elif magic == 43:
+        layout = _Layout(byte_order, *_BIGTIFF_LAYOUT)
+        ifd_pointer_pos = 8
+    else:
+        raise ValueError("File is not a TIFF file.")
+    ifd_offset = layout.unpack(layout.offset_fmt, header[ifd_pointer_pos:ifd_pointer_pos + layout.offset_size])[0]
+
+    return layout, ifd_pointer_pos, ifd_offset
+
+
+def _read_ifd(tiff_file, layout, ifd_offset):
+    """
+    Reads the entries of an IFD.
+
+    Returns
+    -------
+    entries : list of tuple
+        Tag, data type, count and raw (undecoded) value/offset field of each entry.
+    next_ifd_offset : int
+        File position of the next IFD.
+
+    """
+    tiff_file.seek(ifd_offset)
+    n_entries = layout.unpack(layout.count_fmt, tiff_file.read(layout.count_size))[0]
+    entry_size = layout.entry_size
+    buffer = tiff_file.read(n_entries * entry_size + layout.offset_size)
+    entries = []
+    for i in range(n_entries):
+        entry = buffer[i * entry_size:(i + 1) * entry_size]
+        tag, dtype, count = layout.unpack(layout.entry_fmt, entry[:entry_size - layout.offset_size])
+        entries.append((tag, dtype, count, entry[entry_size - layout.offset_size:]))
+    next_ifd_offset = layout.unpack(layout.offset_fmt, buffer[n_entries * entry_size:])[0]
+
+    return entries, next_ifd_offset
+
+
+def _read_entry_data(tiff_file, layout, entry):
+    """ bytes : Reads the data of an IFD entry, which is either stored inline or at an offset. """
+    _, dtype, count, value_field = entry
+    n_bytes = TYPE_SIZES.get(dtype, 1) * count
+    if n_bytes <= layout.offset_size:
+        return value_field[:n_bytes]
+    tiff_file.seek(layout.unpack(layout.offset_fmt, value_field)[0])
+
+    return tiff_file.read(n_bytes)
+
+
+def _read_gdal_metadata_xml(tiff_file):
+    """ Reads the header, the first IFD and the raw GDAL_METADATA XML string (or None) of an open file. """
+    try:
+        layout, ifd_pointer_pos, ifd_offset = _read_header(tiff_file)
+        entries, next_ifd_offset = _read_ifd(tiff_file, layout, ifd_offset)
+        xml_string = None
+        for entry in entries:
+            if entry[0] == GDAL_METADATA_TAG:
+                xml_string = _read_entry_data(tiff_file, layout, entry).rstrip(b'\0').decode('utf-8')
+                break
+    except struct.error as err:  # structures cut off by a truncated file
+        err_msg = "File is not a valid TIFF file ({}).".format(err)
+        raise ValueError(err_msg)
+
+    return layout, ifd_pointer_pos, ifd_offset, entries, next_ifd_offset, xml_string
+
+
+def _split_items(xml_string):
+    """
+    Splits GDAL metadata into dataset-level items of the default domain and all other XML elements.
+
+    Returns
+    -------
+    items : dict
+        Metadata attributes and values of the default domain.
+    other_elements : list
+        Band-level items and items of other metadata domains.
+
+    """
+    items, other_elements = {}, []
+    if not xml_string:
+        return items, other_elements
+    from xml.etree import ElementTree
+
+    try:
+        elements = ElementTree.fromstring(xml_string)
+    except ElementTree.ParseError as err:
+        err_msg = "GDAL metadata is not valid XML ({}).".format(err)
+        raise ValueError(err_msg)
+    for element in elements:
+        is_dataset_item = element.tag == 'Item' and 'sample' not in element.attrib and \
+            'role' not in element.attrib and not element.attrib.get('domain')
+        if is_dataset_item:
+            items[element.attrib['name']] = element.text or ''
+        else:
+            other_elements.append(element)
+
+    return items, other_elements
+
+
+def read_gdal_metadata(filepath):
+    """
+    Reads the dataset-level metadata of the default domain from a (Geo)TIFF file, i.e. what
+    `gdal.Dataset.GetMetadata()` returns, without reading raster data.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the (Geo)TIFF file.
+
+    Returns
+    -------
+    dict
+        Metadata attributes and encoded values.
+
+    """
+    with open(filepath, 'rb') as tiff_file:
+        xml_string = _read_gdal_metadata_xml(tiff_file)[-1]
+
+    return _split_items(xml_string)[0]
+
+
+def _build_gdal_metadata_xml(items, other_elements):
+    """ str : Serialises metadata items the same way as GDAL does. """
+    from xml.etree import ElementTree
+    from xml.sax.saxutils import escape, quoteattr
+
+    lines = ['<GDALMetadata>']
+    for name, value in items.items():
+        lines.append('  <Item name={}>{}</Item>'.format(quoteattr(str(name)), escape(str(value))))
+    for element in other_elements:
+        element.tail = None
+        lines.append('  ' + ElementTree.tostring(element, encoding='unicode'))
+    lines.append('</GDALMetadata>')
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_gdal_metadata(filepath, metadata):
+    """
+    Replaces the dataset-level metadata of the default domain in a (Geo)TIFF file in place. Band-level metadata
+    and other metadata domains are kept. The new GDAL_METADATA tag data overwrites the previous one if it fits,
+    otherwise it is appended to the end of the file. The first IFD is patched (or relocated to the end of the
+    file if the tag did not exist before), so raster data is neither read nor moved.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the (Geo)TIFF file.
+    metadata : dict
+        Metadata attributes and encoded values.
+
+    """
+    with open(filepath, 'r+b') as tiff_file:
+        layout, ifd_pointer_pos, ifd_offset, entries, next_ifd_offset, xml_string = \
+            _read_gdal_metadata_xml(tiff_file)
+        other_elements = _split_items(xml_string)[1]
+        data = _build_gdal_metadata_xml(metadata, other_elements).encode('utf-8') + b'\0'
+
+        tags = [entry[0] for entry in entries]
+        old_entry = entries[tags.index(GDAL_METADATA_TAG)] if GDAL_METADATA_TAG in tags else None
+        if len(data) <= layout.offset_size:
+            value_field = data.ljust(layout.offset_size, b'\0')
+        elif old_entry is not None and layout.offset_size < old_entry[2] and len(data) <= old_entry[2] and \
+                old_entry[1] == ASCII_TYPE:  # reuse the space of the previous tag data
+            value_field = old_entry[3]
+            tiff_file.seek(layout.unpack(layout.offset_fmt, value_field)[0])
+            tiff_file.write(data)
+        else:
+            value_field = layout.pack(layout.offset_fmt, _append(tiff_file, layout, data))
+        new_entry = (GDAL_METADATA_TAG, ASCII_TYPE, len(data), value_field)
+
+        if old_entry is not None:
+            entry_pos = ifd_offset + layout.count_size + tags.index(GDAL_METADATA_TAG) * layout.entry_size
+            tiff_file.seek(entry_pos)
+            tiff_file.write(_pack_entry(layout, new_entry))
+        else:
+            entries = sorted(entries + [new_entry], key=lambda entry: entry[0])
+            ifd = layout.pack(layout.count_fmt, len(entries)) + \
+                b''.join(_pack_entry(layout, entry) for entry in entries) + \
+                layout.pack(layout.offset_fmt, next_ifd_offset)
+            new_ifd_offset = _append(tiff_file, layout, ifd)
+            tiff_file.seek(ifd_pointer_pos)
+            tiff_file.write(layout.pack(layout.offset_fmt, new_ifd_offset))
+
+
+def _pack_entry(layout, entry):
+    """ bytes : Serialises an IFD entry. """
+    tag, dtype, count, value_field = entry
+    return layout.pack(layout.entry_fmt, tag, dtype, count) + value_field
+
+
+def _append(tiff_file, layout, data):
+    """ int : Appends data word-aligned to the end of the file and returns its offset. """
+    tiff_file.seek(0, 2)
+    offset = tiff_file.tell()
+    if offset % 2:
+        tiff_file.write(b'\0')
+        offset += 1
+    if offset + len(data) >= 2 ** (8 * layout.offset_size):
+        err_msg = "Metadata can not be appended since the file exceeds the size limit of {}.".format(
+            layout.format_name)
+        raise ValueError(err_msg)
+    tiff_file.write(data)
+
+    return offset
@@ -0,0 +1,122 @@
+""" Tests the asyncio API for loading schemas and reading/writing metadata tags. """
+
+import os
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+from src.medali import aio
+from src.medali.core import MetaData
+from src.medali.config import config_registry
+from src.medali.config import clear_config_cache
+
+from tests.test_fileio import create_tiff
+
+
+class AsyncioTest(unittest.TestCase):
+    """ Tests asynchronous counterparts of the blocking API. """
+
+    def setUp(self):
+        """ Creates an event loop and a temporary directory with GeoTIFF files. """
+        self.loop = asyncio.new_event_loop()
+        self.tmp_dirpath = tempfile.mkdtemp()
+        self.cfg_filepath = os.path.join(os.path.dirname(__file__), "test_data", "cfg_template.ini")
+        self.filepaths = [os.path.join(self.tmp_dirpath, "tile_{}.tif".format(i)) for i in range(20)]
+        for filepath in self.filepaths:
+            create_tiff(filepath)
+        clear_config_cache()
+
+    def tearDown(self):
+        """ Closes the event loop and removes the temporary directory. """
+        self.loop.close()
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_from_cfg_file(self):
+        """ Tests creating `MetaData` instances concurrently. """
+        async def create():
+            return await asyncio.gather(*[MetaData.afrom_cfg_file({'integer_type': i}, self.cfg_filepath)
+                                          for i in range(10)])
+
+        metadata = self.loop.run_until_complete(create())
+        assert [entry['integer_type'] for entry in metadata] == list(range(10))
+        assert metadata[0]._schema is config_registry.get(self.cfg_filepath)
+
+    def test_preload(self):
+        """ Tests preloading config files and product versions. """
+        schemas = self.loop.run_until_complete(aio.preload_schemas([self.cfg_filepath],
+                                                                   [("s1dc_flood_mapper", "V1M2")]))
+        assert schemas[0] is config_registry.get(self.cfg_filepath)
+        assert schemas[1] is config_registry.get_product("s1dc_flood_mapper", "V1M2")
+
+    def test_read_write_many(self):
+        """ Tests writing and reading the tags of many files with bounded concurrency. """
+        async def write_and_read():
+            metadata = [await MetaData.afrom_product_version({'run_number': i}, "s1dc_flood_mapper", "V1M2")
+                        for i in range(len(self.filepaths))]
+            await aio.write_many_tags(zip(self.filepaths, metadata), max_concurrency=4)
+            return await aio.read_many_tags(self.filepaths, max_concurrency=4)
+
+        tags = self.loop.run_until_complete(write_and_read())
+        assert [entry['run_number'] for entry in tags] == [str(i) for i in range(len(self.filepaths))]
+
+        async def read_one():
+            schema = config_registry.get_product("s1dc_flood_mapper", "V1M2")
+            metadata = await MetaData.afrom_file(self.filepaths[3], schema)
+            metadata['run_number'] = 33
+            await metadata.awrite_to_file(self.filepaths[3])
+            return await aio.read_tags(self.filepaths[3])
+
+        assert self.loop.run_until_complete(read_one())['run_number'] == '33'
+
+    def test_write_projection(self):
+        """ Tests that writing projected metadata keeps all other tags of the files. """
+        schema = config_registry.get_product("s1dc_flood_mapper", "V1M2")
+
+        async def write_and_read():
+            metadata = MetaData({'run_number': 1}, schema)
+            await aio.write_many_tags([(filepath, metadata) for filepath in self.filepaths])
+            projections = [await MetaData.afrom_file(filepath, schema, fields=['run_number'])
+                           for filepath in self.filepaths]
+            for projection in projections:
+                projection['run_number'] = 2
+            await aio.write_many_tags(zip(self.filepaths, projections))
+            return await aio.read_many_tags(self.filepaths)
+
+        full_tags = MetaData({'run_number': 2}, schema).to_tags()
+        assert self.loop.run_until_complete(write_and_read()) == [full_tags] * len(self.filepaths)
+
+    def test_bounded_concurrency(self):
+        """ Tests that not more than the given number of calls are in flight. """
+        in_flight, max_in_flight = [0], [0]
+
+        async def work(item):
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            await asyncio.sleep(0.001)
+            in_flight[0] -= 1
+            return item * 2
+
+        results = self.loop.run_until_complete(aio.map_bounded(work, range(50), max_concurrency=5))
+        assert results == [item * 2 for item in range(50)]
+        assert max_in_flight[0] == 5
+
+        n_pulled, n_done = [0], [0]
+
+        def iter_items():
+            for item in range(50):
+                n_pulled[0] += 1
+                assert n_pulled[0] - n_done[0] <= 5  # items are only pulled by idle workers
+                yield item
+
+        async def count(item):
+            await asyncio.sleep(0.001)
+            n_done[0] += 1
+            return item
+
+        results = self.loop.run_until_complete(aio.map_bounded(count, iter_items(), max_concurrency=5))
+        assert results == list(range(50))
+
+
+if __name__ == '__main__':
+    unittest.main()
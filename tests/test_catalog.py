@@ -0,0 +1,52 @@
+""" Tests the index of shipped metadata config files. """
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from src.medali import catalog
+from src.medali.config import ConfigRegistry
+
+
+class CatalogTest(unittest.TestCase):
+    """ Tests listing shipped product versions and building the index file. """
+
+    def test_list(self):
+        """ Tests listing workers, variables and versions. """
+        assert catalog.list_products() == ['advisory_flagging', 'harmonic_params', 's1_sigma',
+                                           's1dc_flood_mapper', 'tempinator']
+        assert catalog.list_variables("s1-sigma") == ['plia', 'sig0']
+        assert catalog.list_variables("tempinator") == []
+        assert catalog.list_versions("s1dc_flood_mapper") == ['V01', 'V1M0', 'V1M1', 'V1M2']
+        assert catalog.list_versions("s1_sigma", var_name="sig0") == ['V01', 'V1M0', 'V1M1']
+        assert catalog.list_versions("s1_sigma") == []
+
+    def test_write_index(self):
+        """ Tests that the index file contains all parsed config files. """
+        tmp_dirpath = tempfile.mkdtemp()
+        try:
+            index_filepath = os.path.join(tmp_dirpath, catalog.INDEX_FILENAME)
+            catalog.write_index(index_filepath)
+            with open(index_filepath) as index_file:
+                index = json.load(index_file)
+        finally:
+            shutil.rmtree(tmp_dirpath)
+        assert index['format'] == catalog.INDEX_FORMAT
+        assert index['products'] == catalog.build_index()
+        assert index['products']['s1_sigma/sig0/V1M1']['Expected_value']['mode'] == ['IW', 'EW']
+
+    def test_packaged_index(self):
+        """ Tests that product versions are resolved from the packaged index without accessing config files. """
+        packaged_index = catalog._packaged_index
+        catalog._packaged_index = {'dummy_worker/V1M0': {'Metadata': {'dummy_attr': 'string'}}}
+        try:
+            schema = ConfigRegistry().get_product("dummy-worker", "V1M0")
+        finally:
+            catalog._packaged_index = packaged_index
+        assert schema.names == ('dummy_attr',)
+
+
+if __name__ == '__main__':
+    unittest.main()
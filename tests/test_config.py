@@ -0,0 +1,214 @@
+""" Tests reading and caching of reference metadata config files. """
+
+import os
+import time
+import pickle
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+from src.medali.core import MetaData
+from src.medali.config import ConfigRegistry
+from src.medali.config import read_config
+from src.medali.config import resolve_config
+from src.medali.config import config_registry
+from src.medali.config import clear_config_cache
+
+
+class ConfigRegistryTest(unittest.TestCase):
+    """ Tests memoization, invalidation and eviction of parsed config files. """
+
+    def setUp(self):
+        """ Copies the template config file to a temporary directory. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        test_data_dirpath = os.path.join(os.path.dirname(__file__), "test_data")
+        self.cfg_filepath = os.path.join(self.tmp_dirpath, "cfg_template.ini")
+        shutil.copy(os.path.join(test_data_dirpath, "cfg_template.ini"), self.cfg_filepath)
+        clear_config_cache()
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_memoization(self):
+        """ Tests that the same parsed config is shared among instances. """
+        metadata_1 = MetaData.from_cfg_file({}, self.cfg_filepath)
+        metadata_2 = MetaData.from_cfg_file({}, self.cfg_filepath)
+        assert metadata_1._schema is metadata_2._schema
+        assert self.cfg_filepath in config_registry
+
+    def test_interning(self):
+        """ Tests that config files and dictionaries with the same content share one schema. """
+        schema = config_registry.get(self.cfg_filepath)
+        assert MetaData({}, read_config(self.cfg_filepath))._schema is schema
+        copy_filepath = os.path.join(self.tmp_dirpath, "copy.ini")
+        shutil.copy(self.cfg_filepath, copy_filepath)
+        assert config_registry.get(copy_filepath) is schema
+        os.remove(copy_filepath)  # pickles refer to the most recently loaded file
+        metadata = MetaData.from_cfg_file({'integer_type': 3}, self.cfg_filepath)
+        assert pickle.loads(pickle.dumps(metadata))._schema is schema
+
+    def test_product_memoization(self):
+        """ Tests that product configs are resolved and parsed only once. """
+        metadata_1 = MetaData.from_product_version({}, "s1-sigma", "V1M1", var_name="sig0")
+        metadata_2 = MetaData.from_product_version({}, "s1_sigma", "V1M1", var_name="SIG0")
+        assert metadata_1._schema is metadata_2._schema
+
+    def test_read_only(self):
+        """ Tests that cached reference metadata can not be modified. """
+        metadata = MetaData.from_cfg_file({}, self.cfg_filepath)
+        with self.assertRaises(TypeError):
+            metadata._ref_meta['Metadata']['new_attr'] = 'string'
+        assert metadata._ref_meta['Expected_value']['string_list'] == ('V1', 'V2', 'V3', 'V4')
+
+    def test_invalidation(self):
+        """ Tests that a modified config file is parsed again. """
+        schema = config_registry.get(self.cfg_filepath)
+        with open(self.cfg_filepath, "a") as cfg_file:
+            cfg_file.write("\n[Extra]\nextra_attr: string\n")
+        schema_mod = config_registry.get(self.cfg_filepath)
+        assert schema is not schema_mod
+        assert 'Extra' in schema_mod.ref_meta
+
+    def test_include(self):
+        """ Tests that included config files are merged and that modifying them invalidates cached schemas. """
+        base_filepath = os.path.join(self.tmp_dirpath, "_common", "base.ini")
+        os.makedirs(os.path.dirname(base_filepath))
+        with open(base_filepath, "w") as cfg_file:
+            cfg_file.write("[Metadata]\ncreator: string\ntile_id: string\n\n[Expected_value]\ntile_id: list, A, B\n")
+        product_filepath = os.path.join(self.tmp_dirpath, "V1M0.ini")
+        with open(product_filepath, "w") as cfg_file:
+            cfg_file.write("[Include]\nextends: _common/base.ini\n\n[Metadata]\nrun_number: integer\n"
+                           "tile_id: string\n\n[Expected_value]\ntile_id: list, C\n")
+
+        ref_metadata, included_filepaths = resolve_config(product_filepath)
+        assert included_filepaths == [base_filepath]
+        assert list(ref_metadata['Metadata']) == ['creator', 'tile_id', 'run_number']
+        assert ref_metadata['Expected_value'] == {'tile_id': ['C']}
+        assert 'Include' not in ref_metadata
+
+        registry = ConfigRegistry(include_check_interval=60)
+        schema = registry.get(product_filepath)
+        assert registry.get(product_filepath) is schema
+        with open(base_filepath, "a") as cfg_file:
+            cfg_file.write("\n[Extra]\nextra_attr: string\n")
+        assert registry.get(product_filepath) is schema  # included files are only checked once per interval
+        registry.include_check_interval = 0
+        schema_mod = registry.get(product_filepath)
+        assert schema_mod is not schema
+        assert 'Extra' in schema_mod.ref_meta
+
+        with open(product_filepath, "w") as cfg_file:
+            cfg_file.write("[Include]\nextends: _common/base.ini\ninsert_after: run_number\n\n[Metadata]\n"
+                           "run_number: integer\nparent: string\n")
+        assert list(read_config(product_filepath)['Metadata']) == ['run_number', 'creator', 'tile_id', 'parent']
+
+    def test_include_errors(self):
+        """ Tests that missing and cyclic includes are rejected. """
+        cfg_filepath = os.path.join(self.tmp_dirpath, "cyclic.ini")
+        with open(cfg_filepath, "w") as cfg_file:
+            cfg_file.write("[Include]\nextends: cyclic.ini\n")
+        with self.assertRaises(ValueError):
+            read_config(cfg_filepath)
+        with open(cfg_filepath, "w") as cfg_file:
+            cfg_file.write("[Include]\nextends: missing.ini\n")
+        with self.assertRaises(IOError):
+            read_config(cfg_filepath)
+
+    def test_eviction(self):
+        """ Tests that the least recently used config file is dropped first. """
+        registry = ConfigRegistry(maxsize=1)
+        registry.get(self.cfg_filepath)
+        sig0_schema = registry.get_product("s1_sigma", "V1M1", var_name="sig0")
+        assert len(registry) == 1
+        assert self.cfg_filepath not in registry
+        assert registry.get_product("s1_sigma", "V1M1", var_name="sig0") is sig0_schema
+        registry.clear()
+        assert len(registry) == 0
+
+    def test_missing_file(self):
+        """ Tests that a non-existing config file raises an IOError. """
+        with self.assertRaises(IOError):
+            MetaData.from_cfg_file({}, os.path.join(self.tmp_dirpath, "missing.ini"))
+
+    def test_pickle(self):
+        """ Tests that `MetaData` instances with cached reference metadata can be pickled. """
+        metadata = MetaData.from_cfg_file({'integer_type': 3}, self.cfg_filepath)
+        restored = pickle.loads(pickle.dumps(metadata))
+        assert restored['integer_type'] == 3
+        assert restored._ref_meta == metadata._ref_meta
+        assert restored.to_tags() == metadata.to_tags()
+
+        metadata = MetaData.from_product_version({'run_number': 7}, "s1dc_flood_mapper", "V1M2")
+        restored = pickle.loads(pickle.dumps(metadata))
+        assert restored.to_tags() == metadata.to_tags()
+        assert restored._schema is metadata._schema
+
+
+class ConfigRegistryThreadingTest(unittest.TestCase):
+    """ Tests concurrent access of many threads to cold and warm registries. """
+
+    n_threads = 16
+
+    def setUp(self):
+        """ Copies the template config file four times to a temporary directory. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        test_data_dirpath = os.path.join(os.path.dirname(__file__), "test_data")
+        self.cfg_filepaths = []
+        for i in range(4):
+            cfg_filepath = os.path.join(self.tmp_dirpath, "cfg_{}.ini".format(i))
+            shutil.copy(os.path.join(test_data_dirpath, "cfg_template.ini"), cfg_filepath)
+            self.cfg_filepaths.append(cfg_filepath)
+        self.n_parses = 0
+        self.count_lock = threading.Lock()
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        shutil.rmtree(self.tmp_dirpath)
+
+    def _read_config_slowly(self, filepath):
+        """ Counts parses and widens the time window for races. """
+        with self.count_lock:
+            self.n_parses += 1
+        time.sleep(0.01)
+        return resolve_config(filepath)
+
+    def test_cold_cache(self):
+        """ Tests that a config file is parsed only once if many threads request it at the same time. """
+        registry = ConfigRegistry()
+        barrier = threading.Barrier(self.n_threads)
+
+        def get_schema(cfg_filepath):
+            barrier.wait()
+            return registry.get(cfg_filepath)
+
+        with mock.patch('src.medali.config.resolve_config', self._read_config_slowly):
+            with ThreadPoolExecutor(self.n_threads) as executor:
+                cfg_filepaths = [self.cfg_filepaths[i % 2] for i in range(self.n_threads)]
+                schemas = list(executor.map(get_schema, cfg_filepaths))
+        assert self.n_parses == 2
+        assert len({id(schema) for schema in schemas}) == 1  # both config files have the same content
+        assert schemas[0] is registry.get(self.cfg_filepaths[0])
+
+    def test_warm_cache(self):
+        """ Tests many concurrent lookups while entries are evicted and re-loaded. """
+        registry = ConfigRegistry(maxsize=2)
+
+        def create_metadata(i):
+            metadata = MetaData.from_cfg_file({'integer_type': i}, self.cfg_filepaths[i % 4])
+            metadata._schema = registry.get(self.cfg_filepaths[(i + 1) % 4])
+            return metadata['integer_type'], sorted(metadata._schema.names)
+
+        with ThreadPoolExecutor(self.n_threads) as executor:
+            results = list(executor.map(create_metadata, range(2000)))
+        assert [result[0] for result in results] == list(range(2000))
+        assert len({tuple(result[1]) for result in results}) == 1
+        assert len(registry) <= 2
+        assert registry._loading == {}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,15 @@
 """ Tests metadata base class. """
 
 import os
-import glob
+import sys
 import unittest
+import subprocess
 import datetime
 
+from src.medali import catalog
 from src.medali.core import MetaData
+from src.medali.core import validate
+from src.medali.schema import MetaDataValidationError
 
 
 class MetadataConfigReadTest(unittest.TestCase):
@@ -13,18 +17,11 @@ class MetadataConfigReadTest(unittest.TestCase):
 
     def test_configs_read(self):
         """ Test reading all available config files and filling null values. """
-        root_dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "medali"))
-        lib_path = os.path.join(root_dirpath, "lib")
-
-        product_names = os.listdir(lib_path)
-        cfg_filepaths = []
-        for product_name in product_names:
-            product_dirpath = os.path.join(lib_path, product_name)
-            cfg_filepaths.extend(glob.glob(os.path.join(product_dirpath, "*.ini")))
-
-        for cfg_filepath in cfg_filepaths:
-            metadata = MetaData.from_cfg_file({}, cfg_filepath)
-            self.assertEqual(metadata._meta.keys(), metadata._ref_meta['Metadata'].keys())
+        for worker_name in catalog.list_products():
+            for var_name in catalog.list_variables(worker_name) or [None]:
+                for version_id in catalog.list_versions(worker_name, var_name=var_name):
+                    metadata = MetaData.from_product_version({}, worker_name, version_id, var_name=var_name)
+                    self.assertEqual(metadata._meta.keys(), metadata._ref_meta['Metadata'].keys())
 
 
 class MetadataTest(unittest.TestCase):
@@ -71,6 +68,33 @@ class MetadataTest(unittest.TestCase):
         assert self.metadata['string_list'] == 'V3'
         assert self.metadata['string_pattern'] == 'Pattern01'
 
+    def test_decoded_cache(self):
+        """ Tests memoization of decoded values and invalidation when setting attributes. """
+        metadata = MetaData.from_cfg_file({'datetime_type': '2020-12-12 12:20:10'}, self.cfg_filepath)
+        timestamp = metadata['datetime_type']
+        assert metadata['datetime_type'] is timestamp
+        metadata['datetime_type'] = datetime.datetime(2021, 1, 1)
+        assert metadata['datetime_type'] == datetime.datetime(2021, 1, 1)
+        assert metadata['integer_type'] == 'null'
+
+    def test_compact_storage(self):
+        """ Tests that values are stored in schema order without a per-instance dictionary. """
+        assert not hasattr(self.metadata, '__dict__')
+        position = self.metadata._schema.positions['integer_type']
+        assert self.metadata._values[position] == '1'
+        untyped_metadata = MetaData({'abc': 1})
+        untyped_metadata['def'] = 'ghi'
+        assert untyped_metadata.to_tags() == {'abc': 1, 'def': 'ghi'}
+        assert untyped_metadata['abc'] == 1
+
+    def test_to_decoded_dict(self):
+        """ Tests bulk decoding of all metadata attributes. """
+        dec_metadata = self.metadata.to_decoded_dict()
+        assert dec_metadata['datetime_type'] == datetime.datetime(2020, 12, 12, 12, 20, 10)
+        assert dec_metadata['boolean_type'] is False
+        assert dec_metadata['integer_type'] == 1
+        assert dec_metadata.keys() == self.metadata.to_tags().keys()
+
     def test_expected_values(self):
         """ Tests checking of external metadata. """
 
@@ -90,6 +114,89 @@ class MetadataTest(unittest.TestCase):
             assert True
         metadata['boolean_type'] = 'False'
 
+    def test_collect_errors(self):
+        """ Tests collecting all violations when creating a `MetaData` instance. """
+        metadata = {'number_type': 'haha', 'string_list': 'V5', 'unknown': 1, 'integer_type': 2}
+        with self.assertRaises(MetaDataValidationError) as ctx:
+            MetaData.from_cfg_file(metadata, self.cfg_filepath, collect_errors=True)
+        kinds = {violation.attribute: violation.kind for violation in ctx.exception.violations}
+        assert kinds == {'number_type': 'dtype', 'string_list': 'expected', 'unknown': 'unknown',
+                         'boolean_type': 'missing', 'datetime_type': 'missing', 'string_general': 'missing',
+                         'string_pattern': 'missing'}
+
+        metadata = dict(self.metadata.to_tags(), integer_type=2, string_list='null')
+        metadata = MetaData.from_cfg_file(metadata, self.cfg_filepath, collect_errors=True)
+        assert metadata['integer_type'] == 2
+        assert metadata['string_list'] == 'null'
+
+        ref_metadata = {'Metadata': {}, 'Expected_value': {'x': 'pattern, abc'}}
+        with self.assertRaises(MetaDataValidationError) as ctx:
+            MetaData({'x': 5}, ref_metadata, collect_errors=True)
+        assert [(violation.attribute, violation.kind) for violation in ctx.exception.violations] == \
+            [('x', 'expected')]
+        assert validate({'x': 5, 'y': 6}, ref_metadata)[0].kind == 'expected'
+
+    def test_validate(self):
+        """ Tests validating a metadata dictionary including missing attributes. """
+        metadata = {'number_type': 'haha', 'string_pattern': 'Pattern', 'integer_type': 2}
+        violations = validate(metadata, self.metadata._schema)
+        kinds = sorted((violation.attribute, violation.kind) for violation in violations)
+        assert kinds == [('boolean_type', 'missing'), ('datetime_type', 'missing'), ('number_type', 'dtype'),
+                         ('string_general', 'missing'), ('string_list', 'missing'),
+                         ('string_pattern', 'expected')]
+
+    def test_dirty_tracking(self):
+        """ Tests tracking of metadata attributes modified after loading. """
+        metadata = MetaData.from_cfg_file({'integer_type': 1, 'string_list': 'V3'}, self.cfg_filepath)
+        assert not metadata.is_dirty
+        metadata['integer_type'] = '1'
+        assert metadata.dirty_tags() == {}
+        metadata['integer_type'] = 2
+        metadata['number_type'] = 1.5
+        assert metadata.is_dirty
+        assert metadata.dirty_tags() == {'integer_type': '2', 'number_type': '1.5'}
+        metadata.mark_clean()
+        assert not metadata.is_dirty
+        untyped_metadata = MetaData({'abc': 1})
+        untyped_metadata['def'] = 'ghi'
+        assert untyped_metadata.dirty_tags() == {'def': 'ghi'}
+
+    def test_diff(self):
+        """ Tests comparing the encoded values of two `MetaData` instances. """
+        metadata = MetaData.from_cfg_file(self.metadata.to_tags(), self.cfg_filepath)
+        assert metadata.diff(self.metadata) == {}
+        metadata['integer_type'] = 3
+        assert metadata.diff(self.metadata) == {'integer_type': ('3', '1')}
+        assert metadata.diff({'integer_type': '3', 'abc': 'def'})['abc'] == (None, 'def')
+
+    def test_same_content(self):
+        """ Tests comparing the content of `MetaData` instances, which keep identity equality and hashes. """
+        metadata = MetaData(self.metadata.to_tags(), self.metadata._ref_meta)
+        assert metadata.same_content(self.metadata) and metadata != self.metadata
+        assert len({metadata, self.metadata}) == 2
+        metadata['integer_type'] = 3
+        assert not metadata.same_content(self.metadata)
+        assert not MetaData({'integer_type': 1}).same_content(self.metadata)
+
+    def test_projection(self):
+        """ Tests that only the requested attributes are validated and stored. """
+        tags = self.metadata.to_tags()
+        tags['string_list'] = 'invalid'  # not projected, hence not validated
+        metadata = MetaData.from_cfg_file(tags, self.cfg_filepath, fields=['integer_type', 'datetime_type'])
+        assert metadata.to_tags() == {'datetime_type': '2020-12-12 12:20:10', 'integer_type': '1'}
+        assert metadata['integer_type'] == 1
+        assert metadata.schema.parent is self.metadata.schema
+        assert metadata.schema is self.metadata.schema.project(['integer_type', 'datetime_type'])
+        assert 'string_list' in metadata.schema.parent
+        with self.assertRaises(KeyError):
+            metadata['string_list']
+        with self.assertRaises(KeyError):
+            MetaData.from_cfg_file(tags, self.cfg_filepath, fields=['unknown'])
+        with self.assertRaises(ValueError):
+            MetaData.from_cfg_file({'integer_type': 'a'}, self.cfg_filepath, fields=['integer_type'])
+        assert MetaData.from_cfg_file({}, self.cfg_filepath, fields=['integer_type']).to_tags() == \
+            {'integer_type': 'null'}
+
     def test_and(self):
         """ Tests AND operation between two `MetaData` instances. """
 
@@ -111,5 +218,119 @@ class MetadataTest(unittest.TestCase):
         self.assertDictEqual(metadata_should, common_metadata._meta)
 
 
+class MetadataAggregationTest(unittest.TestCase):
+    """ Tests intersecting and merging many `MetaData` instances. """
+
+    def setUp(self):
+        """ Creates flood metadata of three acquisitions. """
+        self.metadata = MetaData.from_records([{'tile_id': 'E048N012T3', 'orbit_direction': 'A',
+                                                'date_sensing': datetime.datetime(2021, 1, day), 'run_number': day}
+                                               for day in [3, 1, 2]], "s1dc_flood_mapper", "V1M2")
+
+    def test_intersect(self):
+        """ Tests intersecting by attributes and by values. """
+        common_metadata = MetaData.intersect(self.metadata)
+        assert common_metadata._schema is self.metadata[0]._schema
+        assert common_metadata['run_number'] == 3
+
+        common_metadata = MetaData.intersect(iter(self.metadata), by_value=True)
+        assert 'date_sensing' not in common_metadata.to_tags()
+        assert 'run_number' not in common_metadata.to_tags()
+        assert common_metadata['tile_id'] == 'E048N012T3'
+        assert common_metadata['creator'] == 'null'
+
+        untyped_metadata = MetaData({'tile_id': 'E048N012T3', 'abc': 'def'})
+        common_metadata = MetaData.intersect(self.metadata + [untyped_metadata], by_value=True)
+        assert common_metadata.to_tags() == {'tile_id': 'E048N012T3'}
+        with self.assertRaises(ValueError):
+            MetaData.intersect([])
+
+    def test_merge(self):
+        """ Tests merging with different conflict policies. """
+        merged_metadata = MetaData.merge(self.metadata, policy='equal',
+                                         policies={'date_sensing': 'min', 'run_number': 'last', 'creator': 'raise'})
+        assert merged_metadata._schema is self.metadata[0]._schema
+        assert merged_metadata['date_sensing'] == datetime.datetime(2021, 1, 1)
+        assert merged_metadata['run_number'] == 2
+        assert merged_metadata['orbit_direction'] == 'A'
+        assert merged_metadata['creator'] == 'null'
+
+        merged_metadata = MetaData.merge(self.metadata, policies={'date_sensing': 'max', 'run_number': sum})
+        assert merged_metadata['date_sensing'] == datetime.datetime(2021, 1, 3)
+        assert merged_metadata['run_number'] == 6
+
+        merged_metadata = MetaData.merge(self.metadata, policy='equal')
+        assert merged_metadata['run_number'] == 'null'
+        with self.assertRaises(ValueError):
+            MetaData.merge(self.metadata, policy='raise')
+        with self.assertRaises(ValueError):
+            MetaData.merge(self.metadata, policy='median')
+
+    def test_merge_schemas(self):
+        """ Tests merging instances with different reference metadata. """
+        ref_metadata = {'Metadata': {'tile_id': 'string', 'scale_factor': 'integer'}}
+        other_metadata = MetaData({'tile_id': 'E051N015T3', 'scale_factor': 2}, ref_metadata)
+        merged_metadata = MetaData.merge([other_metadata] + self.metadata)
+        assert merged_metadata['tile_id'] == 'E051N015T3'
+        assert merged_metadata['scale_factor'] == 2
+        assert merged_metadata['run_number'] == 3
+
+    def test_merge_untyped(self):
+        """ Tests merging instances with and without reference data types. """
+        untyped_metadata = MetaData({'comment': 'reprocessed', 'run_number': '5'})
+        merged_metadata = MetaData.merge(self.metadata + [untyped_metadata], policy='last',
+                                         policies={'date_sensing': 'max'})
+        assert merged_metadata['comment'] == 'reprocessed'
+        assert merged_metadata['run_number'] == 5
+        assert merged_metadata['date_sensing'] == datetime.datetime(2021, 1, 3)
+        merged_metadata = MetaData.merge([untyped_metadata] + self.metadata)
+        assert merged_metadata['comment'] == 'reprocessed'
+        assert merged_metadata['run_number'] == 5
+
+
+class MetadataRecordsTest(unittest.TestCase):
+    """ Tests creating many `MetaData` instances at once. """
+
+    def test_from_records(self):
+        """ Tests creating instances from valid records. """
+        records = [{'orbit_direction': 'A', 'orbit_relative': 117, 'tile_id': 'E048N012T3'},
+                   {'orbit_direction': 'D', 'orbit_relative': 117, 'date_creation': '2021-01-01 00:00:00'}]
+        metadata = MetaData.from_records(records, "s1dc_flood_mapper", "V1M2")
+        assert len(metadata) == 2
+        assert metadata[0]['orbit_relative'] == 117
+        assert metadata[0]['date_creation'] == 'null'
+        assert metadata[1]['date_creation'] == datetime.datetime(2021, 1, 1)
+        assert metadata[0]._schema is metadata[1]._schema
+        expected = MetaData.from_product_version(records[1], "s1dc_flood_mapper", "V1M2")
+        assert metadata[1].to_tags() == expected.to_tags()
+
+    def test_from_records_violations(self):
+        """ Tests that all violations of all records are reported. """
+        records = [{'orbit_direction': 'X', 'orbit_relative': 117},
+                   {'orbit_direction': 'A', 'orbit_relative': 'abc', 'unknown': 1},
+                   {'orbit_direction': 'X'}]
+        with self.assertRaises(MetaDataValidationError) as ctx:
+            MetaData.from_records(records, "s1dc_flood_mapper", "V1M2")
+        violations = [(v.index, v.attribute, v.value, v.kind) for v in ctx.exception.violations]
+        assert violations == [(0, 'orbit_direction', 'X', 'expected'),
+                              (1, 'orbit_relative', 'abc', 'dtype'),
+                              (1, 'unknown', 1, 'unknown'),
+                              (2, 'orbit_direction', 'X', 'expected')]
+
+
+class MetadataImportTest(unittest.TestCase):
+    """ Tests that importing medali defers heavy imports. """
+
+    def test_deferred_imports(self):
+        """ Tests that modules only needed for specific functionality are not imported at start-up. """
+        root_dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        deferred_modules = ('pkg_resources', 'configparser', 'pprint', 're', 'asyncio')
+        code = "import sys; import src.medali.core; " \
+               "print(','.join(m for m in {!r} if m in sys.modules))".format(deferred_modules)
+        output = subprocess.run([sys.executable, "-c", code], cwd=root_dirpath, stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        assert output.stdout.strip() == ''
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,206 @@
+""" Tests reading and writing metadata tags from/to raster files. """
+
+import io
+import os
+import struct
+import shutil
+import datetime
+import tempfile
+import unittest
+
+from src.medali.core import MetaData
+from src.medali.tiff import read_gdal_metadata
+from src.medali.tiff import write_gdal_metadata
+from src.medali.tiff import _Layout
+from src.medali.tiff import _append
+from src.medali.tiff import _CLASSIC_LAYOUT
+from src.medali.tiff import _BIGTIFF_LAYOUT
+from src.medali.fileio import read_tags
+from src.medali.config import config_registry
+
+
+def create_tiff(filepath, byte_order='<', bigtiff=False, gdal_metadata=None):
+    """
+    Creates a minimal single-strip 2x1 pixel TIFF file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the TIFF file.
+    byte_order : str, optional
+        Byte order, i.e. '<' (little endian, default) or '>' (big endian).
+    bigtiff : bool, optional
+        If true, a BigTIFF file is created.
+    gdal_metadata : str, optional
+        GDAL metadata XML string stored in the GDAL_METADATA tag.
+
+    """
+    offset_fmt, count_fmt, entry_fmt = ('Q', 'Q', 'HHQ') if bigtiff else ('I', 'H', 'HHI')
+    offset_size = struct.calcsize(offset_fmt)
+    header_size = 16 if bigtiff else 8
+    pixels = b'\x07\x09'
+    extra_data = b''
+    entries = [(256, 3, 1, 2), (257, 3, 1, 1), (258, 3, 1, 8), (262, 3, 1, 1), (273, 4, 1, header_size),
+               (277, 3, 1, 1), (278, 3, 1, 1), (279, 4, 1, len(pixels))]
+    if gdal_metadata is not None:
+        extra_data = gdal_metadata.encode('utf-8') + b'\0'
+        entries.append((42112, 2, len(extra_data), header_size + len(pixels)))
+    ifd_offset = header_size + len(pixels) + len(extra_data)
+
+    if bigtiff:
+        header = (b'II' if byte_order == '<' else b'MM') + struct.pack(byte_order + 'HHHQ', 43, 8, 0, ifd_offset)
+    else:
+        header = (b'II' if byte_order == '<' else b'MM') + struct.pack(byte_order + 'HI', 42, ifd_offset)
+    ifd = struct.pack(byte_order + count_fmt, len(entries))
+    for tag, dtype, count, value in entries:
+        if dtype == 3:  # SHORT values are left-aligned in the value field
+            value_field = struct.pack(byte_order + 'H', value).ljust(offset_size, b'\0')
+        else:
+            value_field = struct.pack(byte_order + offset_fmt, value)
+        ifd += struct.pack(byte_order + entry_fmt, tag, dtype, count) + value_field
+    ifd += struct.pack(byte_order + offset_fmt, 0)
+
+    with open(filepath, 'wb') as tiff_file:
+        tiff_file.write(header + pixels + extra_data + ifd)
+
+
+def read_pixels(filepath):
+    """ bytes : Reads the pixel values of a TIFF file created with `create_tiff`. """
+    with open(filepath, 'rb') as tiff_file:
+        header_size = 16 if tiff_file.read(4)[2:4] in (b'+\x00', b'\x00+') else 8
+        tiff_file.seek(header_size)
+        return tiff_file.read(2)
+
+
+class TiffTagTest(unittest.TestCase):
+    """ Tests the pure-Python GDAL metadata reader and writer. """
+
+    def setUp(self):
+        """ Creates a temporary directory. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmp_dirpath, "test.tif")
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_read(self):
+        """ Tests reading dataset-level items of the default domain. """
+        gdal_metadata = '<GDALMetadata>\n  <Item name="tile_id">E048N012T3</Item>\n' \
+                        '  <Item name="scale" sample="0" role="scale">2</Item>\n' \
+                        '  <Item name="other" domain="IMAGE_STRUCTURE">x</Item>\n</GDALMetadata>\n'
+        create_tiff(self.filepath, gdal_metadata=gdal_metadata)
+        assert read_gdal_metadata(self.filepath) == {'tile_id': 'E048N012T3'}
+
+    def test_write_new_tag(self):
+        """ Tests adding the GDAL metadata tag to files of all supported layouts. """
+        tags = {'tile_id': 'E048N012T3', 'value_info': '0 < x & y > "1"'}
+        for byte_order in ['<', '>']:
+            for bigtiff in [False, True]:
+                create_tiff(self.filepath, byte_order=byte_order, bigtiff=bigtiff)
+                assert read_gdal_metadata(self.filepath) == {}
+                write_gdal_metadata(self.filepath, tags)
+                assert read_gdal_metadata(self.filepath) == tags
+                assert read_pixels(self.filepath) == b'\x07\x09'
+
+    def test_overwrite_tag(self):
+        """ Tests replacing existing dataset-level items while keeping band-level items. """
+        gdal_metadata = '<GDALMetadata>\n  <Item name="tile_id">E048N012T3</Item>\n' \
+                        '  <Item name="scale" sample="0" role="scale">2</Item>\n</GDALMetadata>\n'
+        create_tiff(self.filepath, gdal_metadata=gdal_metadata)
+        write_gdal_metadata(self.filepath, {'tile_id': 'E051N015T3', 'orbit_direction': 'A'})
+        assert read_gdal_metadata(self.filepath) == {'tile_id': 'E051N015T3', 'orbit_direction': 'A'}
+        file_size = os.path.getsize(self.filepath)
+        write_gdal_metadata(self.filepath, {'tile_id': 'E048N012T3'})
+        assert os.path.getsize(self.filepath) == file_size
+        assert read_gdal_metadata(self.filepath) == {'tile_id': 'E048N012T3'}
+        with open(self.filepath, 'rb') as tiff_file:
+            assert b'role="scale"' in tiff_file.read()
+        assert read_pixels(self.filepath) == b'\x07\x09'
+
+    def test_size_limit(self):
+        """ Tests that the size limit error names the format of the file. """
+        for layout, format_name in [(_Layout('<', *_CLASSIC_LAYOUT), "classic TIFF"),
+                                    (_Layout('<', *_BIGTIFF_LAYOUT), "BigTIFF")]:
+            tiff_file = io.BytesIO()
+            tiff_file.tell = lambda: 2 ** (8 * layout.offset_size) - 2
+            with self.assertRaisesRegex(ValueError, "size limit of {}".format(format_name)):
+                _append(tiff_file, layout, b'abcd')
+
+    def test_no_tiff(self):
+        """ Tests that files which are not TIFF files are rejected. """
+        with open(self.filepath, 'wb') as tiff_file:
+            tiff_file.write(b'\x89PNG\r\n\x1a\n')
+        with self.assertRaises(ValueError):
+            read_gdal_metadata(self.filepath)
+
+
+class MetadataFileTest(unittest.TestCase):
+    """ Tests creating `MetaData` instances from files and writing them to files. """
+
+    def setUp(self):
+        """ Creates a temporary directory and a TIFF file without metadata. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmp_dirpath, "test.tif")
+        create_tiff(self.filepath)
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_roundtrip(self):
+        """ Tests writing and reading metadata of a product version. """
+        metadata = MetaData.from_product_version({'tile_id': 'E048N012T3', 'orbit_relative': 117,
+                                                  'date_creation': datetime.datetime(2021, 1, 1)},
+                                                 "s1dc_flood_mapper", "V1M2")
+        metadata.write_to_file(self.filepath)
+        metadata_read = MetaData.from_file(self.filepath, metadata._schema)
+        assert metadata_read.to_tags() == metadata.to_tags()
+        assert metadata_read['orbit_relative'] == 117
+        assert read_tags(self.filepath)['date_creation'] == '2021-01-01 00:00:00'
+
+    def test_fingerprint(self):
+        """ Tests that the reference metadata of a file is identified by its schema fingerprint. """
+        metadata = MetaData.from_product_version({'tile_id': 'E048N012T3'}, "s1dc_flood_mapper", "V1M2")
+        metadata.write_to_file(self.filepath, fingerprint=True)
+        assert read_tags(self.filepath)['medali_fingerprint'] == metadata._schema.fingerprint
+        metadata_read = MetaData.from_file(self.filepath)
+        assert metadata_read.same_content(metadata)
+        assert metadata_read._schema == metadata._schema
+        assert MetaData.from_file(self.filepath, metadata._schema).to_tags() == metadata.to_tags()
+
+    def test_projection(self):
+        """ Tests reading a subset of the metadata tags and updating only those. """
+        MetaData.from_product_version({'tile_id': 'E048N012T3', 'run_number': 1}, "s1dc_flood_mapper",
+                                      "V1M2").write_to_file(self.filepath, fingerprint=True)
+        metadata = MetaData.from_file(self.filepath, fields=['run_number', 'orbit_relative'])
+        assert metadata.to_tags() == {'run_number': '1', 'orbit_relative': 'null'}
+        metadata['run_number'] = 2
+        metadata.write_to_file(self.filepath)
+        tags = read_tags(self.filepath)
+        assert tags['run_number'] == '2'
+        assert tags['tile_id'] == 'E048N012T3'
+
+    def test_flush(self):
+        """ Tests that only modified metadata tags are written. """
+        MetaData.from_product_version({'tile_id': 'E048N012T3', 'run_number': 1}, "s1dc_flood_mapper",
+                                      "V1M2").write_to_file(self.filepath)
+        metadata = MetaData.from_file(self.filepath, config_registry.get_product("s1dc_flood_mapper", "V1M2"))
+        assert not metadata.flush(self.filepath)
+        metadata['run_number'] = 1
+        assert not metadata.flush(self.filepath)
+        metadata['run_number'] = 2
+        assert metadata.flush(self.filepath)
+        tags = read_tags(self.filepath)
+        assert tags['run_number'] == '2'
+        assert tags['tile_id'] == 'E048N012T3'
+        assert not metadata.is_dirty
+
+    def test_unsupported_format(self):
+        """ Tests that unsupported file formats are rejected. """
+        with self.assertRaises(ValueError):
+            read_tags(os.path.join(self.tmp_dirpath, "test.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+""" Tests the persistent SQLite metadata index. """
+
+import os
+import time
+import shutil
+import datetime
+import tempfile
+import unittest
+
+from src.medali.cli import main
+from src.medali.core import MetaData
+from src.medali.index import MetaDataIndex
+
+from tests.test_fileio import create_tiff
+
+
+class MetaDataIndexTest(unittest.TestCase):
+    """ Tests indexing, querying and refreshing the metadata of a small archive. """
+
+    def setUp(self):
+        """ Creates an archive of flood mapper GeoTIFF files and an index. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        self.archive_dirpath = os.path.join(self.tmp_dirpath, "archive")
+        os.makedirs(self.archive_dirpath)
+        self.filepaths = []
+        for i in range(6):
+            filepath = os.path.join(self.archive_dirpath, "flood_{}.tif".format(i))
+            create_tiff(filepath)
+            metadata = MetaData.from_product_version({'tile_id': 'E048N012T3' if i % 2 else 'E051N015T3',
+                                                      'orbit_relative': 117 if i < 3 else 44,
+                                                      'mask_applied': bool(i % 3),
+                                                      'water_backscatter_std': i / 2,
+                                                      'date_sensing': datetime.datetime(2021, 1, 1 + i)},
+                                                     "s1dc_flood_mapper", "V1M2")
+            metadata.write_to_file(filepath)
+            self.filepaths.append(filepath)
+        self.db_filepath = os.path.join(self.tmp_dirpath, "index.sqlite")
+        self.index = MetaDataIndex.from_product_version(self.db_filepath, "s1dc_flood_mapper", "V1M2")
+
+    def tearDown(self):
+        """ Closes the index and removes the temporary directory. """
+        self.index.close()
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_refresh(self):
+        """ Tests that only new, modified and removed files are processed. """
+        result = self.index.refresh(self.archive_dirpath, n_workers=2)
+        assert (result.n_updated, result.n_removed, result.errors) == (6, 0, {})
+        assert len(self.index) == 6
+        assert self.index.refresh(self.archive_dirpath).n_updated == 0
+
+        time.sleep(0.01)
+        MetaData.from_product_version({'tile_id': 'E048N012T3', 'orbit_relative': 1}, "s1dc_flood_mapper",
+                                      "V1M2").write_to_file(self.filepaths[0])
+        os.remove(self.filepaths[1])
+        with open(os.path.join(self.archive_dirpath, "broken.tif"), 'wb') as broken_file:
+            broken_file.write(b"no tiff")
+        result = self.index.refresh(self.archive_dirpath, n_workers=0)
+        assert (result.n_updated, result.n_removed) == (1, 1)
+        assert list(result.errors) == [os.path.join(self.archive_dirpath, "broken.tif")]
+        assert self.index.get(self.filepaths[0])['orbit_relative'] == 1
+        assert self.filepaths[1] not in self.index
+
+    def test_corrupt_files(self):
+        """ Tests that truncated and invalid TIFF files are reported as errors instead of failing the refresh. """
+        with open(self.filepaths[2], 'rb') as tiff_file:
+            content = tiff_file.read()
+        with open(self.filepaths[2], 'wb') as tiff_file:
+            tiff_file.write(content[:12])
+        with open(os.path.join(self.archive_dirpath, "corrupt.tif"), 'wb') as corrupt_file:
+            corrupt_file.write(b"II*\x00\xff\xff\xff\x7f")
+        result = self.index.refresh(self.archive_dirpath, n_workers=0)
+        assert result.n_updated == 5
+        assert sorted(result.errors) == [os.path.join(self.archive_dirpath, "corrupt.tif"), self.filepaths[2]]
+
+    def test_cli(self):
+        """ Tests refreshing an index from the command line. """
+        self.index.close()
+        args = [self.db_filepath, self.archive_dirpath, "--worker", "s1dc_flood_mapper", "--version", "V1M2"]
+        assert main(["index"] + args + ["--workers", "0"]) == 0
+        self.index = MetaDataIndex.from_product_version(self.db_filepath, "s1dc_flood_mapper", "V1M2")
+        assert len(self.index) == 6
+
+    def test_query(self):
+        """ Tests typed conditions, ranges, sorting and lazily created metadata. """
+        self.index.refresh(self.archive_dirpath, n_workers=0)
+        results = list(self.index.query({'tile_id': 'E048N012T3', 'orbit_relative': 117}))
+        assert [filepath for filepath, _ in results] == [self.filepaths[1]]
+        assert results[0][1].same_content(MetaData.from_file(self.filepaths[1], self.index.schema))
+
+        date_range = (datetime.datetime(2021, 1, 2), datetime.datetime(2021, 1, 4))
+        assert self.index.filepaths({'date_sensing': date_range}, order_by='-date_sensing') == \
+            self.filepaths[1:4][::-1]
+        assert self.index.count({'water_backscatter_std': (1.0, None)}) == 4
+        assert self.index.count({'mask_applied': False}) == 2
+        assert self.index.count({'orbit_relative': [44, '117']}) == 6
+        assert self.index.count({'run_number': None}) == 6
+        assert self.index.filepaths(order_by=['orbit_relative', '-tile_id'], limit=2) == self.filepaths[3:5][::-1]
+
+        filepath, metadata = next(self.index.query({'date_sensing': datetime.datetime(2021, 1, 6)},
+                                                   fields=['tile_id', 'date_sensing']))
+        assert filepath == self.filepaths[5]
+        assert metadata.to_tags() == {'tile_id': 'E048N012T3', 'date_sensing': '2021-01-06 00:00:00'}
+        with self.assertRaises(KeyError):
+            self.index.count({'unknown': 1})
+
+    def test_upsert(self):
+        """ Tests adding metadata of files and tag dictionaries, and rejecting other reference metadata. """
+        tags = {'tile_id': 'E048N012T3', 'orbit_relative': '117', 'unknown': 'ignored'}
+        metadata = MetaData.from_file(self.filepaths[0], self.index.schema)
+        assert self.index.upsert([("missing.tif", tags), (self.filepaths[0], metadata)]) == 2
+        assert self.index.get("missing.tif")['orbit_relative'] == 117
+        assert self.index.get(self.filepaths[2]) is None
+        with self.assertRaises(ValueError):
+            self.index.upsert([("invalid.tif", {'orbit_relative': 'abc'})])
+        with self.assertRaises(ValueError):
+            MetaDataIndex.from_product_version(self.db_filepath, "s1dc_flood_mapper", "V1M1")
+
+    def test_round_trip(self):
+        """ Tests that queried metadata has exactly the tags which have been indexed. """
+        tags = {'tile_id': 'E048N012T3', 'run_number': 'none', 'water_backscatter_std': '1'}
+        self.index.upsert([("tags.tif", tags)])
+        assert {name: self.index.get("tags.tif").to_tags()[name] for name in tags} == tags
+        assert self.index.count({'run_number': None}) == 1
+        _, metadata = next(self.index.query(fields=['run_number', 'water_backscatter_std']))
+        assert metadata.to_tags() == {'run_number': 'none', 'water_backscatter_std': '1'}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+""" Tests migrating metadata between versions of reference metadata. """
+
+import unittest
+
+from src.medali.core import MetaData
+from src.medali.table import MetaDataTable
+from src.medali.migration import Migration
+from src.medali.migration import SchemaDiff
+
+
+class MigrationTest(unittest.TestCase):
+    """ Tests computing differences between reference metadata and applying migrations. """
+
+    def setUp(self):
+        """ Defines two versions of reference metadata. """
+        self.source = {'Metadata': {'tile_id': 'string', 'run_number': 'string', 'flood_reference': 'string',
+                                    'scale_factor': 'integer', 'orbit_direction': 'string'},
+                       'Expected_value': {'orbit_direction': ['A', 'D']}}
+        self.target = {'Metadata': {'tile_id': 'string', 'run_number': 'integer', 'noflood_reference': 'string',
+                                    'orbit_direction': 'string', 'creator': 'string'},
+                       'Expected_value': {'orbit_direction': ['A', 'D', 'B']}}
+        self.renames = {'flood_reference': 'noflood_reference'}
+
+    def test_diff(self):
+        """ Tests that added, removed, renamed and changed attributes are detected. """
+        diff = SchemaDiff(self.source, self.target, renames=self.renames)
+        assert diff.added == ('creator',)
+        assert diff.removed == ('scale_factor',)
+        assert diff.dtype_changes == {'run_number': ('string', 'integer')}
+        assert diff.expected_changes == {'orbit_direction': (('A', 'D'), ('A', 'D', 'B'))}
+        assert not SchemaDiff(self.target, self.target)
+        with self.assertRaises(KeyError):
+            SchemaDiff(self.source, self.target, renames={'flood_reference': 'missing'})
+
+    def test_apply(self):
+        """ Tests migrating single records. """
+        migration = Migration(self.source, self.target, renames=self.renames, defaults={'creator': 'TUW'})
+        migrated = migration.apply({'tile_id': 'E048N012T3', 'run_number': '3', 'flood_reference': 'harmonic',
+                                    'scale_factor': 2})
+        assert migrated == {'tile_id': 'E048N012T3', 'run_number': '3', 'noflood_reference': 'harmonic',
+                            'orbit_direction': 'null', 'creator': 'TUW'}
+        metadata = MetaData(migrated, migration.target)
+        assert metadata['run_number'] == 3
+
+        migrated = migration.apply({'run_number': 'R03'})
+        assert migrated['run_number'] == 'R03'
+        assert [violation.kind for violation in migration.target.validate(migrated)] == ['dtype']
+
+    def test_apply_table(self):
+        """ Tests that migrating a table equals migrating each row. """
+        records = [{'tile_id': 'E048N012T3', 'run_number': '3', 'flood_reference': 'harmonic'},
+                   {'tile_id': 'E051N015T3', 'run_number': 'R03', 'orbit_direction': 'A'},
+                   {'tile_id': 'E048N012T3', 'run_number': '3', 'scale_factor': 5}]
+        migration = Migration(self.source, self.target, renames=self.renames, defaults={'creator': 'TUW'})
+        table = MetaDataTable(self.source, records)
+        migrated = migration.apply_table(table)
+        assert migrated.to_tags() == list(migration.apply_many(table.iter_tags()))
+        assert migrated['run_number'].to_tags() == ['3', 'R03', '3']
+        assert [violation.index for violation in migrated.validate()] == [1]
+
+    def test_product_versions(self):
+        """ Tests migrating flood metadata from V1M1 to V1M2. """
+        migration = Migration.from_product_versions("s1dc_flood_mapper", "V1M1", "V1M2",
+                                                    renames={'flood_reference': 'noflood_reference',
+                                                             'input_reference': 'noflood_reference_input'})
+        assert migration.diff.added == ('noflood_reference_details',)
+        assert migration.diff.removed == ('input_reference_addon', 'reference_nobs_thresh')
+        metadata = MetaData.from_product_version({'flood_reference': 'harmonic', 'orbit_direction': 'A'},
+                                                 "s1dc_flood_mapper", "V1M1")
+        migrated = MetaData(migration.apply(metadata), migration.target)
+        assert migrated['noflood_reference'] == 'harmonic'
+        assert migrated['orbit_direction'] == 'A'
+
+
+if __name__ == '__main__':
+    unittest.main()
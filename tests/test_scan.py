@@ -0,0 +1,114 @@
+""" Tests the parallel validation of archives. """
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from src.medali.core import MetaData
+from src.medali.cli import main
+from src.medali.scan import scan
+from src.medali.scan import write_jsonl
+
+from tests.test_fileio import create_tiff
+
+
+class ScanTest(unittest.TestCase):
+    """ Tests scanning a small archive of GeoTIFF files. """
+
+    def setUp(self):
+        """ Creates an archive with two valid, one invalid and one unreadable file. """
+        self.tmp_dirpath = tempfile.mkdtemp()
+        self.archive_dirpath = os.path.join(self.tmp_dirpath, "archive")
+        tile_dirpath = os.path.join(self.archive_dirpath, "EQUI7_EU020M", "E048N012T3")
+        os.makedirs(tile_dirpath)
+        for i, orbit_direction in enumerate(['A', 'D']):
+            filepath = os.path.join(tile_dirpath, "FLOOD_{}.tif".format(i))
+            create_tiff(filepath)
+            MetaData.from_product_version({'orbit_direction': orbit_direction}, "s1dc_flood_mapper",
+                                          "V1M2").write_to_file(filepath)
+        create_tiff(os.path.join(tile_dirpath, "FLOOD_2.tif"),
+                    gdal_metadata='<GDALMetadata>\n  <Item name="orbit_direction">X</Item>\n</GDALMetadata>\n')
+        with open(os.path.join(tile_dirpath, "FLOOD_3.tif"), 'wb') as tiff_file:
+            tiff_file.write(b'no tiff')
+        with open(os.path.join(tile_dirpath, "README.txt"), 'w') as txt_file:
+            txt_file.write("ignored")
+        self.checkpoint_filepath = os.path.join(self.tmp_dirpath, "checkpoint.txt")
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        shutil.rmtree(self.tmp_dirpath)
+
+    def test_scan(self):
+        """ Tests that results are ordered and violations are reported for each file. """
+        for n_workers, use_threads in [(0, False), (2, True), (2, False)]:
+            results = list(scan(self.archive_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=n_workers,
+                                use_threads=use_threads, max_pending=2))
+            assert [os.path.basename(result.filepath) for result in results] == \
+                ["FLOOD_{}.tif".format(i) for i in range(4)]
+            assert results[0].violations == [] and results[0].error is None
+            assert [violation.kind for violation in results[2].violations if violation.kind != 'missing'] == \
+                ['expected']
+            assert results[3].error.startswith("ValueError")
+
+    def test_fingerprint(self):
+        """ Tests that the fingerprint tag is not reported as an unknown attribute. """
+        filepath = os.path.join(self.archive_dirpath, "EQUI7_EU020M", "E048N012T3", "FLOOD_0.tif")
+        MetaData.from_product_version({'orbit_direction': 'A'}, "s1dc_flood_mapper",
+                                      "V1M2").write_to_file(filepath, fingerprint=True)
+        results = list(scan(self.archive_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=0))
+        assert results[0].violations == [] and results[0].error is None
+
+    def test_corrupt_files(self):
+        """ Tests that truncated files, corrupt GDAL metadata and unreadable NetCDF files are reported per file. """
+        corrupt_dirpath = os.path.join(self.tmp_dirpath, "corrupt")
+        os.makedirs(corrupt_dirpath)
+        create_tiff(os.path.join(corrupt_dirpath, "a_truncated.tif"))
+        with open(os.path.join(corrupt_dirpath, "a_truncated.tif"), 'r+b') as tiff_file:
+            tiff_file.truncate(6)
+        create_tiff(os.path.join(corrupt_dirpath, "b_corrupt_xml.tif"), gdal_metadata='<GDALMetadata><Item')
+        with open(os.path.join(corrupt_dirpath, "c_broken.nc"), 'wb') as nc_file:
+            nc_file.write(b'no netcdf')
+        create_tiff(os.path.join(corrupt_dirpath, "d_valid.tif"))
+
+        results = list(scan(corrupt_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=0))
+        assert [os.path.basename(result.filepath) for result in results] == \
+            ["a_truncated.tif", "b_corrupt_xml.tif", "c_broken.nc", "d_valid.tif"]
+        assert results[0].error.startswith("ValueError")
+        assert results[1].error.startswith("ValueError")
+        assert results[2].error is not None
+        assert results[3].error is None
+
+    def test_resume(self):
+        """ Tests that files listed in the checkpoint file are skipped and the last yielded file is repeated. """
+        results = scan(self.archive_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=0,
+                       checkpoint_filepath=self.checkpoint_filepath)
+        next(results)
+        next(results)
+        results.close()
+        results = list(scan(self.archive_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=0,
+                            checkpoint_filepath=self.checkpoint_filepath))
+        assert [os.path.basename(result.filepath) for result in results] == \
+            ["FLOOD_1.tif", "FLOOD_2.tif", "FLOOD_3.tif"]
+
+    def test_jsonl(self):
+        """ Tests writing results to a JSON Lines file and running the command line interface. """
+        jsonl_filepath = os.path.join(self.tmp_dirpath, "results.jsonl")
+        n_files, n_invalid = write_jsonl(scan(self.archive_dirpath, "s1dc_flood_mapper", "V1M2", n_workers=0),
+                                         jsonl_filepath)
+        assert (n_files, n_invalid) == (4, 2)
+        with open(jsonl_filepath) as jsonl_file:
+            entries = [json.loads(line) for line in jsonl_file]
+        assert [entry['valid'] for entry in entries] == [True, True, False, False]
+
+        cli_filepath = os.path.join(self.tmp_dirpath, "cli.jsonl")
+        exit_code = main(["scan", self.archive_dirpath, "--worker", "s1dc_flood_mapper", "--version", "V1M2",
+                          "--workers", "0", "--output", cli_filepath])
+        assert exit_code == 1
+        with open(cli_filepath) as jsonl_file:
+            assert [json.loads(line) for line in jsonl_file] == entries
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+""" Tests compiled reference metadata schemas. """
+
+import datetime
+import unittest
+from fractions import Fraction
+
+from src.medali.schema import Schema
+from src.medali.schema import DATETIME_FORMAT
+from src.medali.schema import intern_schema
+from src.medali.schema import config_fingerprint
+from src.medali.schema import parse_datetime
+from src.medali.schema import format_datetime
+from src.medali.schema import set_datetime_cache_size
+
+
+class SchemaTest(unittest.TestCase):
+    """ Tests compiled codecs and expected value checks of a schema. """
+
+    def setUp(self):
+        """ Creates a schema covering all data types and expected value definitions. """
+        ref_metadata = {'Metadata': {'datetime_type': 'datetime',
+                                     'boolean_type': 'boolean',
+                                     'number_type': 'number',
+                                     'integer_type': 'integer',
+                                     'string_pattern': 'string',
+                                     'string_list': 'string'},
+                        'Expected_value': {'string_pattern': 'pattern, Pattern[0-9][0-9]',
+                                           'string_list': ['V1', 'V2']}}
+        self.schema = Schema(ref_metadata)
+
+    def test_codecs(self):
+        """ Tests encoding and decoding with the compiled attribute codecs. """
+        attribute = self.schema['datetime_type']
+        timestamp = datetime.datetime(2020, 12, 12, 12, 20, 10)
+        assert attribute.encode(timestamp) == '2020-12-12 12:20:10'
+        assert attribute.decode('2020-12-12 12:20:10') == timestamp
+        assert self.schema['boolean_type'].decode('False') is False
+        assert self.schema['integer_type'].encode(None) == 'none'
+        assert self.schema['number_type'].decode('null') == 'null'
+        with self.assertRaises(ValueError):
+            self.schema['integer_type'].encode(1.2)
+        with self.assertRaises(ValueError):
+            self.schema['number_type'].encode('haha')
+
+    def test_convert(self):
+        """ Tests single-pass validation and encoding. """
+        timestamp = datetime.datetime(2020, 12, 12, 12, 20, 10)
+        assert self.schema['datetime_type'].convert(timestamp) == ('2020-12-12 12:20:10', timestamp)
+        assert self.schema['datetime_type'].convert('2020-12-12 12:20:10') == ('2020-12-12 12:20:10', timestamp)
+        assert self.schema['datetime_type'].convert(timestamp.replace(microsecond=5)) == \
+            ('2020-12-12 12:20:10', timestamp)
+        assert self.schema['number_type'].convert(1) == ('1', 1.)
+        assert self.schema['integer_type'].convert(None) == ('none', None)
+        with self.assertRaises(ValueError):
+            self.schema['integer_type'].convert(True)
+        with self.assertRaises(ValueError):
+            self.schema['datetime_type'].convert('2020-12-12')
+        with self.assertRaises(ValueError):  # the encoding of years below 1000 is not decodable
+            self.schema['datetime_type'].convert(datetime.datetime(999, 1, 1))
+        with self.assertRaisesRegex(ValueError, "could not convert"):
+            self.schema['number_type'].convert(Fraction(1, 3))
+        with self.assertRaisesRegex(ValueError, "invalid literal"):
+            self.schema['integer_type'].convert(True)
+        assert self.schema['string_list'].validate('V5')[2] == \
+            ('expected', "Metadata value 'V5' is not in compliance with '['V1', 'V2']'")
+
+    def test_expected_values(self):
+        """ Tests compiled pattern and list membership checks. """
+        assert self.schema['string_pattern'].is_expected('Pattern01')
+        assert not self.schema['string_pattern'].is_expected('Pattern')
+        assert self.schema['string_list'].is_expected('V2')
+        assert not self.schema['string_list'].is_expected('V5')
+        assert self.schema['string_list'].is_expected('null')
+        assert self.schema['number_type'].is_expected(2.)
+
+    def test_unknown_attribute(self):
+        """ Tests that unknown attributes are rejected by a schema with data types. """
+        with self.assertRaises(KeyError):
+            self.schema['unknown']
+        assert 'unknown' not in self.schema
+        assert len(self.schema) == 6
+
+    def test_immutable(self):
+        """ Tests that the reference metadata of a schema can not be modified. """
+        with self.assertRaises(TypeError):
+            self.schema.ref_meta['Metadata']['unknown'] = 'string'
+
+    def test_untyped(self):
+        """ Tests that any attribute is passed through without reference data types. """
+        schema = Schema({'Metadata': {}, 'Expected_value': {}})
+        assert not schema.strict
+        assert schema['any'].encode(1) == 1
+        assert schema['any'].decode('1') == '1'
+
+    def test_fingerprint(self):
+        """ Tests that schemas with the same content have the same fingerprint and compare equal. """
+        ref_metadata = {'Metadata': {'tile_id': 'string', 'run_number': 'integer'},
+                        'Expected_value': {'tile_id': ['E048N012T3', 'E051N015T3'], 'run_number': '1'}}
+        reordered = {'Expected_value': {'run_number': '1', 'tile_id': ('E048N012T3', 'E051N015T3')},
+                     'Metadata': {'tile_id': 'string', 'run_number': 'integer'}}
+        schema = Schema(ref_metadata, name='a')
+        assert len(schema.fingerprint) == 16
+        assert schema.fingerprint == Schema(reordered, name='b').fingerprint == config_fingerprint(ref_metadata)
+        assert schema == Schema(reordered) and hash(schema) == hash(Schema(reordered))
+        assert Schema({'Metadata': {}}) == Schema({'Metadata': {}, 'Expected_value': {}})
+        swapped = {'Metadata': {'run_number': 'integer', 'tile_id': 'string'}}  # attribute positions differ
+        assert schema != Schema(swapped)
+        assert schema.fingerprint != Schema(swapped).fingerprint
+
+    def test_intern(self):
+        """ Tests that reference metadata with the same content is compiled only once. """
+        ref_metadata = {'Metadata': {'tile_id': 'string', 'interned': 'boolean'}}
+        schema = intern_schema(ref_metadata)
+        assert intern_schema(dict(ref_metadata)) is schema
+        assert intern_schema(Schema(ref_metadata)) is schema
+        assert intern_schema({'Metadata': {'tile_id': 'string'}}) is not schema
+
+
+class DatetimeCodecTest(unittest.TestCase):
+    """ Tests the fast-path datetime codec against `strptime` and `strftime`. """
+
+    def test_parse(self):
+        """ Tests that decoded datetimes and raised errors equal the ones of `strptime`. """
+        values = ['2020-12-12 12:20:10', '0001-01-01 00:00:00', '2020-1-2 3:4:5', '2020-02-30 00:00:00',
+                  '2020-12-12T12:20:10', '2020-12-12 24:00:00', '+020-12-12 12:20:10', '2020-12-12 12:20:10 ']
+        for value in values:
+            try:
+                expected = datetime.datetime.strptime(value, DATETIME_FORMAT)
+            except ValueError as err:
+                with self.assertRaises(ValueError) as ctx:
+                    parse_datetime(value)
+                assert str(ctx.exception) == str(err)
+            else:
+                assert parse_datetime(value) == expected
+
+    def test_format(self):
+        """ Tests that encoded datetimes equal the ones of `strftime`. """
+        for timestamp in [datetime.datetime(2020, 12, 12, 12, 20, 10, 5), datetime.datetime(999, 1, 1)]:
+            assert format_datetime(timestamp) == timestamp.strftime(DATETIME_FORMAT)
+
+    def test_cache(self):
+        """ Tests decoding with enabled datetime cache. """
+        set_datetime_cache_size(16)
+        try:
+            schema = Schema({'Metadata': {'datetime_type': 'datetime'}})
+            timestamp = schema['datetime_type'].decode('2020-12-12 12:20:10')
+            assert schema['datetime_type'].decode('2020-12-12 12:20:10') is timestamp
+            with self.assertRaises(ValueError):
+                schema['datetime_type'].decode('2020-12-12')
+        finally:
+            set_datetime_cache_size(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
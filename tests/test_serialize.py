@@ -0,0 +1,85 @@
+""" Tests pickling of schemas and metadata, and the compact batch serialisation. """
+
+import os
+import pickle
+import shutil
+import tempfile
+import datetime
+import unittest
+
+from src.medali.core import MetaData
+from src.medali.schema import Schema
+from src.medali.schema import thaw_config
+from src.medali.config import config_registry
+from src.medali.serialize import dumps_batch
+from src.medali.serialize import loads_batch
+
+
+class SerializeTest(unittest.TestCase):
+    """ Tests round trips of schemas and `MetaData` instances. """
+
+    def setUp(self):
+        """ Creates metadata of a product version, a config file and ad-hoc reference metadata. """
+        test_data_dirpath = os.path.join(os.path.dirname(__file__), "test_data")
+        self.cfg_filepath = os.path.join(test_data_dirpath, "cfg_template.ini")
+        self.product_metadata = MetaData.from_product_version({'tile_id': 'E048N012T3', 'run_number': 3},
+                                                              "s1dc_flood_mapper", "V1M2")
+        self.cfg_metadata = MetaData.from_cfg_file({}, self.cfg_filepath)
+        self.cfg_metadata['datetime_type'] = datetime.datetime(2020, 12, 12, 12, 20, 10)
+        self.adhoc_metadata = MetaData({'tile_id': 'E048N012T3'}, {'Metadata': {'tile_id': 'string'}})
+
+    def test_pickle_schema(self):
+        """ Tests that pickled schemas of config files and products resolve to the cached registry schemas. """
+        schema = config_registry.get_product("s1dc_flood_mapper", "V1M2")
+        assert pickle.loads(pickle.dumps(schema)) is schema
+        schema = config_registry.get(self.cfg_filepath)
+        assert pickle.loads(pickle.dumps(schema)) is schema
+        schema = Schema({'Metadata': {'tile_id': 'string'}, 'Expected_value': {'tile_id': ['E048N012T3']}},
+                        name='tiles')
+        restored = pickle.loads(pickle.dumps(schema))
+        assert restored.name == 'tiles'
+        assert thaw_config(restored.ref_meta) == thaw_config(schema.ref_meta)
+
+    def test_pickle_changed_schema(self):
+        """ Tests that unpickling fails if the reference metadata of a config file changed in the meantime. """
+        tmp_dirpath = tempfile.mkdtemp()
+        try:
+            cfg_filepath = os.path.join(tmp_dirpath, "metadata.ini")
+            with open(cfg_filepath, 'w') as cfg_file:
+                cfg_file.write("[Metadata]\ntile_id = string\n")
+            data = pickle.dumps(MetaData.from_cfg_file({'tile_id': 'E048N012T3'}, cfg_filepath))
+            with open(cfg_filepath, 'w') as cfg_file:
+                cfg_file.write("[Metadata]\ntile_id = string\nrun_number = integer\n")
+            with self.assertRaises(ValueError):
+                pickle.loads(data)
+        finally:
+            shutil.rmtree(tmp_dirpath)
+
+    def test_pickle_metadata(self):
+        """ Tests round trips of single `MetaData` instances, including their dirty state. """
+        self.adhoc_metadata['tile_id'] = 'E051N015T3'
+        for metadata in (self.product_metadata, self.cfg_metadata, self.adhoc_metadata):
+            restored = pickle.loads(pickle.dumps(metadata))
+            assert restored.to_tags() == metadata.to_tags()
+            assert restored.dirty_tags() == metadata.dirty_tags()
+        assert pickle.loads(pickle.dumps(self.product_metadata))._schema is self.product_metadata._schema
+
+    def test_batch(self):
+        """ Tests that batches of mixed schemas keep their order and values, and are smaller than plain tags. """
+        metadata = []
+        for i in range(100):
+            entry = MetaData.from_product_version(self.product_metadata.to_tags(), "s1dc_flood_mapper", "V1M2")
+            entry['run_number'] = i % 4
+            metadata.extend([entry, self.cfg_metadata, self.adhoc_metadata])
+
+        data = dumps_batch(metadata)
+        restored = loads_batch(data)
+        assert [entry.to_tags() for entry in restored] == [entry.to_tags() for entry in metadata]
+        assert [type(entry) for entry in restored] == [type(entry) for entry in metadata]
+        assert restored[0]._schema is metadata[0]._schema
+        assert len(data) < len(pickle.dumps([entry.to_tags() for entry in metadata]))
+        assert loads_batch(dumps_batch([])) == []
+
+
+if __name__ == '__main__':
+    unittest.main()
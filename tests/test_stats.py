@@ -0,0 +1,92 @@
+""" Tests the opt-in instrumentation of config parsing and codecs. """
+
+import os
+import datetime
+import unittest
+
+from src.medali import stats
+from src.medali.core import MetaData
+from src.medali.config import clear_config_cache
+from src.medali.schema import clear_interned_schemas
+
+
+class StatsTest(unittest.TestCase):
+    """ Tests counting, exporting and disabling of instrumentation. """
+
+    def setUp(self):
+        """ Resets the statistics and enables instrumentation. """
+        self.cfg_filepath = os.path.join(os.path.dirname(__file__), "test_data", "cfg_template.ini")
+        clear_config_cache()
+        clear_interned_schemas()
+        stats.reset()
+        stats.enable()
+
+    def tearDown(self):
+        """ Disables instrumentation and resets the statistics. """
+        stats.disable()
+        stats.reset()
+
+    def _counts(self):
+        return {(record.event, record.attribute): record.count for record in stats.snapshot()}
+
+    def test_counts(self):
+        """ Tests that config parsing and codec calls are counted per attribute. """
+        metadata = MetaData.from_cfg_file({'integer_type': 1}, self.cfg_filepath)
+        metadata['datetime_type'] = '2020-12-12 12:20:10'
+        assert metadata['datetime_type'] == datetime.datetime(2020, 12, 12, 12, 20, 10)
+        counts = self._counts()
+        assert counts[('read_config', None)] == 1
+        assert counts[('convert', 'integer_type')] == 1
+        assert counts[('decode', 'datetime_type')] == 2  # validating the string and reading the value
+        assert counts[('convert', 'datetime_type')] == 1
+        assert counts[('is_expected', 'datetime_type')] == 1
+        record = [record for record in stats.snapshot() if record.event == 'convert'][0]
+        assert record.schema == os.path.abspath(self.cfg_filepath)
+        assert record.total_time >= 0
+
+    def test_export(self):
+        """ Tests that registered callbacks receive the statistics. """
+        exported = []
+        stats.add_callback(exported.append)
+        try:
+            MetaData.from_product_version({'run_number': 1}, "s1dc_flood_mapper", "V1M2")
+            records = stats.export()
+        finally:
+            stats.remove_callback(exported.append)
+        assert exported == [records]
+        schema_names = [record.schema for record in records
+                        if (record.event, record.attribute) == ('convert', 'run_number')]
+        assert schema_names and 'V1M2' in schema_names[0]
+        assert stats.snapshot() == []
+
+    def test_cached_schemas(self):
+        """ Tests that schemas cached before enabling instrumentation are instrumented. """
+        stats.disable()
+        metadata = MetaData.from_cfg_file({}, self.cfg_filepath)
+        stats.enable()
+        metadata['integer_type'] = 1
+        assert self._counts()[('convert', 'integer_type')] == 1
+
+    def test_nested_calls(self):
+        """ Tests that codecs called by other codecs, e.g. when converting records, are counted. """
+        schema = MetaData.from_cfg_file({}, self.cfg_filepath)._schema
+        schema.convert({'integer_type': '1', 'datetime_type': '2020-12-12 12:20:10'})
+        counts = self._counts()
+        assert counts[('convert', 'integer_type')] == 1
+        assert counts[('decode', 'integer_type')] == 1
+        assert counts[('decode', 'datetime_type')] == 1
+
+    def test_disable(self):
+        """ Tests that nothing is recorded after disabling and that schemas are never modified. """
+        metadata = MetaData.from_cfg_file({}, self.cfg_filepath)
+        attribute = metadata._schema['integer_type']
+        convert = attribute.convert
+        stats.disable()
+        assert attribute.convert is convert
+        metadata['integer_type'] = 1
+        assert ('convert', 'integer_type') not in self._counts()
+        assert not stats.is_enabled()
+
+
+if __name__ == '__main__':
+    unittest.main()
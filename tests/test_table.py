@@ -0,0 +1,101 @@
+""" Tests columnar storage, validation and querying of metadata. """
+
+import os
+import datetime
+import unittest
+
+from src.medali.core import MetaData
+from src.medali.table import MetaDataTable
+from src.medali.config import read_config
+
+
+class MetaDataTableTest(unittest.TestCase):
+    """ Tests a metadata table created from the template config file. """
+
+    def setUp(self):
+        """ Creates a metadata table with four rows. """
+        test_data_dirpath = os.path.join(os.path.dirname(__file__), "test_data")
+        self.cfg_filepath = os.path.join(test_data_dirpath, "cfg_template.ini")
+        records = [{'datetime_type': datetime.datetime(2020, 12, 12), 'string_list': 'V1', 'integer_type': 1},
+                   {'datetime_type': datetime.datetime(2020, 12, 13), 'string_list': 'V2', 'integer_type': 1},
+                   {'datetime_type': '2020-12-14 00:00:00', 'string_list': 'V1', 'integer_type': 2},
+                   {'datetime_type': '2020-12-15 00:00:00', 'string_list': 'V2'}]
+        self.table = MetaDataTable.from_cfg_file(records, self.cfg_filepath)
+
+    def test_columns(self):
+        """ Tests dictionary encoding and decoding of columns. """
+        assert len(self.table) == 4
+        column = self.table['string_list']
+        assert column.categories == ['V1', 'V2']
+        assert column.to_list() == ['V1', 'V2', 'V1', 'V2']
+        assert self.table['integer_type'].to_list() == [1, 1, 2, 'null']
+        assert self.table['datetime_type'][2] == datetime.datetime(2020, 12, 14)
+
+    def test_filter(self):
+        """ Tests selecting rows by combining masks. """
+        mask = (self.table['string_list'] == 'V1') & (self.table['integer_type'] == 1)
+        assert mask.indices() == [0]
+        assert (~mask).indices() == [1, 2, 3]
+        subset = self.table[self.table['datetime_type'] >= datetime.datetime(2020, 12, 13)]
+        assert subset['string_list'].to_list() == ['V2', 'V1', 'V2']
+        assert len(self.table.where(string_list='V2', integer_type='1')) == 1
+        assert self.table['integer_type'].isin([2, 3]).indices() == [2]
+
+    def test_validate(self):
+        """ Tests collecting all violations of encoded values. """
+        self.table.append({'string_list': 'V5', 'number_type': 'haha'})
+        self.table.append({'string_list': 'V5'})
+        violations = self.table.validate()
+        assert [(v.index, v.attribute, v.kind) for v in violations] == \
+            [(4, 'number_type', 'dtype'), (4, 'string_list', 'expected'), (5, 'string_list', 'expected')]
+
+    def test_unknown_attribute(self):
+        """ Tests that unknown attributes are rejected. """
+        with self.assertRaises(KeyError):
+            self.table.append({'unknown': 'abc'})
+
+    def test_interned_schema(self):
+        """ Tests that tables created from equal reference metadata dictionaries share one schema. """
+        ref_metadata = read_config(self.cfg_filepath)
+        assert MetaDataTable(ref_metadata).schema is MetaDataTable(read_config(self.cfg_filepath)).schema
+
+    def test_failed_append(self):
+        """ Tests that a record with a value of the wrong data type is not appended partially. """
+        with self.assertRaises(ValueError):
+            self.table.append({'datetime_type': datetime.datetime(2020, 12, 16), 'integer_type': 1.5})
+        assert len(self.table) == 4
+        assert {len(self.table[name].codes) for name in self.table.columns} == {4}
+
+    def test_append_to_subset(self):
+        """ Tests that appending to a selection of rows does not change the categories of the table. """
+        subset = self.table[self.table['string_list'] == 'V1']
+        subset.append({'string_list': 'V3'})
+        assert subset['string_list'].to_list() == ['V1', 'V1', 'V3']
+        assert self.table['string_list'].categories == ['V1', 'V2']
+        self.table.append({'string_list': 'V2'})
+        assert self.table['string_list'].to_list()[-1] == 'V2'
+
+    def test_export(self):
+        """ Tests conversion to tag dictionaries and `MetaData` instances. """
+        tags = self.table.to_tags()
+        assert tags[0]['datetime_type'] == '2020-12-12 00:00:00'
+        assert tags[3]['integer_type'] == 'null'
+        metadata = self.table.row(1)
+        assert metadata['datetime_type'] == datetime.datetime(2020, 12, 13)
+        assert metadata.to_tags() == tags[1]
+        table = MetaDataTable.from_metadata([metadata, metadata])
+        assert table.to_tags() == [tags[1], tags[1]]
+
+    def test_mixed_schemas(self):
+        """ Tests that tables can not be created from instances with different reference metadata. """
+        metadata = self.table.row(0)
+        projection = MetaData.from_cfg_file(metadata.to_tags(), self.cfg_filepath, fields=['string_list'])
+        for other in (projection, MetaData({'abc': 'def'})):
+            with self.assertRaises(ValueError):
+                MetaDataTable.from_metadata([metadata, other])
+        equal = MetaData(metadata.to_tags(), read_config(self.cfg_filepath))
+        assert len(MetaDataTable.from_metadata([metadata, equal])) == 2
+
+
+if __name__ == '__main__':
+    unittest.main()